@@ -7,6 +7,11 @@ MONGO_PASSWORD = os.getenv("MONGO_PASSWORD", "password")
 MONGO_HOST = os.getenv("MONGO_HOST", "localhost")
 MONGO_PORT = os.getenv("MONGO_PORT", "27017")
 MONGO_DBNAME = os.getenv("MONGO_DBNAME", "fast_blog_db")
+# Replica set name (transactions need one - compose.yml runs a single-node "rs0"); empty = standalone
+MONGO_REPLICA_SET = os.getenv("MONGO_REPLICA_SET", "")
+# Connect to MONGO_HOST only, ignoring the member host names in the replica set config
+# (e.g. from the host machine, where "mongodb" doesn't resolve)
+MONGO_DIRECT_CONNECTION = os.getenv("MONGO_DIRECT_CONNECTION", "false").lower() == "true"
 
 # JWT Configuration
 JWT_SECRET = os.getenv("JWT_SECRET", "your-default-secret-key")
@@ -15,12 +20,140 @@ JWT_REFRESH_SECRET = os.getenv("JWT_REFRESH_SECRET", JWT_SECRET)
 JWT_ACCESS_EXPIRY = os.getenv("JWT_ACCESS_EXPIRY", "15m")
 JWT_REFRESH_EXPIRY = os.getenv("JWT_REFRESH_EXPIRY", "7d")
 
+# Refresh coalescing (concurrent tabs refreshing at the same time)
+REFRESH_LOCK_TTL_MS = int(os.getenv("REFRESH_LOCK_TTL_MS", "5000"))
+REFRESH_GRACE_SECONDS = int(os.getenv("REFRESH_GRACE_SECONDS", "30"))
+
 # Redis Configuration
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
 REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", "")
 REDIS_URL = f"redis://:{REDIS_PASSWORD}@{REDIS_HOST}:{REDIS_PORT}"
 
+# Redis connection pool / resilience
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "1.0"))
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", "1.0"))
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30"))
+REDIS_RETRY_ATTEMPTS = int(os.getenv("REDIS_RETRY_ATTEMPTS", "2"))
+REDIS_RETRY_BACKOFF_BASE = float(os.getenv("REDIS_RETRY_BACKOFF_BASE", "0.01"))
+REDIS_RETRY_BACKOFF_CAP = float(os.getenv("REDIS_RETRY_BACKOFF_CAP", "0.2"))
+REDIS_BREAKER_FAILURE_THRESHOLD = int(os.getenv("REDIS_BREAKER_FAILURE_THRESHOLD", "5"))
+REDIS_BREAKER_RESET_SECONDS = float(os.getenv("REDIS_BREAKER_RESET_SECONDS", "10"))
+
+# Redis client-side caching (hot auth keys, invalidated by CLIENT TRACKING pushes)
+REDIS_CLIENT_CACHE_ENABLED = os.getenv("REDIS_CLIENT_CACHE_ENABLED", "true").lower() == "true"
+REDIS_CLIENT_CACHE_MAX_ENTRIES = int(os.getenv("REDIS_CLIENT_CACHE_MAX_ENTRIES", "10000"))
+REDIS_CLIENT_CACHE_TTL_SECONDS = float(os.getenv("REDIS_CLIENT_CACHE_TTL_SECONDS", "10"))
+REDIS_CLIENT_CACHE_PREFIXES = os.getenv(
+    "REDIS_CLIENT_CACHE_PREFIXES", "blacklist:,csrf_token:,refresh_token:"
+).split(",")
+# CLIENT TRACKINGINFO check of the tracking connection - a dropped one is re-established this often
+REDIS_CLIENT_CACHE_CHECK_SECONDS = float(os.getenv("REDIS_CLIENT_CACHE_CHECK_SECONDS", "5"))
+
+# Degraded mode (Redis unavailable) - in-process blacklist/CSRF caches
+DEGRADED_CACHE_MAX_ENTRIES = int(os.getenv("DEGRADED_CACHE_MAX_ENTRIES", "10000"))
+
+# Request profiling (admin `X-Profile: cpu|memory` header or random sampling)
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_MAX_PER_MINUTE = int(os.getenv("PROFILING_MAX_PER_MINUTE", "6"))
+PROFILING_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILING_SAMPLE_INTERVAL_MS", "5"))
+PROFILING_OUTPUT_DIR = os.getenv("PROFILING_OUTPUT_DIR", "/tmp/blog_profiles")
+
+# Slow-query log (MongoDB operations over the threshold, explained and kept in a capped collection)
+SLOW_QUERY_LOG_ENABLED = os.getenv("SLOW_QUERY_LOG_ENABLED", "true").lower() == "true"
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "100"))
+SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS = int(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS", "300"))
+SLOW_QUERY_COLLECTION_SIZE_BYTES = int(os.getenv("SLOW_QUERY_COLLECTION_SIZE_BYTES", str(16 * 1024 * 1024)))
+
+# Per-request round-trip counts (X-Round-Trips debug header, off in production by default)
+ROUND_TRIP_HEADER_ENABLED = os.getenv(
+    "ROUND_TRIP_HEADER_ENABLED", str(os.getenv("ENVIRONMENT", "development") != "production")
+).lower() == "true"
+
+# Post / user-profile cache (in-process LRU in front of Redis)
+ENTITY_CACHE_ENABLED = os.getenv("ENTITY_CACHE_ENABLED", "true").lower() == "true"
+ENTITY_CACHE_TTL_SECONDS = int(os.getenv("ENTITY_CACHE_TTL_SECONDS", "300"))
+# Other workers only see an invalidation once their local copy expires - keep this short
+ENTITY_CACHE_LOCAL_TTL_SECONDS = float(os.getenv("ENTITY_CACHE_LOCAL_TTL_SECONDS", "5"))
+ENTITY_CACHE_MAX_ENTRIES = int(os.getenv("ENTITY_CACHE_MAX_ENTRIES", "5000"))
+DASHBOARD_CACHE_TTL_SECONDS = int(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", "30"))
+
+# Cascade deletion of a deleted post's / user's dependents (background jobs with checkpoints)
+CASCADE_BATCH_SIZE = int(os.getenv("CASCADE_BATCH_SIZE", "1000"))
+# "anonymize" keeps a deleted user's comments under DELETED_USER_ID, "delete" removes them
+CASCADE_USER_COMMENTS = os.getenv("CASCADE_USER_COMMENTS", "anonymize")
+CASCADE_LEASE_SECONDS = int(os.getenv("CASCADE_LEASE_SECONDS", "60"))
+CASCADE_MAX_ATTEMPTS = int(os.getenv("CASCADE_MAX_ATTEMPTS", "5"))
+
+# Background jobs (Redis Stream + consumer group, run by `python -m src.worker`)
+JOB_QUEUE_ENABLED = os.getenv("JOB_QUEUE_ENABLED", "true").lower() == "true"
+JOB_STREAM_MAXLEN = int(os.getenv("JOB_STREAM_MAXLEN", "100000"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+# First retry after this many seconds, doubled per attempt (also how long a crashed worker's jobs wait)
+JOB_RETRY_SECONDS = float(os.getenv("JOB_RETRY_SECONDS", "5"))
+JOB_BATCH_SIZE = int(os.getenv("JOB_BATCH_SIZE", "10"))
+# XREADGROUP block time - keep it below REDIS_SOCKET_TIMEOUT
+JOB_BLOCK_MS = int(os.getenv("JOB_BLOCK_MS", "500"))
+JOB_WORKER_METRICS_PORT = int(os.getenv("JOB_WORKER_METRICS_PORT", "0"))
+
+# Live post/comment updates over SSE (one shared Redis Stream reader per worker process)
+LIVE_EVENTS_ENABLED = os.getenv("LIVE_EVENTS_ENABLED", "true").lower() == "true"
+LIVE_EVENTS_STREAM_MAXLEN = int(os.getenv("LIVE_EVENTS_STREAM_MAXLEN", "10000"))
+# Events a reconnecting client can catch up on (older Last-Event-ID => "reset", refetch)
+LIVE_EVENTS_REPLAY_MAX = int(os.getenv("LIVE_EVENTS_REPLAY_MAX", "1000"))
+LIVE_EVENTS_KEEPALIVE_SECONDS = float(os.getenv("LIVE_EVENTS_KEEPALIVE_SECONDS", "15"))
+LIVE_EVENTS_QUEUE_SIZE = int(os.getenv("LIVE_EVENTS_QUEUE_SIZE", "100"))
+
+# Transactional outbox - every post/comment/user write also records an event, delivered to
+# consumers (utils/outbox_consumers.py) in order by the worker (`python -m src.worker`)
+OUTBOX_ENABLED = os.getenv("OUTBOX_ENABLED", "true").lower() == "true"
+# Events are kept this long for replays (older ones: rebuild the derived data from the collections)
+OUTBOX_RETENTION_DAYS = int(os.getenv("OUTBOX_RETENTION_DAYS", "7"))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "0.5"))
+OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", "30"))
+# A missing sequence number older than this is given up on (writer crashed between counter and insert)
+OUTBOX_GAP_SECONDS = float(os.getenv("OUTBOX_GAP_SECONDS", "10"))
+
+# Trending / popular posts (HyperLogLog unique views + decayed sorted-set scores in Redis)
+TRENDING_ENABLED = os.getenv("TRENDING_ENABLED", "true").lower() == "true"
+# A view counts half as much after this many hours
+TRENDING_HALF_LIFE_HOURS = float(os.getenv("TRENDING_HALF_LIFE_HOURS", "6"))
+# Sorted sets are trimmed to the top N posts
+TRENDING_MAX_POSTS = int(os.getenv("TRENDING_MAX_POSTS", "10000"))
+# View counts are copied to posts.views by the worker this often, in batches
+TRENDING_FLUSH_SECONDS = float(os.getenv("TRENDING_FLUSH_SECONDS", "60"))
+TRENDING_FLUSH_BATCH = int(os.getenv("TRENDING_FLUSH_BATCH", "1000"))
+# Anonymous viewers are told apart by a first-party visitor cookie
+VISITOR_COOKIE_MAX_AGE = int(os.getenv("VISITOR_COOKIE_MAX_AGE", str(365 * 24 * 60 * 60)))
+# Proxies (IPs / CIDRs, comma-separated) whose X-Forwarded-For is believed - the Next.js server by default
+TRUSTED_PROXIES = [proxy.strip() for proxy in os.getenv("TRUSTED_PROXIES", "127.0.0.1,::1").split(",") if proxy.strip()]
+
+# Related posts (hashed TF-IDF cosine neighbours, kept up to date by the outbox worker)
+RELATED_POSTS_ENABLED = os.getenv("RELATED_POSTS_ENABLED", "true").lower() == "true"
+RELATED_POSTS_K = int(os.getenv("RELATED_POSTS_K", "5"))
+RELATED_POSTS_MIN_SCORE = float(os.getenv("RELATED_POSTS_MIN_SCORE", "0.05"))
+# Rows per similarity block - memory is about block size x number of posts x 4 bytes
+RELATED_POSTS_BLOCK_SIZE = int(os.getenv("RELATED_POSTS_BLOCK_SIZE", "256"))
+
+# RSS / Atom feeds and sitemaps (prebuilt files on local disk, rebuilt after posts change)
+# Public site the links point to (the frontend serves /post/{slug} and proxies the XML files)
+SITE_URL = os.getenv("SITE_URL", "http://localhost:5173").rstrip("/")
+SITE_TITLE = os.getenv("SITE_TITLE", "Blog")
+FEED_CACHE_DIR = os.getenv("FEED_CACHE_DIR", "/tmp/blog-feeds")
+FEED_MAX_ITEMS = int(os.getenv("FEED_MAX_ITEMS", "50"))
+# Per sitemap file (the protocol's limit) - past this, sitemap.xml is an index of sitemap-N.xml
+SITEMAP_MAX_URLS = int(os.getenv("SITEMAP_MAX_URLS", "50000"))
+# Each API process re-reads the feed generation at most this often
+FEED_GENERATION_TTL_SECONDS = float(os.getenv("FEED_GENERATION_TTL_SECONDS", "5"))
+FEED_MAX_AGE_SECONDS = int(os.getenv("FEED_MAX_AGE_SECONDS", "300"))
+
+# Admin NDJSON exports (/api/admin/export/{collection}, `python -m src.scripts.export`)
+# Documents per cursor batch - also the most an export holds in memory
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
 # Admin Configuration
 ADMIN_USERNAME = os.getenv("USERNAME", "admin")
 ADMIN_EMAIL = os.getenv("EMAIL", "admin@gmail.com")
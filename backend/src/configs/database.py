@@ -1,12 +1,19 @@
 # configs/database.py
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
-from ..configs.config import MONGO_USER, MONGO_PASSWORD, MONGO_HOST, MONGO_PORT, MONGO_DBNAME
+from ..configs.config import MONGO_USER, MONGO_PASSWORD, MONGO_HOST, MONGO_PORT, MONGO_DBNAME, MONGO_REPLICA_SET, MONGO_DIRECT_CONNECTION
+from ..utils.metrics import MongoCommandMetrics
+from ..utils.slow_query_log import slow_query_listener
+from ..utils.round_trips import MongoRoundTripListener
 
 MONGO_URL = f"mongodb://{MONGO_USER}:{MONGO_PASSWORD}@{MONGO_HOST}:{MONGO_PORT}/{MONGO_DBNAME}?authSource=admin"
+if MONGO_REPLICA_SET:
+    MONGO_URL += f"&replicaSet={MONGO_REPLICA_SET}"
+if MONGO_DIRECT_CONNECTION:
+    MONGO_URL += "&directConnection=true"
 
 # ✅ Async MongoDB client
-client = AsyncIOMotorClient(MONGO_URL)
+client = AsyncIOMotorClient(MONGO_URL, event_listeners=[MongoCommandMetrics(), slow_query_listener, MongoRoundTripListener()])
 db = client[MONGO_DBNAME]
 
 def get_database():
@@ -21,4 +28,32 @@ def get_post_collection():
 
 def get_comment_collection():
     """Get comments collection"""
-    return db["comments"]
\ No newline at end of file
+    return db["comments"]
+
+def get_slow_query_collection():
+    """Get slow query log collection (capped)"""
+    return db["slow_queries"]
+
+def get_daily_stats_collection():
+    """Get daily analytics rollup collection (one document per day)"""
+    return db["daily_stats"]
+
+def get_deletion_job_collection():
+    """Get cascade deletion job collection (progress checkpoints)"""
+    return db["deletion_jobs"]
+
+def get_outbox_collection():
+    """Get outbox event collection (sequence-numbered post/comment/user changes)"""
+    return db["outbox_events"]
+
+def get_outbox_consumer_collection():
+    """Get outbox consumer collection (delivered sequence + lease per consumer)"""
+    return db["outbox_consumers"]
+
+def get_counter_collection():
+    """Get sequence counter collection"""
+    return db["counters"]
+
+def get_post_facet_collection():
+    """Get post facet (category / tag count) collection"""
+    return db["post_facets"]
\ No newline at end of file
@@ -0,0 +1,65 @@
+# configs/indexes.py
+## MongoDB index definitions - one entry per query shape issued by the models
+## Checked by `python -m src.scripts.check_query_plans` (explain() must show an index scan)
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from .config import OUTBOX_RETENTION_DAYS
+
+INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+        # get_all_users sort + get_users_count_since_date
+        IndexModel([("createdAt", DESCENDING)], name="createdAt"),
+    ],
+    "posts": [
+        IndexModel([("slug", ASCENDING)], name="slug_unique", unique=True),
+        # Old slugs kept as redirects (multikey)
+        IndexModel([("previousSlugs", ASCENDING)], name="previousSlugs"),
+        IndexModel([("title", ASCENDING)], name="title"),
+        # getposts: no filter / userId / category, sorted by updatedAt
+        IndexModel([("updatedAt", DESCENDING)], name="updatedAt"),
+        IndexModel([("userId", ASCENDING), ("updatedAt", DESCENDING)], name="userId_updatedAt"),
+        IndexModel([("category", ASCENDING), ("updatedAt", DESCENDING)], name="category_updatedAt"),
+        # getposts "last month" counts with the same filters
+        IndexModel([("createdAt", DESCENDING)], name="createdAt"),
+        IndexModel([("userId", ASCENDING), ("createdAt", DESCENDING)], name="userId_createdAt"),
+        IndexModel([("category", ASCENDING), ("createdAt", DESCENDING)], name="category_createdAt"),
+        # Tag filters (multikey - one key per tag; $all bounds on one tag and filters the rest)
+        IndexModel([("tags", ASCENDING), ("updatedAt", DESCENDING)], name="tags_updatedAt"),
+        IndexModel([("tags", ASCENDING), ("createdAt", DESCENDING)], name="tags_createdAt"),
+    ],
+    "comments": [
+        # getPostComments sorted by createdAt
+        IndexModel([("postId", ASCENDING), ("createdAt", DESCENDING)], name="postId_createdAt"),
+        # getcomments sort + get_comments_count_since_date
+        IndexModel([("createdAt", DESCENDING)], name="createdAt"),
+        # Cascade deletion of a user: comments they liked (multikey) / wrote
+        IndexModel([("likes", ASCENDING)], name="likes"),
+        IndexModel([("userId", ASCENDING)], name="userId"),
+    ],
+    "deletion_jobs": [
+        # Unfinished jobs resumed at startup
+        IndexModel([("status", ASCENDING)], name="status"),
+    ],
+    "outbox_events": [
+        # Dispatcher reads "seq > delivered" in order; unique - one event per sequence number
+        IndexModel([("seq", ASCENDING)], name="seq_unique", unique=True),
+        # Replay window
+        IndexModel([("createdAt", ASCENDING)], name="createdAt_ttl", expireAfterSeconds=OUTBOX_RETENTION_DAYS * 24 * 60 * 60),
+    ],
+    "post_facets": [
+        # /api/post/facets: one kind, largest counts first
+        IndexModel([("kind", ASCENDING), ("count", DESCENDING)], name="kind_count"),
+    ],
+}
+
+async def ensure_indexes(db):
+    """Create missing indexes (idempotent); a failing index is reported, not fatal"""
+    for collection_name, indexes in INDEXES.items():
+        for index in indexes:
+            try:
+                await db[collection_name].create_indexes([index])
+            except Exception as e:
+                # e.g. duplicate slugs already stored - fix the data, the app keeps running
+                print(f"❌ Failed to create index {collection_name}.{index.document['name']}: {e}")
+    print("✅ MongoDB indexes ensured")
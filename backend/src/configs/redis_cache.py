@@ -0,0 +1,197 @@
+# configs/redis_cache.py
+import asyncio
+import os
+import redis.asyncio as redis
+from ..utils.local_cache import LocalTTLCache
+from .config import (
+    REDIS_URL,
+    REDIS_CLIENT_CACHE_MAX_ENTRIES,
+    REDIS_CLIENT_CACHE_TTL_SECONDS,
+    REDIS_CLIENT_CACHE_PREFIXES,
+    REDIS_CLIENT_CACHE_CHECK_SECONDS
+)
+
+INVALIDATION_CHANNEL = "__redis__:invalidate"
+
+# Cached marker for "key does not exist" (negative lookups are the common case for blacklist keys)
+MISSING = object()
+
+class ClientSideCache:
+    """
+    Redis client-side caching for hot auth keys (server-assisted invalidation)
+    - A dedicated pub/sub connection subscribes to __redis__:invalidate
+    - A tracking connection runs CLIENT TRACKING ON BCAST PREFIX ... REDIRECT <pubsub id>
+      so Redis pushes an invalidation whenever any matching key is written or expires
+    - Values live in a bounded in-process cache with a TTL cap, so a missed
+      invalidation can never serve a stale value for longer than ttl seconds
+    - If the invalidation connection drops, the cache is flushed and disabled
+      until it is re-established
+    - A supervisor checks CLIENT TRACKINGINFO every REDIS_CLIENT_CACHE_CHECK_SECONDS: a tracking
+      connection that was dropped (idle timeout, CLIENT KILL, proxy reset) comes back without
+      tracking, so the cache is flushed and both connections are opened again
+    """
+    def __init__(self):
+        self.prefixes = tuple(REDIS_CLIENT_CACHE_PREFIXES)
+        self.entries = LocalTTLCache(REDIS_CLIENT_CACHE_MAX_ENTRIES, REDIS_CLIENT_CACHE_TTL_SECONDS)
+        self.enabled = False
+        self.listener = None
+        self.tracker = None
+        self.pubsub = None
+        self.listen_task = None
+        self.supervisor_task = None
+        self.redirect_id = None
+        # Bumped on every invalidation - a read that raced with one is not cached
+        self.invalidation_epoch = 0
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "invalidations": 0,
+            "flushes": 0,
+            "restarts": 0
+        }
+    
+    async def start(self):
+        """Open the invalidation + tracking connections and keep them checked"""
+        await self._open()
+        if self.supervisor_task is None:
+            self.supervisor_task = asyncio.create_task(self._supervise())
+    
+    async def stop(self):
+        if self.supervisor_task:
+            self.supervisor_task.cancel()
+            self.supervisor_task = None
+        await self._close()
+    
+    async def _open(self, quiet: bool = False) -> bool:
+        client_name = f"blog-cache-inval-{os.getpid()}"
+        try:
+            self.listener = redis.from_url(REDIS_URL, decode_responses=True, client_name=client_name)
+            self.pubsub = self.listener.pubsub()
+            await self.pubsub.subscribe(INVALIDATION_CHANNEL)
+            
+            # Find the client id of our pub/sub connection to redirect invalidations to it
+            clients = await self.listener.client_list(_type="pubsub")
+            self.redirect_id = next(c["id"] for c in clients if c.get("name") == client_name)
+            
+            self.tracker = redis.from_url(REDIS_URL, decode_responses=True, single_connection_client=True)
+            tracking_args = ["CLIENT", "TRACKING", "ON", "REDIRECT", self.redirect_id, "BCAST"]
+            for prefix in self.prefixes:
+                tracking_args.extend(["PREFIX", prefix])
+            await self.tracker.execute_command(*tracking_args)
+            
+            self.listen_task = asyncio.create_task(self._listen())
+            self.enabled = True
+            print(f"✅ Redis client-side cache enabled for prefixes: {', '.join(self.prefixes)}")
+            return True
+        except Exception as e:
+            if not quiet:
+                print(f"⚠️ Redis client-side cache disabled: {e}")
+            await self._close()
+            return False
+    
+    async def _close(self):
+        self.enabled = False
+        self.flush()
+        if self.listen_task:
+            self.listen_task.cancel()
+            self.listen_task = None
+        for client in (self.pubsub, self.tracker, self.listener):
+            if client is not None:
+                try:
+                    await client.close()
+                except Exception:
+                    pass
+        self.pubsub = self.tracker = self.listener = None
+    
+    async def _tracking_ok(self) -> bool:
+        """Listener running and the tracker still tracking into it (its connection never reconnected)"""
+        if not self.enabled or self.listen_task is None or self.listen_task.done():
+            return False
+        try:
+            reply = await self.tracker.client_trackinginfo()
+        except Exception as e:
+            print(f"⚠️ Redis tracking connection check failed: {e}")
+            return False
+        info = reply if isinstance(reply, dict) else dict(zip(reply[::2], reply[1::2]))
+        flags = info.get("flags") or []
+        return "on" in flags and "broken_redirect" not in flags and str(info.get("redirect")) == str(self.redirect_id)
+    
+    async def _supervise(self):
+        """Re-open the cache when tracking was lost; retries quietly while Redis is down"""
+        retrying = False
+        while True:
+            await asyncio.sleep(REDIS_CLIENT_CACHE_CHECK_SECONDS)
+            if await self._tracking_ok():
+                retrying = False
+                continue
+            if not retrying:
+                print("⚠️ Redis client-side cache lost its invalidations - re-opening")
+            await self._close()
+            if await self._open(quiet=retrying):
+                self.stats["restarts"] += 1
+                retrying = False
+            else:
+                retrying = True
+    
+    async def _listen(self):
+        try:
+            async for message in self.pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                self.invalidate(message.get("data"))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Without invalidations the cache can't be trusted
+            print(f"❌ Redis invalidation listener stopped: {e}")
+            self.enabled = False
+            self.flush()
+    
+    def is_tracked(self, key: str) -> bool:
+        return self.enabled and key.startswith(self.prefixes)
+    
+    def lookup(self, key: str):
+        """Return cached value (MISSING for cached non-existence) or None on cache miss"""
+        value = self.entries.get(key)
+        if value is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return value
+    
+    def store(self, key: str, value, epoch: int):
+        """Cache a value read at `epoch` unless an invalidation arrived meanwhile"""
+        if self.enabled and epoch == self.invalidation_epoch:
+            self.entries.set(key, MISSING if value is None else value)
+    
+    def invalidate(self, keys):
+        """Drop keys pushed by Redis (None means the server flushed everything)"""
+        if keys is None:
+            self.flush()
+            return
+        if isinstance(keys, str):
+            keys = [keys]
+        self.evict(keys)
+        self.stats["invalidations"] += len(keys)
+    
+    def evict(self, keys):
+        """Drop keys written by this process (don't wait for the server push)"""
+        self.invalidation_epoch += 1
+        for key in keys:
+            self.entries.delete(key)
+    
+    def flush(self):
+        self.invalidation_epoch += 1
+        self.entries.clear()
+        self.stats["flushes"] += 1
+    
+    def get_stats(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "enabled": self.enabled,
+            "entries": len(self.entries),
+            "max_entries": self.entries.max_entries,
+            "evictions": self.entries.evictions,
+            "hit_ratio": round(self.stats["hits"] / lookups, 4) if lookups else 0.0
+        }
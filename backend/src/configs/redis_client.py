@@ -1,22 +1,193 @@
-# configs/redis_client.py (Updated with delete_pattern)
+# configs/redis_client.py (Updated with delete_pattern, pipelines, Lua scripts and circuit breaker)
 import redis.asyncio as redis
+from redis.asyncio.retry import Retry
+from redis.backoff import EqualJitterBackoff
+from redis.exceptions import RedisError, ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
 import json
-from .config import REDIS_URL
+import time
+from .redis_cache import ClientSideCache, MISSING
+from ..utils.metrics import REDIS_COMMAND_DURATION, REDIS_BREAKER_STATE, REDIS_FAST_FAILURES
+from ..utils.round_trips import count_round_trip
+from .config import (
+    REDIS_URL,
+    REDIS_CLIENT_CACHE_ENABLED,
+    REDIS_MAX_CONNECTIONS,
+    REDIS_SOCKET_TIMEOUT,
+    REDIS_CONNECT_TIMEOUT,
+    REDIS_HEALTH_CHECK_INTERVAL,
+    REDIS_RETRY_ATTEMPTS,
+    REDIS_RETRY_BACKOFF_BASE,
+    REDIS_RETRY_BACKOFF_CAP,
+    REDIS_BREAKER_FAILURE_THRESHOLD,
+    REDIS_BREAKER_RESET_SECONDS
+)
+
+# ✅ Lua scripts - one round trip for read-modify-write operations
+LUA_SCRIPTS = {
+    # Delete key only if it still holds the expected value (lock release)
+    "compare_and_delete": """
+        if redis.call('GET', KEYS[1]) == ARGV[1] then
+            return redis.call('DEL', KEYS[1])
+        end
+        return 0
+    """,
+    # Unique view (HyperLogLog) + time-decayed trending score: a new viewer adds 2^(age of the
+    # score epoch / half-life), so older views weigh relatively less without rewriting scores
+    # KEYS: hll, trending zset, epoch, dirty set  ARGV: viewer, post id, now, half-life seconds
+    "record_view": """
+        if redis.call('PFADD', KEYS[1], ARGV[1]) == 0 then
+            return 0
+        end
+        redis.call('SADD', KEYS[4], ARGV[2])
+        local epoch = tonumber(redis.call('GET', KEYS[3]))
+        if not epoch then
+            epoch = tonumber(ARGV[3])
+            redis.call('SET', KEYS[3], ARGV[3])
+        end
+        redis.call('ZINCRBY', KEYS[2], 2 ^ ((tonumber(ARGV[3]) - epoch) / tonumber(ARGV[4])), ARGV[2])
+        return 1
+    """,
+    # Scale trending scores down and move the epoch to now, before the weights overflow
+    # KEYS: trending zset, epoch  ARGV: now, half-life seconds, max exponent
+    "rebase_trending": """
+        local epoch = tonumber(redis.call('GET', KEYS[2]))
+        if not epoch then
+            return 0
+        end
+        local exponent = (tonumber(ARGV[1]) - epoch) / tonumber(ARGV[2])
+        if exponent < tonumber(ARGV[3]) then
+            return 0
+        end
+        redis.call('ZUNIONSTORE', KEYS[1], 1, KEYS[1], 'WEIGHTS', tostring(2 ^ -exponent))
+        redis.call('SET', KEYS[2], ARGV[1])
+        return 1
+    """,
+}
+
+class RedisUnavailableError(ConnectionError):
+    """Redis is not connected, or the circuit breaker is open"""
+    pass
+
+class CircuitBreaker:
+    """
+    Simple circuit breaker for Redis calls
+    - closed: calls go through, consecutive failures are counted
+    - open: calls fail fast until reset_timeout has passed
+    - half_open: one trial call decides whether to close or re-open
+    """
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failure_count = 0
+        self.opened_at = 0.0
+        self.open_count = 0
+    
+    def allow_request(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+            # Let a single trial call through
+            self.state = "half_open"
+            return True
+        return False
+    
+    def record_success(self):
+        if self.state != "closed":
+            print("✅ Redis circuit breaker closed")
+            REDIS_BREAKER_STATE.set(0)
+        self.state = "closed"
+        self.failure_count = 0
+    
+    def record_failure(self):
+        self.failure_count += 1
+        if self.state == "half_open" or self.failure_count >= self.failure_threshold:
+            if self.state != "open":
+                print(f"⚠️ Redis circuit breaker opened after {self.failure_count} failures")
+                self.open_count += 1
+                REDIS_BREAKER_STATE.set(1)
+            self.state = "open"
+            self.opened_at = time.monotonic()
+    
+    def abandon_trial(self):
+        """The half-open trial ended without an answer (cancelled, local error) - wait out another reset_timeout"""
+        if self.state == "half_open":
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+class RedisPipeline:
+    """
+    Async context manager around a redis pipeline
+    - Commands are queued inside the block and sent in one round trip on exit
+    - transaction=True wraps them in MULTI/EXEC
+    """
+    def __init__(self, client, transaction: bool = False):
+        self.client = client
+        self.transaction = transaction
+        self.pipeline = None
+        self.results = []
+    
+    async def __aenter__(self):
+        # The breaker is consulted once, by _execute on exit - checking it here too would spend the half-open trial
+        if self.client.redis_client is None:
+            raise RedisUnavailableError("Redis client not connected")
+        self.pipeline = self.client.redis_client.pipeline(transaction=self.transaction)
+        return self.pipeline
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                # Keys written in this pipeline must not be served from the local cache
+                self.client._evict_cached([
+                    arg for args, _ in self.pipeline.command_stack
+                    for arg in args[1:] if isinstance(arg, str)
+                ])
+                self.results = await self.client._execute("pipeline", self.pipeline.execute)
+        finally:
+            await self.pipeline.reset()
+        return False
 
 class RedisClient:
     def __init__(self):
         self.redis_client = None
+        self.scripts = {}
+        self.cache = ClientSideCache()
+        self.breaker = CircuitBreaker(REDIS_BREAKER_FAILURE_THRESHOLD, REDIS_BREAKER_RESET_SECONDS)
+        self.stats = {
+            "calls": 0,
+            "failures": 0,
+            "fast_failures": 0,
+            "latency_ms_total": 0.0,
+            "latency_ms_max": 0.0
+        }
     
     async def connect(self):
         """Connect to Redis"""
         try:
+            # ✅ Explicit pool size, timeouts, health checks and jittered retries
             self.redis_client = await redis.from_url(
                 REDIS_URL,
                 encoding="utf-8",
-                decode_responses=True
+                decode_responses=True,
+                max_connections=REDIS_MAX_CONNECTIONS,
+                socket_timeout=REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+                health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+                retry=Retry(
+                    EqualJitterBackoff(cap=REDIS_RETRY_BACKOFF_CAP, base=REDIS_RETRY_BACKOFF_BASE),
+                    REDIS_RETRY_ATTEMPTS
+                ),
+                retry_on_error=[RedisConnectionError, RedisTimeoutError]
             )
             # Test connection
             await self.redis_client.ping()
+            
+            # Register Lua scripts (EVALSHA with automatic EVAL fallback)
+            for name, source in LUA_SCRIPTS.items():
+                self.scripts[name] = self.redis_client.register_script(source)
+            
+            if REDIS_CLIENT_CACHE_ENABLED:
+                await self.cache.start()
             print("✅ Redis connected successfully")
         except Exception as e:
             print(f"❌ Redis connection failed: {e}")
@@ -25,71 +196,159 @@ class RedisClient:
     
     async def disconnect(self):
         """Disconnect from Redis"""
+        await self.cache.stop()
         if self.redis_client:
             await self.redis_client.close()
     
+    @property
+    def is_available(self) -> bool:
+        """False when not connected or the circuit breaker is failing fast"""
+        return self.redis_client is not None and self.breaker.state != "open"
+    
+    def _ensure_available(self, operation: str):
+        if self.redis_client is None:
+            raise RedisUnavailableError("Redis client not connected")
+        if not self.breaker.allow_request():
+            self.stats["fast_failures"] += 1
+            REDIS_FAST_FAILURES.inc()
+            raise RedisUnavailableError(f"Redis circuit breaker open - skipped {operation}")
+    
+    async def _execute(self, operation: str, func, *args, **kwargs):
+        """Run one Redis round trip through the breaker and record latency"""
+        self._ensure_available(operation)
+        count_round_trip("redis")
+        
+        started = time.perf_counter()
+        outcome = "error"
+        recorded = False
+        try:
+            result = await func(*args, **kwargs)
+            outcome = "success"
+        except (RedisConnectionError, RedisTimeoutError, OSError):
+            self.stats["failures"] += 1
+            self.breaker.record_failure()
+            recorded = True
+            raise
+        except RedisError:
+            # ResponseError (WRONGTYPE, BUSYGROUP, NOGROUP...) - the server answered, so it is up
+            self.breaker.record_success()
+            recorded = True
+            raise
+        finally:
+            if outcome == "success":
+                self.breaker.record_success()
+            elif not recorded:
+                # Cancelled or failed before an answer - don't leave the breaker stuck in half_open
+                self.breaker.abandon_trial()
+            elapsed = time.perf_counter() - started
+            REDIS_COMMAND_DURATION.labels(operation, outcome).observe(elapsed)
+            elapsed_ms = elapsed * 1000
+            self.stats["calls"] += 1
+            self.stats["latency_ms_total"] += elapsed_ms
+            self.stats["latency_ms_max"] = max(self.stats["latency_ms_max"], elapsed_ms)
+        
+        return result
+    
+    def _evict_cached(self, keys):
+        tracked = [key for key in keys if self.cache.is_tracked(key)]
+        if tracked:
+            self.cache.evict(tracked)
+    
+    async def _cached_get(self, key: str):
+        """GET through the client-side cache for tracked keys"""
+        if not self.cache.is_tracked(key):
+            return await self._execute("GET", self.redis_client.get, key)
+        
+        cached = self.cache.lookup(key)
+        if cached is not None:
+            return None if cached is MISSING else cached
+        
+        epoch = self.cache.invalidation_epoch
+        value = await self._execute("GET", self.redis_client.get, key)
+        self.cache.store(key, value, epoch)
+        return value
+    
+    def get_health(self) -> dict:
+        """Breaker state and latency metrics"""
+        calls = self.stats["calls"]
+        return {
+            "connected": self.redis_client is not None,
+            "breaker_state": self.breaker.state,
+            "breaker_open_count": self.breaker.open_count,
+            "consecutive_failures": self.breaker.failure_count,
+            "calls": calls,
+            "failures": self.stats["failures"],
+            "fast_failures": self.stats["fast_failures"],
+            "latency_ms_avg": round(self.stats["latency_ms_total"] / calls, 3) if calls else 0.0,
+            "latency_ms_max": round(self.stats["latency_ms_max"], 3),
+            "client_cache": self.cache.get_stats()
+        }
+    
     async def set_key(self, key: str, value: str, expire: int = None):
         """Set key-value pair with optional expiration"""
         try:
-            if self.redis_client is None:
-                print("❌ Redis client not connected")
-                return False
-                
+            self._evict_cached([key])
             if expire:
-                await self.redis_client.setex(key, expire, value)
+                await self._execute("SETEX", self.redis_client.setex, key, expire, value)
             else:
-                await self.redis_client.set(key, value)
+                await self._execute("SET", self.redis_client.set, key, value)
             print(f"✅ Redis SET: {key} = {value[:20]}... (expire: {expire}s)")
             return True
         except Exception as e:
             print(f"❌ Error setting Redis key {key}: {e}")
             return False
     
-    async def get_key(self, key: str):
-        """Get value by key"""
+    async def set_key_nx(self, key: str, value: str, expire_ms: int = None):
+        """Set key only if it does not exist yet (used for short-lived locks)"""
         try:
-            if self.redis_client is None:
-                return None
-                
-            value = await self.redis_client.get(key)
+            self._evict_cached([key])
+            result = await self._execute("SET NX", self.redis_client.set, key, value, nx=True, px=expire_ms)
+            return bool(result)
+        except Exception as e:
+            print(f"❌ Error setting Redis key (NX) {key}: {e}")
+            return False
+    
+    async def get_key(self, key: str, raise_errors: bool = False):
+        """Get value by key (raise_errors=True raises RedisUnavailableError instead of returning None)"""
+        try:
+            value = await self._cached_get(key)
             if value:
                 print(f"✅ Redis GET: {key} = {value[:20]}...")
             return value
         except Exception as e:
             print(f"❌ Error getting Redis key {key}: {e}")
+            if raise_errors:
+                raise RedisUnavailableError(str(e)) from e
             return None
     
     async def delete_key(self, key: str):
         """Delete key"""
         try:
-            if self.redis_client is None:
-                return False
-                
-            result = await self.redis_client.delete(key)
+            self._evict_cached([key])
+            result = await self._execute("DEL", self.redis_client.delete, key)
             print(f"✅ Redis DELETE: {key}")
             return result > 0
         except Exception as e:
             print(f"❌ Error deleting Redis key {key}: {e}")
             return False
     
-    async def exists_key(self, key: str):
-        """Check if key exists"""
+    async def exists_key(self, key: str, raise_errors: bool = False):
+        """Check if key exists (raise_errors=True raises RedisUnavailableError instead of returning False)"""
         try:
-            if self.redis_client is None:
-                return False
-                
-            return await self.redis_client.exists(key) > 0
+            # Tracked keys are read with GET so the value can be cached locally
+            if self.cache.is_tracked(key):
+                return await self._cached_get(key) is not None
+            return await self._execute("EXISTS", self.redis_client.exists, key) > 0
         except Exception as e:
             print(f"❌ Error checking Redis key {key}: {e}")
+            if raise_errors:
+                raise RedisUnavailableError(str(e)) from e
             return False
     
     async def keys(self, pattern: str = "*"):
         """Get all keys matching pattern"""
         try:
-            if self.redis_client is None:
-                return []
-                
-            return await self.redis_client.keys(pattern)
+            return await self._execute("KEYS", self.redis_client.keys, pattern)
         except Exception as e:
             print(f"❌ Error getting Redis keys: {e}")
             return []
@@ -98,13 +357,10 @@ class RedisClient:
     async def delete_pattern(self, pattern: str):
         """Delete all keys matching pattern"""
         try:
-            if self.redis_client is None:
-                print("❌ Redis client not connected")
-                return False
-                
-            keys = await self.redis_client.keys(pattern)
+            keys = await self._execute("KEYS", self.redis_client.keys, pattern)
             if keys:
-                deleted_count = await self.redis_client.delete(*keys)
+                self._evict_cached(keys)
+                deleted_count = await self._execute("DEL", self.redis_client.delete, *keys)
                 print(f"✅ Redis DELETE PATTERN: {pattern} - Deleted {deleted_count} keys")
                 return deleted_count > 0
             else:
@@ -113,6 +369,202 @@ class RedisClient:
         except Exception as e:
             print(f"❌ Error deleting Redis pattern {pattern}: {e}")
             return False
+    
+    # ✅ NEW: Batched operations - one round trip for many keys
+    def pipeline(self):
+        """
+        Non-transactional pipeline
+        - `batch = redis_client.pipeline(); async with batch as pipe: ...`
+        - Results are available on `batch.results` after the block
+        """
+        return RedisPipeline(self, transaction=False)
+    
+    def transaction(self):
+        """MULTI/EXEC pipeline: all queued commands are applied atomically"""
+        return RedisPipeline(self, transaction=True)
+    
+    async def mget(self, keys: list, raise_errors: bool = False):
+        """Get many values in one round trip (missing keys are None)"""
+        try:
+            if not keys:
+                return []
+            
+            # Serve tracked keys from the client-side cache, fetch the rest in one MGET
+            values = [None] * len(keys)
+            to_fetch = []
+            for index, key in enumerate(keys):
+                cached = self.cache.lookup(key) if self.cache.is_tracked(key) else None
+                if cached is None:
+                    to_fetch.append(index)
+                elif cached is not MISSING:
+                    values[index] = cached
+            
+            if to_fetch:
+                epoch = self.cache.invalidation_epoch
+                fetched = await self._execute("MGET", self.redis_client.mget, [keys[i] for i in to_fetch])
+                for index, value in zip(to_fetch, fetched):
+                    values[index] = value
+                    if self.cache.is_tracked(keys[index]):
+                        self.cache.store(keys[index], value, epoch)
+            return values
+        except Exception as e:
+            print(f"❌ Error getting Redis keys (MGET): {e}")
+            if raise_errors:
+                raise RedisUnavailableError(str(e)) from e
+            return [None] * len(keys)
+    
+    async def mset(self, mapping: dict, expire: int = None):
+        """Set many key-value pairs in one round trip with optional shared expiration"""
+        try:
+            if not mapping:
+                return True
+            
+            if expire:
+                async with self.pipeline() as pipe:
+                    for key, value in mapping.items():
+                        pipe.setex(key, expire, value)
+            else:
+                self._evict_cached(list(mapping))
+                await self._execute("MSET", self.redis_client.mset, mapping)
+            print(f"✅ Redis MSET: {len(mapping)} keys (expire: {expire}s)")
+            return True
+        except Exception as e:
+            print(f"❌ Error setting Redis keys (MSET): {e}")
+            return False
+    
+    async def exists_many(self, keys: list):
+        """Check many keys in one round trip, returns list of booleans"""
+        try:
+            if not keys:
+                return []
+            
+            batch = self.pipeline()
+            async with batch as pipe:
+                for key in keys:
+                    pipe.exists(key)
+            return [result > 0 for result in batch.results]
+        except Exception as e:
+            print(f"❌ Error checking Redis keys (multi EXISTS): {e}")
+            return [False] * len(keys)
+    
+    async def hget(self, key: str, field: str):
+        """Get one field of a hash"""
+        try:
+            return await self._execute("HGET", self.redis_client.hget, key, field)
+        except Exception as e:
+            print(f"❌ Error getting Redis hash field {key}[{field}]: {e}")
+            return None
+    
+    async def hset(self, key: str, mapping: dict):
+        """Set hash fields"""
+        try:
+            if not mapping:
+                return True
+            await self._execute("HSET", self.redis_client.hset, key, mapping=mapping)
+            return True
+        except Exception as e:
+            print(f"❌ Error setting Redis hash {key}: {e}")
+            return False
+    
+    async def hdel(self, key: str, *fields):
+        """Delete hash fields"""
+        try:
+            if not fields:
+                return 0
+            return await self._execute("HDEL", self.redis_client.hdel, key, *fields)
+        except Exception as e:
+            print(f"❌ Error deleting Redis hash fields {key}: {e}")
+            return 0
+    
+    async def spop(self, key: str, count: int) -> list:
+        """Remove and return up to count random set members"""
+        try:
+            return await self._execute("SPOP", self.redis_client.spop, key, count) or []
+        except Exception as e:
+            print(f"❌ Error popping Redis set {key}: {e}")
+            return []
+    
+    async def sadd(self, key: str, *members):
+        """Add set members"""
+        try:
+            if not members:
+                return 0
+            return await self._execute("SADD", self.redis_client.sadd, key, *members)
+        except Exception as e:
+            print(f"❌ Error adding to Redis set {key}: {e}")
+            return 0
+    
+    # ✅ Streams (background job queue) - errors propagate, the queue decides how to degrade
+    async def xadd(self, stream: str, fields: dict, maxlen: int = None):
+        """Append an entry (approximate MAXLEN trim) and return its ID"""
+        return await self._execute("XADD", self.redis_client.xadd, stream, fields, maxlen=maxlen, approximate=True)
+    
+    async def xgroup_create(self, stream: str, group: str):
+        """Create a consumer group (and the stream); False if it already exists"""
+        try:
+            await self._execute("XGROUP CREATE", self.redis_client.xgroup_create, stream, group, id="0", mkstream=True)
+            return True
+        except redis.ResponseError as e:
+            if "BUSYGROUP" in str(e):
+                return False
+            raise
+    
+    async def xreadgroup(self, group: str, consumer: str, stream: str, count: int, block_ms: int):
+        """New entries for this consumer: [(id, fields), ...]"""
+        result = await self._execute(
+            "XREADGROUP", self.redis_client.xreadgroup, group, consumer, {stream: ">"}, count=count, block=block_ms
+        )
+        return result[0][1] if result else []
+    
+    async def xpending(self, stream: str, group: str, count: int, min_idle_ms: int):
+        """Delivered but unacknowledged entries idle for at least min_idle_ms"""
+        return await self._execute(
+            "XPENDING", self.redis_client.xpending_range, stream, group, "-", "+", count, idle=min_idle_ms
+        )
+    
+    async def xclaim(self, stream: str, group: str, consumer: str, min_idle_ms: int, ids: list):
+        """Take over pending entries (bumps their delivery count)"""
+        return await self._execute("XCLAIM", self.redis_client.xclaim, stream, group, consumer, min_idle_ms, ids)
+    
+    async def xread(self, streams: dict, count: int, block_ms: int):
+        """Entries after the given IDs (no consumer group): [(id, fields), ...] of the first stream"""
+        result = await self._execute("XREAD", self.redis_client.xread, streams, count=count, block=block_ms)
+        return result[0][1] if result else []
+    
+    async def xrange(self, stream: str, start: str = "-", end: str = "+", count: int = None):
+        """Entries between start and end ("(" prefix = exclusive)"""
+        return await self._execute("XRANGE", self.redis_client.xrange, stream, start, end, count=count)
+    
+    async def xrevrange(self, stream: str, end: str = "+", start: str = "-", count: int = None):
+        """Entries from end back to start, newest first"""
+        return await self._execute("XREVRANGE", self.redis_client.xrevrange, stream, end, start, count=count)
+    
+    async def stream_info(self, stream: str, group: str) -> dict:
+        """Length, pending count and consumers of a stream's group"""
+        length = await self._execute("XLEN", self.redis_client.xlen, stream)
+        if not length:
+            return {"length": 0, "pending": 0, "consumers": 0, "lag": None}
+        groups = await self._execute("XINFO GROUPS", self.redis_client.xinfo_groups, stream)
+        group_info = next((g for g in groups if g["name"] == group), {})
+        return {
+            "length": length,
+            "pending": group_info.get("pending", 0),
+            "consumers": group_info.get("consumers", 0),
+            "lag": group_info.get("lag")
+        }
+    
+    async def run_script(self, name: str, keys: list = None, args: list = None):
+        """Run a registered Lua script by name"""
+        try:
+            script = self.scripts.get(name)
+            if script is None:
+                print(f"❌ Unknown Redis script: {name}")
+                return None
+            
+            return await self._execute(f"EVALSHA {name}", script, keys=keys or [], args=args or [])
+        except Exception as e:
+            print(f"❌ Error running Redis script {name}: {e}")
+            return None
 
 # Global Redis client instance
-redis_client = RedisClient()
\ No newline at end of file
+redis_client = RedisClient()
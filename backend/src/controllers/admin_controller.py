@@ -0,0 +1,233 @@
+# controllers/admin_controller.py
+from fastapi import HTTPException, status
+import asyncio
+from datetime import datetime, date, timedelta
+from ..models.slow_query_model import SlowQueryModel
+from ..models.user_model import UserModel
+from ..models.post_model import PostModel
+from ..models.comment_model import CommentModel
+from ..models.daily_stats_model import DailyStatsModel, METRICS
+from ..models.deletion_job_model import DeletionJobModel
+from ..schemas.admin_schema import (
+    DashboardResponse, DashboardUsers, DashboardPosts, DashboardComments,
+    AnalyticsBucket, AnalyticsResponse
+)
+from ..schemas.user_schema import UserResponse
+from ..schemas.post_schema import PostResponse
+from ..schemas.comment_schema import CommentResponse
+from ..utils.entity_cache import dashboard_cache
+from ..utils.export import export_projection, export_stream, parse_after, NDJSON_MEDIA_TYPE, GZIP_MEDIA_TYPE
+
+DASHBOARD_RECENT_LIMIT = 5
+# Longest analytics range (about ten years of day buckets)
+ANALYTICS_MAX_DAYS = 3660
+
+def bucket_start(day: datetime, interval: str) -> date:
+    if interval == "week":
+        # ISO weeks start on Monday
+        return (day - timedelta(days=day.weekday())).date()
+    if interval == "month":
+        return day.date().replace(day=1)
+    return day.date()
+
+class AdminController:
+    def __init__(self):
+        self.slow_query_model = SlowQueryModel()
+        self.user_model = UserModel()
+        self.post_model = PostModel()
+        self.comment_model = CommentModel()
+        self.daily_stats_model = DailyStatsModel()
+        self.deletion_job_model = DeletionJobModel()
+    
+    def _require_admin(self, current_user: dict):
+        if not current_user.get("isAdmin", False):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Admin privileges required"
+            )
+    
+    async def get_slow_queries(self, current_user: dict, limit: int = 50, collection: str = None):
+        """Recent slow MongoDB operations (admin only)"""
+        self._require_admin(current_user)
+        
+        entries = await self.slow_query_model.get_slow_queries(limit=limit, collection_name=collection)
+        for entry in entries:
+            entry["id"] = str(entry.pop("_id"))
+        
+        return {"slowQueries": entries, "count": len(entries)}
+    
+    async def get_slow_query_summary(self, current_user: dict, limit: int = 20):
+        """Slow MongoDB operations grouped by query shape (admin only)"""
+        self._require_admin(current_user)
+        
+        groups = await self.slow_query_model.get_slow_query_summary(limit=limit)
+        for group in groups:
+            group["shape"] = group.pop("_id")
+        
+        return {"shapes": groups}
+    
+    async def get_deletion_job(self, current_user: dict, job_id: str):
+        """Progress of a cascade deletion job (admin only)"""
+        self._require_admin(current_user)
+        
+        job = await self.deletion_job_model.find_job(job_id)
+        if not job:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Deletion job not found"
+            )
+        job["id"] = str(job.pop("_id"))
+        return job
+    
+    async def _build_dashboard(self) -> dict:
+        one_month_ago = datetime.now() - timedelta(days=30)
+        
+        # ✅ All nine reads run concurrently
+        (
+            total_users, last_month_users, recent_users,
+            total_posts, last_month_posts, recent_posts,
+            total_comments, last_month_comments, recent_comments
+        ) = await asyncio.gather(
+            self.user_model.count_users(),
+            self.user_model.get_users_count_since_date(one_month_ago),
+            self.user_model.get_all_users(limit=DASHBOARD_RECENT_LIMIT),
+            self.post_model.count_posts(),
+            self.post_model.count_posts({"createdAt": {"$gte": one_month_ago}}),
+            self.post_model.get_posts(limit=DASHBOARD_RECENT_LIMIT),
+            self.comment_model.count_comments(),
+            self.comment_model.get_comments_count_since_date(one_month_ago),
+            self.comment_model.get_all_comments(limit=DASHBOARD_RECENT_LIMIT)
+        )
+        
+        dashboard = DashboardResponse(
+            users=DashboardUsers(
+                total=total_users,
+                lastMonth=last_month_users,
+                recent=[UserResponse(
+                    id=str(user["_id"]),
+                    username=user["username"],
+                    email=user["email"],
+                    profilePicture=user.get("profilePicture"),
+                    isAdmin=user.get("isAdmin", False)
+                ) for user in recent_users]
+            ),
+            posts=DashboardPosts(
+                total=total_posts,
+                lastMonth=last_month_posts,
+                recent=[PostResponse(
+                    id=str(post["_id"]),
+                    userId=post["userId"],
+                    title=post["title"],
+                    content=post["content"],
+                    image=post.get("image"),
+                    category=post.get("category", "uncategorized"),
+                    tags=post.get("tags", []),
+                    slug=post["slug"],
+                    createdAt=post.get("createdAt"),
+                    updatedAt=post.get("updatedAt")
+                ) for post in recent_posts]
+            ),
+            comments=DashboardComments(
+                total=total_comments,
+                lastMonth=last_month_comments,
+                recent=[CommentResponse(
+                    id=str(comment["_id"]),
+                    content=comment["content"],
+                    postId=comment["postId"],
+                    userId=comment["userId"],
+                    likes=comment.get("likes", []),
+                    numberOfLikes=comment.get("numberOfLikes", 0),
+                    createdAt=comment.get("createdAt"),
+                    updatedAt=comment.get("updatedAt")
+                ) for comment in recent_comments]
+            ),
+            generatedAt=datetime.now()
+        )
+        return dashboard.model_dump(mode="json")
+    
+    async def get_dashboard(self, current_user: dict):
+        """Totals, last-month counts and recent users/posts/comments (admin only, cached)"""
+        self._require_admin(current_user)
+        
+        dashboard = await dashboard_cache.get("stats", self._build_dashboard)
+        return DashboardResponse(**dashboard)
+    
+    async def get_analytics(
+        self,
+        current_user: dict,
+        start: date,
+        end: date,
+        interval: str = "day"
+    ):
+        """Signups, posts, comments and likes per day / week / month from the daily rollups (admin only)"""
+        self._require_admin(current_user)
+        
+        if end < start:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="end must not be before start"
+            )
+        if (end - start).days >= ANALYTICS_MAX_DAYS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Range is limited to {ANALYTICS_MAX_DAYS} days"
+            )
+        
+        range_start = datetime.combine(start, datetime.min.time())
+        # end is inclusive
+        range_end = datetime.combine(end, datetime.min.time()) + timedelta(days=1)
+        days = await self.daily_stats_model.get_days(range_start, range_end)
+        
+        # Empty buckets for the whole range, so charts get zeros instead of gaps
+        buckets = {}
+        day = range_start
+        while day < range_end:
+            key = bucket_start(day, interval)
+            buckets.setdefault(key, {metric: 0 for metric in METRICS})
+            day += timedelta(days=1)
+        
+        totals = {metric: 0 for metric in METRICS}
+        for doc in days:
+            bucket = buckets[bucket_start(doc["_id"], interval)]
+            for metric in METRICS:
+                count = doc.get(metric, 0)
+                bucket[metric] += count
+                totals[metric] += count
+        
+        return AnalyticsResponse(
+            interval=interval,
+            start=start,
+            end=end,
+            buckets=[AnalyticsBucket(start=key, **counts) for key, counts in buckets.items()],
+            totals=AnalyticsBucket(start=start, **totals)
+        )
+    
+    def export(
+        self,
+        current_user: dict,
+        collection: str,
+        after: str = None,
+        fields: str = None,
+        limit: int = 0,
+        compress: bool = False
+    ):
+        """NDJSON stream of a whole collection in _id order (admin only) -> (body, media type, file name)"""
+        self._require_admin(current_user)
+        
+        field_list = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+        try:
+            # Validated before the response starts - errors mid-stream can only cut the body short
+            export_projection(collection, field_list)
+            after_id = parse_after(after)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        
+        file_name = f"{collection}-{datetime.now():%Y%m%d-%H%M%S}.ndjson" + (".gz" if compress else "")
+        body = export_stream(collection, after_id, field_list, limit, compress)
+        return body, GZIP_MEDIA_TYPE if compress else NDJSON_MEDIA_TYPE, file_name
+
+# Create controller instance
+admin_controller = AdminController()
@@ -6,17 +6,22 @@ from ..schemas.user_schema import UserCreate, UserLogin, UserGoogle, UserRespons
 from ..utils.security import (
     hash_password, 
     verify_password, 
-    create_access_token,
-    create_refresh_token,
     verify_refresh_token,
-    revoke_refresh_token,
-    revoke_all_user_tokens,
-    blacklist_token
+    issue_session_tokens,
+    revoke_session,
+    acquire_refresh_lock,
+    release_refresh_lock,
+    get_refresh_grace
 )
 from ..utils.csrf_security import csrf_protection
+from ..configs.config import REFRESH_LOCK_TTL_MS
+import asyncio
 import random
 import string
 
+# Poll interval while another request holds the refresh lock
+REFRESH_WAIT_INTERVAL = 0.05
+
 class AuthController:
     def __init__(self):
         self.user_model = UserModel()
@@ -95,12 +100,11 @@ class AuthController:
         
         user_id = str(db_user["_id"])
         
-        # Create tokens
-        access_token = create_access_token(user_id, db_user.get("isAdmin", False))
-        refresh_token = await create_refresh_token(user_id)
-        
-        # ✅ CSRF token ဖန်တီးမယ်
-        csrf_token = await csrf_protection.generate_csrf_token(user_id)
+        # ✅ Access, refresh and CSRF tokens (one Redis round trip)
+        issued_tokens = await issue_session_tokens(user_id, db_user.get("isAdmin", False))
+        access_token = issued_tokens["access_token"]
+        refresh_token = issued_tokens["refresh_token"]
+        csrf_token = issued_tokens["csrf_token"]
         
         # Set HTTP-only cookies
         response.set_cookie(
@@ -147,39 +151,89 @@ class AuthController:
         }
 
     async def refresh_tokens(self, refresh_token: str, response: Response):
-        """Refresh access token using refresh token"""
+        """Refresh access token using refresh token (coalesced per user)"""
         if not refresh_token:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Refresh token required"
             )
         
+        # ✅ Another tab already rotated this refresh token - return the same pair
+        issued_tokens = await get_refresh_grace(refresh_token)
+        if issued_tokens:
+            print("ℹ️ Refresh token already rotated - returning tokens from grace window")
+            return self._apply_refreshed_tokens(issued_tokens, response)
+        
         payload = await verify_refresh_token(refresh_token)
         if not payload:
+            # The winning tab may have rotated the token while we were verifying
+            issued_tokens = await get_refresh_grace(refresh_token)
+            if issued_tokens:
+                return self._apply_refreshed_tokens(issued_tokens, response)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid or expired refresh token"
             )
         
         user_id = payload.get("id")
-        user = await self.user_model.find_user_by_id(user_id)
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
         
-        # Create new tokens
-        new_access_token = create_access_token(user_id, user.get("isAdmin", False))
-        new_refresh_token = await create_refresh_token(user_id)
+        # ✅ Single-flight: only one refresh per user at a time
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + REFRESH_LOCK_TTL_MS / 1000
+        while True:
+            lock_value = await acquire_refresh_lock(user_id)
+            if lock_value:
+                break
+            
+            issued_tokens = await get_refresh_grace(refresh_token)
+            if issued_tokens:
+                return self._apply_refreshed_tokens(issued_tokens, response)
+            
+            if loop.time() >= deadline:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Token refresh in progress - please retry"
+                )
+            await asyncio.sleep(REFRESH_WAIT_INTERVAL)
         
-        # ✅ New CSRF token ပါထုတ်ပေးမယ်
-        new_csrf_token = await csrf_protection.generate_csrf_token(user_id)
+        try:
+            # Lock holder before us may have finished with this same token
+            issued_tokens = await get_refresh_grace(refresh_token)
+            if issued_tokens:
+                return self._apply_refreshed_tokens(issued_tokens, response)
+            
+            # Re-check under the lock - stored token may have changed meanwhile
+            payload = await verify_refresh_token(refresh_token)
+            if not payload:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Invalid or expired refresh token"
+                )
+            
+            user = await self.user_model.find_user_by_id(user_id)
+            if not user:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="User not found"
+                )
+            
+            # ✅ New access/refresh/CSRF tokens - old refresh token ကို grace window
+            # အတွင်း same pair ပြန်ပေးနိုင်အောင် same transaction ထဲမှာ သိမ်းမယ်
+            issued_tokens = await issue_session_tokens(
+                user_id,
+                user.get("isAdmin", False),
+                rotated_from=refresh_token
+            )
+        finally:
+            await release_refresh_lock(user_id, lock_value)
         
-        # Set new cookies
+        return self._apply_refreshed_tokens(issued_tokens, response)
+
+    def _apply_refreshed_tokens(self, issued_tokens: dict, response: Response):
+        """Set refreshed token cookies and build the refresh response"""
         response.set_cookie(
             key="access_token",
-            value=new_access_token,
+            value=issued_tokens["access_token"],
             httponly=True,
             secure=False,
             samesite="lax",
@@ -188,7 +242,7 @@ class AuthController:
         
         response.set_cookie(
             key="refresh_token",
-            value=new_refresh_token,
+            value=issued_tokens["refresh_token"],
             httponly=True,
             secure=False,
             samesite="lax",
@@ -198,7 +252,7 @@ class AuthController:
         # ✅ CSRF cookie ကိုပါ update လုပ်မယ်
         response.set_cookie(
             key="csrf_token",
-            value=new_csrf_token,
+            value=issued_tokens["csrf_token"],
             httponly=False,
             secure=False,
             samesite="lax",
@@ -207,7 +261,7 @@ class AuthController:
         
         return {
             "message": "Tokens refreshed successfully",
-            "csrfToken": new_csrf_token
+            "csrfToken": issued_tokens["csrf_token"]
         }
 
     async def logout(self, user_id: str, access_token: str, refresh_token: str, response: Response):
@@ -219,38 +273,13 @@ class AuthController:
             if user_id and user_id != "None":
                 print(f"✅ Processing token revocation for user: {user_id}")
                 
+                # ✅ Refresh token, CSRF tokens and blacklist in one transaction
                 try:
-                    # Revoke refresh token from Redis
-                    await revoke_refresh_token(user_id)
-                    print(f"✅ Revoked refresh tokens for user: {user_id}")
-                except Exception as e:
-                    print(f"❌ Revoke refresh token failed: {e}")
-                
-                # ✅ CSRF tokens အားလုံးကိုဖျက်မယ် (with error handling)
-                try:
-                    csrf_success = await csrf_protection.revoke_user_csrf_tokens(user_id)
-                    if csrf_success:
-                        print(f"✅ Revoked CSRF tokens for user: {user_id}")
-                    else:
-                        print(f"⚠️ No CSRF tokens found for user: {user_id}")
+                    await revoke_session(user_id, access_token, refresh_token)
+                    print(f"✅ Revoked session tokens for user: {user_id}")
                 except Exception as e:
-                    print(f"❌ Revoke CSRF tokens failed: {e}")
-                    # Continue with logout even if CSRF revocation fails
-                
-                # Blacklist both tokens if we have them
-                try:
-                    if access_token and access_token != "None":
-                        success = await blacklist_token(access_token, "access", expire_seconds=15*60)
-                        print(f"✅ Access token blacklist result: {success}")
-                except Exception as e:
-                    print(f"❌ Blacklist access token failed: {e}")
-                    
-                try:
-                    if refresh_token and refresh_token != "None":
-                        success = await blacklist_token(refresh_token, "refresh", expire_seconds=7*24*60*60)
-                        print(f"✅ Refresh token blacklist result: {success}")
-                except Exception as e:
-                    print(f"❌ Blacklist refresh token failed: {e}")
+                    print(f"❌ Session revocation failed: {e}")
+                    # Continue with logout even if revocation fails
             else:
                 print("❌ No valid user_id provided, skipping token revocation")
             
@@ -274,16 +303,11 @@ class AuthController:
 
     async def logout_all_devices(self, user_id: str, access_token: str, response: Response):
         """Logout user from all devices and blacklist current tokens"""
-        # Revoke all refresh tokens for user
-        await revoke_all_user_tokens(user_id)
-        
-        # ✅ CSRF tokens အားလုံးကိုဖျက်မယ်
-        await csrf_protection.revoke_user_csrf_tokens(user_id)
-        
-        # Blacklist the current access token (if provided)
-        if access_token:
-            await blacklist_token(access_token, "access", expire_seconds=15*60)
-            print(f"✅ Blacklisted current access token during logout-all")
+        # Revoke refresh + CSRF tokens and blacklist the current access token (if provided)
+        if await revoke_session(user_id, access_token):
+            print(f"✅ Revoked all tokens for user during logout-all: {user_id}")
+        else:
+            print(f"⚠️ Logout-all for user {user_id} only revoked locally - other devices stay signed in until their refresh token expires")
         
         # Clear cookies
         response.delete_cookie("access_token")
@@ -301,11 +325,7 @@ class AuthController:
             if db_user:
                 print(f"✅ User found: {db_user['email']} - Logging in")
                 # User exists - login
-                access_token = create_access_token(str(db_user["_id"]), db_user.get("isAdmin", False))
-                refresh_token = await create_refresh_token(str(db_user["_id"]))
-                
-                # ✅ CSRF token ဖန်တီးမယ်
-                csrf_token = await csrf_protection.generate_csrf_token(str(db_user["_id"]))
+                issued_tokens = await issue_session_tokens(str(db_user["_id"]), db_user.get("isAdmin", False))
                 
                 user_response = UserResponse(
                     id=str(db_user["_id"]),
@@ -351,9 +371,7 @@ class AuthController:
                         detail="Failed to create user"
                     )
                 
-                access_token = create_access_token(str(db_user["_id"]), db_user.get("isAdmin", False))
-                refresh_token = await create_refresh_token(str(db_user["_id"]))
-                csrf_token = await csrf_protection.generate_csrf_token(str(db_user["_id"]))
+                issued_tokens = await issue_session_tokens(str(db_user["_id"]), db_user.get("isAdmin", False))
                 
                 user_response = UserResponse(
                     id=str(db_user["_id"]),
@@ -363,6 +381,10 @@ class AuthController:
                     isAdmin=db_user.get("isAdmin", False)
                 )
             
+            access_token = issued_tokens["access_token"]
+            refresh_token = issued_tokens["refresh_token"]
+            csrf_token = issued_tokens["csrf_token"]
+            
             # Set cookies
             response.set_cookie(
                 key="access_token",
@@ -3,6 +3,7 @@ from fastapi import HTTPException, status
 from ..models.comment_model import CommentModel
 from ..schemas.comment_schema import CommentCreate, CommentUpdate, CommentResponse, CommentsResponse
 from datetime import datetime, timedelta
+from ..utils.live_events import publish_post_event
 
 class CommentController:
     def __init__(self):
@@ -53,7 +54,7 @@ class CommentController:
                 detail="Failed to create comment"
             )
         
-        return CommentResponse(
+        comment_response = CommentResponse(
             id=str(new_comment["_id"]),
             content=new_comment["content"],
             postId=new_comment["postId"],
@@ -63,6 +64,8 @@ class CommentController:
             createdAt=new_comment.get("createdAt"),
             updatedAt=new_comment.get("updatedAt")
         )
+        await publish_post_event(comment_response.postId, "comment.created", comment_response.model_dump(mode="json"))
+        return comment_response
 
     async def get_post_comments(self, post_id: str, current_user: dict = None):
         """Get comments for a specific post"""
@@ -118,18 +121,24 @@ class CommentController:
             likes.append(user_id)
             number_of_likes = comment.get("numberOfLikes", 0) + 1
         
-        # Update comment
+        # Update comment - likesDelta feeds the daily "likes" counter (an unlike takes one back)
         success = await self.comment_model.update_comment(comment_id, {
             "likes": likes,
             "numberOfLikes": number_of_likes,
             "updatedAt": datetime.now()
-        })
+        }, event_data={"likesDelta": number_of_likes - comment.get("numberOfLikes", 0)})
         
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to update comment"
             )
+        await publish_post_event(comment["postId"], "comment.liked", {
+            "id": comment_id,
+            "userId": user_id,
+            "liked": user_id in likes,
+            "numberOfLikes": number_of_likes
+        })
         
         # Get updated comment
         updated_comment = await self.comment_model.find_comment_by_id(comment_id)
@@ -185,6 +194,11 @@ class CommentController:
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to update comment"
             )
+        await publish_post_event(comment["postId"], "comment.updated", {
+            "id": comment_id,
+            "content": update_data.content,
+            "updatedAt": datetime.now()
+        })
         
         # Get updated comment
         updated_comment = await self.comment_model.find_comment_by_id(comment_id)
@@ -228,6 +242,7 @@ class CommentController:
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to delete comment"
             )
+        await publish_post_event(comment["postId"], "comment.deleted", {"id": comment_id})
         
         return {"message": "Comment has been deleted"}
 
@@ -1,22 +1,37 @@
 # controllers/post_controller.py (CSRF Compatible Version)
 from fastapi import HTTPException, status
 from ..models.post_model import PostModel
-from ..schemas.post_schema import PostCreate, PostUpdate, PostResponse, PostsResponse
+from ..models.comment_model import CommentModel
+from ..models.user_model import UserModel
+from ..schemas.post_schema import PostCreate, PostUpdate, PostResponse, PostsResponse, PageCommentResponse, PostPageResponse, TrendingPost, TrendingResponse, RelatedPost, FacetCount, FacetsResponse, normalize_tags
+from ..models.facet_model import FacetModel
+from ..schemas.user_schema import AuthorResponse
+from .user_controller import user_controller
+import asyncio
 import re
 from datetime import datetime, timedelta
 from bson import ObjectId
 from bson.errors import InvalidId
+from ..utils.entity_cache import post_cache
+from ..utils.slug_map import post_slugs
+from ..utils.cascade_delete import cascade_deleter
+from ..utils.live_events import publish_post_event, live_events
+from ..utils.trending import trending_posts
+from ..utils.feeds import feed_artifacts
 
 class PostController:
     def __init__(self):
         self.post_model = PostModel()
-
+        self.comment_model = CommentModel()
+        self.user_model = UserModel()
+        self.facet_model = FacetModel()
+    
     def _generate_slug(self, title: str) -> str:
         """Generate slug from title"""
         slug = title.replace(' ', '-').lower()
         slug = re.sub(r'[^a-zA-Z0-9-]', '', slug)
         return slug
-
+    
     async def create_post(self, post_data: PostCreate, current_user: dict):
         """Create a new post (Admin only)"""
         # Check if user is admin
@@ -56,6 +71,7 @@ class PostController:
             "content": post_data.content,
             "image": post_data.image or "https://www.hostinger.com/tutorials/wp-content/uploads/sites/2/2021/09/how-to-write-a-blog-post.png",
             "category": post_data.category or "uncategorized",
+            "tags": post_data.tags,
             "slug": slug,
             "createdAt": datetime.now(),
             "updatedAt": datetime.now()
@@ -63,6 +79,7 @@ class PostController:
         
         # Save post
         post_id = await self.post_model.create_post(post_dict)
+        await post_slugs.remember(slug, post_id)
         
         # Get the created post
         new_post = await self.post_model.find_post_by_id(post_id)
@@ -79,11 +96,12 @@ class PostController:
             content=new_post["content"],
             image=new_post.get("image"),
             category=new_post.get("category", "uncategorized"),
+            tags=new_post.get("tags", []),
             slug=new_post["slug"],
             createdAt=new_post.get("createdAt"),
             updatedAt=new_post.get("updatedAt")
         )
-
+    
     async def get_posts(
         self,
         userId: str = None,
@@ -91,12 +109,14 @@ class PostController:
         slug: str = None,
         postId: str = None,
         searchTerm: str = None,
+        tags: list = None,
+        tagMatch: str = "all",
         startIndex: int = 0,
         limit: int = 9,
         order: str = "desc",
         current_user: dict = None  # ✅ Added current_user parameter
     ):
-        """Get posts with filtering and pagination"""
+        """Get posts with filtering and pagination (tags: posts with all / any of them)"""
         # Build query
         query = {}
         
@@ -106,6 +126,14 @@ class PostController:
         if category:
             query["category"] = category
         
+        # ✅ Served by the multikey tags_* indexes
+        # ?tags=a&tags=b or ?tags=a,b
+        tags = normalize_tags(tag for value in tags or [] for tag in value.split(","))
+        if len(tags) == 1:
+            query["tags"] = tags[0]
+        elif tags:
+            query["tags"] = {"$all" if tagMatch == "all" else "$in": tags}
+        
         if slug:
             query["slug"] = slug
         
@@ -147,6 +175,7 @@ class PostController:
                 content=post["content"],
                 image=post.get("image"),
                 category=post.get("category", "uncategorized"),
+                tags=post.get("tags", []),
                 slug=post["slug"],
                 createdAt=post.get("createdAt"),
                 updatedAt=post.get("updatedAt")
@@ -166,7 +195,166 @@ class PostController:
             totalPosts=total_posts,
             lastMonthPosts=last_month_posts
         )
-
+    
+    async def get_post(self, post_id: str):
+        """Get a single post by ID (cached, one indexed read on a miss)"""
+        async def load_post():
+            post = await self.post_model.find_post_by_id(post_id)
+            if not post:
+                return None
+            return PostResponse(
+                id=str(post["_id"]),
+                userId=post["userId"],
+                title=post["title"],
+                content=post["content"],
+                image=post.get("image"),
+                category=post.get("category", "uncategorized"),
+                tags=post.get("tags", []),
+                slug=post["slug"],
+                createdAt=post.get("createdAt"),
+                updatedAt=post.get("updatedAt")
+            ).model_dump(mode="json")
+        
+        post = await post_cache.get(post_id, load_post)
+        if not post:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Post not found"
+            )
+        return PostResponse(**post)
+    
+    async def stream_post_events(self, post_id: str, last_event_id: str, is_disconnected):
+        """Live comment / post diffs for one post (404 before the stream starts)"""
+        await self.get_post(post_id)
+        return live_events.stream(post_id, last_event_id, is_disconnected)
+    
+    async def record_view(self, post_id: str, viewer: str):
+        """Unique view + trending score in Redis (no MongoDB write)"""
+        await trending_posts.record_view(post_id, viewer)
+    
+    async def get_trending(self, sort: str = "trending", limit: int = 10):
+        """Top posts by decayed (trending) or all-time (popular) unique views"""
+        ranked = await trending_posts.top(sort, limit)
+        posts = await self.post_model.find_posts_by_ids(
+            [post_id for post_id, _ in ranked],
+            {"content": 0, "previousSlugs": 0}
+        )
+        posts_by_id = {str(post["_id"]): post for post in posts}
+        
+        trending = []
+        for post_id, score in ranked:
+            post = posts_by_id.get(post_id)
+            # Deleted since it was ranked
+            if not post:
+                continue
+            trending.append(TrendingPost(
+                id=post_id,
+                userId=post["userId"],
+                title=post["title"],
+                image=post.get("image"),
+                category=post.get("category", "uncategorized"),
+                slug=post["slug"],
+                views=post.get("views", 0),
+                score=round(score, 3),
+                createdAt=post.get("createdAt")
+            ))
+        return TrendingResponse(sort=sort, posts=trending)
+    
+    async def get_facets(self, limit: int = 50):
+        """Category and tag counts from the post_facets counters (no aggregation over posts)"""
+        categories, tags = await asyncio.gather(
+            self.facet_model.get_facets("category", limit),
+            self.facet_model.get_facets("tag", limit)
+        )
+        return FacetsResponse(
+            categories=[FacetCount(**facet) for facet in categories],
+            tags=[FacetCount(**facet) for facet in tags]
+        )
+    
+    async def get_feed_file(self, name: str):
+        """Prebuilt feed / sitemap file -> (path, generation); built on first use"""
+        artifact = await feed_artifacts.get(name)
+        if not artifact:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Not found"
+            )
+        return artifact
+    
+    async def get_post_by_slug(self, slug: str):
+        """Get a post by current or previous slug (the route redirects when post.slug != slug)"""
+        post_id = await post_slugs.resolve(slug, lambda: self.post_model.find_post_id_by_slug(slug))
+        if not post_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Post not found"
+            )
+        return await self.get_post(post_id)
+    
+    async def _get_author(self, user_id: str):
+        """Author card from the user-profile cache (None if the user was deleted)"""
+        try:
+            user = await user_controller.get_user(user_id)
+        except HTTPException:
+            return None
+        return AuthorResponse(id=user.id, username=user.username, profilePicture=user.profilePicture)
+    
+    async def get_post_page(self, slug: str, comment_limit: int = 10):
+        """Post, its author, the first page of comments with their authors and the comment count"""
+        post = await self.get_post_by_slug(slug)
+        
+        # ✅ Independent reads run concurrently
+        author, comments, total_comments, related = await asyncio.gather(
+            self._get_author(post.userId),
+            self.comment_model.get_comments_page(post.id, limit=comment_limit),
+            self.comment_model.count_comments({"postId": post.id}),
+            self.post_model.get_related_posts(post.id)
+        )
+        
+        # All commenters in one $in query
+        authors = {author.id: author} if author else {}
+        commenter_ids = {comment["userId"] for comment in comments} - set(authors)
+        if commenter_ids:
+            for user in await self.user_model.find_users_by_ids(list(commenter_ids)):
+                authors[str(user["_id"])] = AuthorResponse(
+                    id=str(user["_id"]),
+                    username=user["username"],
+                    profilePicture=user.get("profilePicture")
+                )
+        
+        page_comments = []
+        for comment in comments:
+            page_comments.append(PageCommentResponse(
+                id=str(comment["_id"]),
+                content=comment["content"],
+                postId=comment["postId"],
+                userId=comment["userId"],
+                likes=comment.get("likes", []),
+                numberOfLikes=comment.get("numberOfLikes", 0),
+                createdAt=comment.get("createdAt"),
+                updatedAt=comment.get("updatedAt"),
+                author=authors.get(comment["userId"])
+            ))
+        
+        return PostPageResponse(
+            post=post,
+            author=author,
+            comments=page_comments,
+            totalComments=total_comments,
+            hasMoreComments=total_comments > len(page_comments),
+            related=[
+                RelatedPost(
+                    id=str(related_post["_id"]),
+                    title=related_post["title"],
+                    image=related_post.get("image"),
+                    category=related_post.get("category", "uncategorized"),
+                    slug=related_post["slug"],
+                    score=related_post["score"]
+                )
+                for related_post in related
+            ]
+        )
+    
     async def delete_post(self, post_id: str, user_id: str, current_user: dict):
         """Delete a post"""
         # Check permissions
@@ -191,16 +379,24 @@ class PostController:
                 detail="You are not allowed to delete this post"
             )
         
-        # Delete post
-        success = await self.post_model.delete_post(post_id)
+        # Delete post (its comments' cleanup job commits with it)
+        cleanup_job = cascade_deleter.new_job("post", post_id)
+        success = await self.post_model.delete_post(post_id, cleanup_job)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to delete post"
             )
+        await post_cache.invalidate(post_id)
+        await post_slugs.forget(post["slug"], *post.get("previousSlugs", []))
+        await publish_post_event(post_id, "post.deleted", {"id": post_id})
         
-        return {"message": "The post has been deleted"}
-
+        # Comments are removed in the background
+        cleanup_job_id = str(cleanup_job["_id"])
+        cascade_deleter.launch(cleanup_job_id)
+        
+        return {"message": "The post has been deleted", "cleanupJobId": cleanup_job_id}
+    
     async def update_post(
         self, 
         post_id: str, 
@@ -255,6 +451,8 @@ class PostController:
             update_dict["content"] = update_data.content
         if update_data.category is not None:
             update_dict["category"] = update_data.category
+        if update_data.tags is not None:
+            update_dict["tags"] = update_data.tags
         if update_data.image is not None:
             update_dict["image"] = update_data.image
         
@@ -263,12 +461,22 @@ class PostController:
         
         # Update post
         if update_dict:
-            success = await self.post_model.update_post(post_id, update_dict)
+            # ✅ Old slug keeps working as a redirect
+            previous_slug = post["slug"] if update_dict.get("slug", post["slug"]) != post["slug"] else None
+            success = await self.post_model.update_post(post_id, update_dict, previous_slug=previous_slug)
             if not success:
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     detail="Failed to update post"
                 )
+            await post_cache.invalidate(post_id)
+            if previous_slug:
+                await post_slugs.remember(update_dict["slug"], post_id)
+            # Live readers get only the fields that changed
+            await publish_post_event(post_id, "post.updated", {
+                "id": post_id,
+                **{field: value for field, value in update_dict.items() if post.get(field) != value}
+            })
         
         # Get updated post
         updated_post = await self.post_model.find_post_by_id(post_id)
@@ -279,6 +487,7 @@ class PostController:
             content=updated_post["content"],
             image=updated_post.get("image"),
             category=updated_post.get("category", "uncategorized"),
+            tags=updated_post.get("tags", []),
             slug=updated_post["slug"],
             createdAt=updated_post.get("createdAt"),
             updatedAt=updated_post.get("updatedAt")
@@ -11,7 +11,9 @@ from ..utils.security import (
     revoke_refresh_token,
     blacklist_token
 )
-from ..utils.csrf_security import csrf_protection
+from ..utils.entity_cache import user_cache
+from ..utils.cascade_delete import cascade_deleter
+from ..utils.job_queue import job_queue
 
 class UserController:
     def __init__(self):
@@ -78,6 +80,7 @@ class UserController:
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="User not found"
                 )
+            await user_cache.invalidate(user_id)
         
         # Get updated user (using await now)
         updated_user = await self.user_model.find_user_by_id(user_id)
@@ -136,16 +139,23 @@ class UserController:
             else:
                 print("ℹ️ No request object - skipping token blacklisting")
             
-            # Step 3: Delete user from database
-            success = await self.user_model.delete_user(user_id)
+            # Step 3: Delete user from database (the cleanup job commits with it)
+            cleanup_job = cascade_deleter.new_job("user", user_id)
+            success = await self.user_model.delete_user(user_id, cleanup_job)
             if not success:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="User not found"
                 )
             
+            await user_cache.invalidate(user_id)
+            
+            # Step 4: Posts, comments and likes are cleaned up in the background
+            cleanup_job_id = str(cleanup_job["_id"])
+            cascade_deleter.launch(cleanup_job_id)
+            
             print(f"✅ User {user_id} successfully deleted their own account")
-            return {"message": "Your account has been deleted successfully"}
+            return {"message": "Your account has been deleted successfully", "cleanupJobId": cleanup_job_id}
         
         except Exception as e:
             print(f"❌ Error in delete_own_account: {e}")
@@ -172,23 +182,28 @@ class UserController:
             await revoke_refresh_token(user_id)
             print(f"✅ Admin revoked refresh tokens for user: {user_id}")
 
-            # Step 2: Revoke CSRF tokens of the target user
-            await csrf_protection.revoke_user_csrf_tokens(user_id)
-            print(f"✅ Admin revoked CSRF tokens for user: {user_id}")
-
             # ❌ IMPORTANT: Admin token တွေကို blacklist မလုပ်ဘူး
             # Admin က delete လုပ်ပြီးတဲ့အခါ ဆက်သုံးလို့ရအောင်
 
-            # Step 3: Delete user from database
-            success = await self.user_model.delete_user(user_id)
+            # Step 2: Delete user from database (the cleanup job commits with it)
+            cleanup_job = cascade_deleter.new_job("user", user_id)
+            success = await self.user_model.delete_user(user_id, cleanup_job)
             if not success:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="User not found"
                 )
             
+            await user_cache.invalidate(user_id)
+            # Step 3: CSRF tokens of the target user (KEYS scan) are revoked by a background job
+            await job_queue.enqueue("user.revoke_csrf_tokens", {"userId": user_id})
+            
+            # Step 4: Posts, comments and likes are cleaned up in the background
+            cleanup_job_id = str(cleanup_job["_id"])
+            cascade_deleter.launch(cleanup_job_id)
+            
             print(f"✅ Admin {current_user['id']} successfully deleted user {user_id}")
-            return {"message": f"User {user_id} has been deleted by admin"}
+            return {"message": f"User {user_id} has been deleted by admin", "cleanupJobId": cleanup_job_id}
         
         except Exception as e:
             print(f"❌ Error in admin_delete_user: {e}")
@@ -247,21 +262,27 @@ class UserController:
         )
 
     async def get_user(self, user_id: str):
-        """Get user by ID"""
-        user = await self.user_model.find_user_by_id(user_id)
+        """Get user by ID (cached)"""
+        async def load_user():
+            user = await self.user_model.find_user_by_id(user_id)
+            if not user:
+                return None
+            return UserResponse(
+                id=str(user["_id"]),
+                username=user["username"],
+                email=user["email"],
+                profilePicture=user.get("profilePicture"),
+                isAdmin=user.get("isAdmin", False)
+            ).model_dump(mode="json")
+        
+        user = await user_cache.get(user_id, load_user)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
         
-        return UserResponse(
-            id=str(user["_id"]),
-            username=user["username"],
-            email=user["email"],
-            profilePicture=user.get("profilePicture"),
-            isAdmin=user.get("isAdmin", False)
-        )
+        return UserResponse(**user)
 
     async def update_user_admin(self, user_id: str, admin_data: UserUpdateAdmin, current_user: dict):
         """Update user admin status (admin only)"""
@@ -286,6 +307,7 @@ class UserController:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
+        await user_cache.invalidate(user_id)
         
         # Get updated user (using await now)
         updated_user = await self.user_model.find_user_by_id(user_id)
@@ -6,14 +6,22 @@ from typing import List, Dict, Any, Optional
 class CommentModel:
     def __init__(self):
         from ..configs.database import get_comment_collection
+        from .outbox_model import OutboxModel
         self.collection = get_comment_collection()
+        self.outbox = OutboxModel()
     
     async def create_comment(self, comment_data: dict) -> str:
-        """Create a new comment and return comment ID"""
+        """Create a new comment and return comment ID (records comment.created)"""
         comment_data["createdAt"] = datetime.now()
         comment_data["updatedAt"] = datetime.now()
-        result = await self.collection.insert_one(comment_data)
-        return str(result.inserted_id)
+        
+        async def write(session):
+            result = await self.collection.insert_one(comment_data, session=session)
+            comment_id = str(result.inserted_id)
+            await self.outbox.record("comment.created", comment_id, comment_data, session)
+            return comment_id
+        
+        return await self.outbox.run_in_transaction(write)
     
     async def find_comment_by_id(self, comment_id: str) -> Optional[Dict[str, Any]]:
         """Find comment by ID"""
@@ -31,23 +39,53 @@ class CommentModel:
             print(f"Error getting comments by post ID: {e}")
             return []
     
-    async def update_comment(self, comment_id: str, update_data: dict) -> bool:
-        """Update comment and return success status"""
-        update_data["updatedAt"] = datetime.now()
+    async def get_comments_page(self, post_id: str, skip: int = 0, limit: int = 10) -> List[Dict[str, Any]]:
+        """Get one page of a post's comments, newest first"""
         try:
+            cursor = self.collection.find({"postId": post_id}).sort("createdAt", -1).skip(skip).limit(limit)
+            return await cursor.to_list(length=limit)
+        except Exception as e:
+            print(f"Error getting comments page: {e}")
+            return []
+    
+    async def update_comment(self, comment_id: str, update_data: dict, event_data: dict = None) -> bool:
+        """
+        Update comment and return success status (records comment.updated)
+        - event_data: extra facts for outbox consumers the new values don't show (e.g. likesDelta)
+        """
+        update_data["updatedAt"] = datetime.now()
+        
+        async def write(session):
             result = await self.collection.update_one(
                 {"_id": ObjectId(comment_id)},
-                {"$set": update_data}
+                {"$set": update_data},
+                session=session
             )
-            return result.modified_count > 0
+            if result.modified_count == 0:
+                return False
+            await self.outbox.record("comment.updated", comment_id, {**update_data, **(event_data or {})}, session)
+            return True
+        
+        try:
+            return await self.outbox.run_in_transaction(write)
         except:
             return False
     
     async def delete_comment(self, comment_id: str) -> bool:
-        """Delete comment and return success status"""
+        """Delete comment and return success status (records comment.deleted with its post and author)"""
+        async def write(session):
+            comment = await self.collection.find_one_and_delete(
+                {"_id": ObjectId(comment_id)},
+                projection={"postId": 1, "userId": 1},
+                session=session
+            )
+            if comment is None:
+                return False
+            await self.outbox.record("comment.deleted", comment_id, comment, session)
+            return True
+        
         try:
-            result = await self.collection.delete_one({"_id": ObjectId(comment_id)})
-            return result.deleted_count > 0
+            return await self.outbox.run_in_transaction(write)
         except:
             return False
     
@@ -67,10 +105,10 @@ class CommentModel:
     
     async def count_comments(self, query: dict = None) -> int:
         """Count comments matching query"""
-        if query is None:
-            query = {}
-        
         try:
+            # No filter - collection metadata count instead of scanning every document
+            if not query:
+                return await self.collection.estimated_document_count()
             return await self.collection.count_documents(query)
         except Exception as e:
             print(f"Error counting comments: {e}")
@@ -0,0 +1,23 @@
+# models/counter_model.py
+## Named counters in the "counters" collection ({_id: name, seq}) - the outbox sequence lives there too
+from pymongo import ReturnDocument
+
+class CounterModel:
+    def __init__(self):
+        from ..configs.database import get_counter_collection
+        self.collection = get_counter_collection()
+    
+    async def get(self, name: str) -> int:
+        """Current value (0 before the first increment)"""
+        counter = await self.collection.find_one({"_id": name}, {"seq": 1})
+        return counter["seq"] if counter else 0
+    
+    async def increment(self, name: str, amount: int = 1) -> int:
+        """Add amount and return the new value"""
+        counter = await self.collection.find_one_and_update(
+            {"_id": name},
+            {"$inc": {"seq": amount}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return counter["seq"]
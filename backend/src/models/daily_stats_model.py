@@ -0,0 +1,103 @@
+# models/daily_stats_model.py
+## Daily rollups for the analytics endpoint - one document per day, _id = midnight of that day
+## - Every signup / post / comment / like $incs the day's counter (outbox "daily_stats" consumer)
+## - rebuild() recomputes days from the source collections (backfill after bulk imports)
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+METRICS = ("signups", "posts", "comments", "likes")
+# Recent job ids per day for idempotent increments (retries arrive within seconds or minutes)
+APPLIED_OPS_KEPT = 1000
+
+def day_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, value.day)
+
+class DailyStatsModel:
+    def __init__(self):
+        from ..configs.database import get_daily_stats_collection, get_user_collection, get_post_collection, get_comment_collection
+        self.collection = get_daily_stats_collection()
+        self.sources = {
+            "signups": get_user_collection(),
+            "posts": get_post_collection(),
+            "comments": get_comment_collection()
+        }
+    
+    async def increment(self, metric: str, amount: int = 1, at: Optional[datetime] = None, op_id: Optional[str] = None) -> bool:
+        """
+        Add amount to metric in the day bucket of `at` (now)
+        - op_id makes a retried increment a no-op: the day keeps its last APPLIED_OPS_KEPT op ids
+        """
+        day = day_start(at or datetime.now())
+        if op_id is None:
+            await self.collection.update_one({"_id": day}, {"$inc": {metric: amount}}, upsert=True)
+            return True
+        try:
+            await self.collection.update_one(
+                {"_id": day, "ops": {"$ne": op_id}},
+                {
+                    "$inc": {metric: amount},
+                    "$push": {"ops": {"$each": [op_id], "$slice": -APPLIED_OPS_KEPT}}
+                },
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            # The day exists and already holds op_id - the upsert tried to insert a second one
+            return False
+    
+    async def get_days(self, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """Day buckets in [start, end) - one _id range scan, at most one document per day"""
+        try:
+            cursor = self.collection.find({"_id": {"$gte": day_start(start), "$lt": end}}, {"ops": 0}).sort("_id", 1)
+            return await cursor.to_list(length=None)
+        except Exception as e:
+            print(f"Error getting daily stats: {e}")
+            return []
+    
+    async def _count_by_day(self, collection, since: datetime, value) -> Dict[datetime, int]:
+        pipeline = [
+            {"$match": {"createdAt": {"$gte": since}}},
+            {"$group": {
+                "_id": {"$dateFromParts": {
+                    "year": {"$year": "$createdAt"},
+                    "month": {"$month": "$createdAt"},
+                    "day": {"$dayOfMonth": "$createdAt"}
+                }},
+                "count": {"$sum": value}
+            }}
+        ]
+        cursor = collection.aggregate(pipeline)
+        return {group["_id"]: group["count"] async for group in cursor}
+    
+    async def rebuild(self, since: datetime) -> int:
+        """
+        Recompute every day from `since` out of users / posts / comments (createdAt index)
+        - Counts documents that still exist; deleted ones were counted on write and are lost here
+        - Likes carry no timestamp, so they are attributed to the comment's creation day
+        """
+        since = day_start(since)
+        counts = {
+            "signups": await self._count_by_day(self.sources["signups"], since, 1),
+            "posts": await self._count_by_day(self.sources["posts"], since, 1),
+            "comments": await self._count_by_day(self.sources["comments"], since, 1),
+            "likes": await self._count_by_day(self.sources["comments"], since, {"$ifNull": ["$numberOfLikes", 0]})
+        }
+        days = set()
+        for per_day in counts.values():
+            days.update(per_day)
+        
+        operations = [
+            UpdateOne(
+                {"_id": day},
+                {"$set": {metric: counts[metric].get(day, 0) for metric in METRICS}},
+                upsert=True
+            )
+            for day in sorted(days)
+        ]
+        # Days with no activity left at all
+        await self.collection.delete_many({"_id": {"$gte": since, "$nin": sorted(days)}})
+        if operations:
+            await self.collection.bulk_write(operations, ordered=False)
+        return len(operations)
@@ -0,0 +1,108 @@
+# models/deletion_job_model.py
+## Cascade deletion jobs - one document per deleted post / user
+## - phase + processed counts are checkpointed after every batch
+## - owner + lockedUntil is a lease: one worker runs a job, an expired lease can be taken over
+from datetime import datetime, timedelta
+from bson import ObjectId
+from typing import List, Dict, Any, Optional
+from pymongo import ReturnDocument
+
+UNFINISHED = ["pending", "running"]
+
+class DeletionJobModel:
+    def __init__(self):
+        from ..configs.database import get_deletion_job_collection
+        self.collection = get_deletion_job_collection()
+    
+    def new_job(self, kind: str, target_id: str, phase: str) -> Dict[str, Any]:
+        """A pending job document (with its _id) - insert it with insert_job"""
+        return {
+            "_id": ObjectId(),
+            "kind": kind,
+            "targetId": target_id,
+            "status": "pending",
+            "phase": phase,
+            "processed": {},
+            "attempts": 0,
+            "owner": None,
+            "lockedUntil": None,
+            "error": None,
+            "createdAt": datetime.now(),
+            "updatedAt": datetime.now(),
+            "finishedAt": None
+        }
+    
+    async def insert_job(self, job: Dict[str, Any], session=None) -> str:
+        """Insert a job from new_job (pass the session to commit it with the delete it cleans up after)"""
+        await self.collection.insert_one(job, session=session)
+        return str(job["_id"])
+    
+    async def create_job(self, kind: str, target_id: str, phase: str) -> str:
+        """Create a pending job and return its ID"""
+        return await self.insert_job(self.new_job(kind, target_id, phase))
+    
+    async def find_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Find job by ID"""
+        try:
+            return await self.collection.find_one({"_id": ObjectId(job_id)})
+        except:
+            return None
+    
+    async def find_unfinished_job_ids(self) -> List[str]:
+        """IDs of jobs that never completed (pending, or interrupted while running)"""
+        cursor = self.collection.find({"status": {"$in": UNFINISHED}}, {"_id": 1})
+        return [str(doc["_id"]) async for doc in cursor]
+    
+    async def claim_job(self, job_id: str, owner: str, lease_seconds: int) -> Optional[Dict[str, Any]]:
+        """Take the job's lease; None if it is finished or another worker holds it"""
+        now = datetime.now()
+        return await self.collection.find_one_and_update(
+            {
+                "_id": ObjectId(job_id),
+                "status": {"$in": UNFINISHED},
+                "$or": [{"lockedUntil": None}, {"lockedUntil": {"$lt": now}}, {"owner": owner}]
+            },
+            {
+                "$set": {
+                    "status": "running",
+                    "owner": owner,
+                    "lockedUntil": now + timedelta(seconds=lease_seconds),
+                    "updatedAt": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            return_document=ReturnDocument.AFTER
+        )
+    
+    async def checkpoint(self, job_id: str, owner: str, phase: str, counts: dict, lease_seconds: int) -> bool:
+        """Record progress and renew the lease; False if the lease was lost"""
+        now = datetime.now()
+        update = {"$set": {
+            "phase": phase,
+            "lockedUntil": now + timedelta(seconds=lease_seconds),
+            "updatedAt": now
+        }}
+        if counts:
+            update["$inc"] = {f"processed.{name}": count for name, count in counts.items()}
+        result = await self.collection.update_one({"_id": ObjectId(job_id), "owner": owner}, update)
+        return result.matched_count > 0
+    
+    async def release_job(self, job_id: str, owner: str, error: str):
+        """Give the lease back after a failed attempt"""
+        await self.collection.update_one(
+            {"_id": ObjectId(job_id), "owner": owner},
+            {"$set": {"lockedUntil": None, "error": error, "updatedAt": datetime.now()}}
+        )
+    
+    async def finish_job(self, job_id: str, status: str, error: Optional[str] = None):
+        """Mark job done / failed"""
+        await self.collection.update_one(
+            {"_id": ObjectId(job_id)},
+            {"$set": {
+                "status": status,
+                "error": error,
+                "lockedUntil": None,
+                "updatedAt": datetime.now(),
+                "finishedAt": datetime.now()
+            }}
+        )
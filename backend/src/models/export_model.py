@@ -0,0 +1,23 @@
+# models/export_model.py
+## Full-collection cursors for NDJSON exports (utils/export.py) - _id order, so an export resumes after its last _id
+from bson import ObjectId
+
+class ExportModel:
+    def __init__(self):
+        from ..configs.database import get_post_collection, get_comment_collection, get_user_collection
+        self.collections = {
+            "posts": get_post_collection(),
+            "comments": get_comment_collection(),
+            "users": get_user_collection(),
+        }
+    
+    def find_after(self, collection: str, after: ObjectId = None, projection: dict = None, batch_size: int = 1000, limit: int = 0):
+        """Cursor over documents with _id > after (all when None), in _id order (iterate with `async for`)"""
+        query = {"_id": {"$gt": after}} if after else {}
+        return (
+            self.collections[collection]
+            .find(query, projection)
+            .sort("_id", 1)
+            .batch_size(batch_size)
+            .limit(limit)
+        )
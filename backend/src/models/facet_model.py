@@ -0,0 +1,99 @@
+# models/facet_model.py
+## Post facets - number of posts per category and per tag, one counter document each
+## - Adjusted in the same transaction as the post create / update / delete (PostModel, cascade deletion)
+##   by the difference between the post's old and new category / tags
+## - Documents: {_id: "category:<value>" | "tag:<value>", kind, value, count}; counts that drop to 0
+##   stay (filtered on read) - the next post with that value reuses the document
+## - Without transactions a crash between the write and the counter update skews a count:
+##   `python -m src.scripts.rebuild_facets` recounts from the posts
+from collections import Counter
+from datetime import datetime
+from typing import List, Dict, Any
+from pymongo import UpdateOne, DeleteMany
+
+def post_facets(post: dict) -> Counter:
+    """(kind, value) pairs a post counts towards"""
+    facets = Counter()
+    if not post:
+        return facets
+    if post.get("category"):
+        facets[("category", post["category"])] += 1
+    for tag in set(post.get("tags") or []):
+        facets[("tag", tag)] += 1
+    return facets
+
+def facet_deltas(before: dict = None, after: dict = None) -> Dict[tuple, int]:
+    """Count changes for a post going from `before` to `after` (None = didn't exist / deleted)"""
+    deltas = Counter(post_facets(after))
+    deltas.subtract(post_facets(before))
+    return {facet: delta for facet, delta in deltas.items() if delta}
+
+class FacetModel:
+    def __init__(self):
+        from ..configs.database import get_post_facet_collection, get_post_collection
+        self.collection = get_post_facet_collection()
+        self.posts = get_post_collection()
+    
+    async def apply(self, deltas: Dict[tuple, int], session=None):
+        """$inc the affected counters in one bulk write (call inside the post write's transaction)"""
+        if not deltas:
+            return
+        now = datetime.now()
+        await self.collection.bulk_write([
+            UpdateOne(
+                {"_id": f"{kind}:{value}"},
+                {
+                    "$inc": {"count": delta},
+                    "$set": {"updatedAt": now},
+                    "$setOnInsert": {"kind": kind, "value": value}
+                },
+                upsert=True
+            )
+            for (kind, value), delta in deltas.items()
+        ], ordered=False, session=session)
+    
+    async def get_facets(self, kind: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Values of one kind with at least one post, largest counts first"""
+        try:
+            cursor = self.collection.find(
+                {"kind": kind, "count": {"$gt": 0}},
+                {"_id": 0, "value": 1, "count": 1}
+            ).sort("count", -1).limit(limit)
+            return await cursor.to_list(length=limit)
+        except Exception as e:
+            print(f"Error getting {kind} facets: {e}")
+            return []
+    
+    async def rebuild(self) -> int:
+        """Recount every facet from the posts (two aggregations) and replace the counters"""
+        counts = {}
+        pipelines = {
+            "category": [
+                {"$match": {"category": {"$type": "string"}}},
+                {"$group": {"_id": "$category", "count": {"$sum": 1}}}
+            ],
+            "tag": [
+                {"$project": {"tags": 1}},
+                {"$unwind": "$tags"},
+                # A tag listed twice on one post counts once
+                {"$group": {"_id": {"post": "$_id", "tag": "$tags"}}},
+                {"$group": {"_id": "$_id.tag", "count": {"$sum": 1}}}
+            ]
+        }
+        for kind, pipeline in pipelines.items():
+            async for facet in self.posts.aggregate(pipeline, allowDiskUse=True):
+                counts[(kind, facet["_id"])] = facet["count"]
+        
+        now = datetime.now()
+        operations = [
+            UpdateOne(
+                {"_id": f"{kind}:{value}"},
+                {"$set": {"kind": kind, "value": value, "count": count, "updatedAt": now}},
+                upsert=True
+            )
+            for (kind, value), count in counts.items()
+        ]
+        # Counters not touched above have no posts left
+        operations.append(DeleteMany({"updatedAt": {"$lt": now}}))
+        await self.collection.bulk_write(operations, ordered=True)
+        return len(counts)
@@ -0,0 +1,144 @@
+# models/outbox_model.py
+## Transactional outbox - one event per post/comment/user write
+## - Events carry a gap-free sequence number from the "outbox" counter, allocated in the same
+##   transaction as the write; concurrent writers conflict on the counter document, so sequence
+##   order is commit order
+## - That one counter document serializes every post / comment / user write transaction: concurrent
+##   ones hit write conflicts and with_transaction retries them. Fine at blog write rates (a few
+##   hundred writes/s); beyond that the sequence would have to be allocated outside the transaction
+##   (consumers already skip gaps after OUTBOX_GAP_SECONDS) at the cost of commit-order delivery
+## - Without a replica set (standalone mongod) there are no transactions: the event is written
+##   right after the change, and a crash in between loses that one event. compose.yml runs a
+##   single-node replica set for this reason (MONGO_REPLICA_SET)
+## - outbox_consumers holds each consumer's delivered sequence and a lease (one dispatcher per consumer)
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional
+from pymongo import ReturnDocument
+from ..configs.config import OUTBOX_ENABLED
+
+OUTBOX_COUNTER_ID = "outbox"
+# Never copied into event data
+REDACTED_FIELDS = {"_id", "password"}
+# Topologies that support multi-document transactions
+TRANSACTION_TOPOLOGIES = {"ReplicaSetWithPrimary", "Sharded", "LoadBalanced"}
+# A directConnection=true client sees a "Single" topology - transactions work if that server is one of these
+TRANSACTION_SERVER_TYPES = {"RSPrimary", "Mongos"}
+
+def event_data(document: dict) -> dict:
+    return {key: value for key, value in document.items() if key not in REDACTED_FIELDS}
+
+class OutboxModel:
+    def __init__(self):
+        from ..configs.database import (
+            client,
+            get_outbox_collection,
+            get_outbox_consumer_collection,
+            get_counter_collection
+        )
+        self.client = client
+        self.collection = get_outbox_collection()
+        self.consumers = get_outbox_consumer_collection()
+        self.counters = get_counter_collection()
+    
+    def supports_transactions(self) -> bool:
+        """From the driver's topology view - no round trip"""
+        topology = self.client.topology_description
+        if topology.topology_type_name == "Single":
+            return any(
+                server.server_type_name in TRANSACTION_SERVER_TYPES
+                for server in topology.server_descriptions().values()
+            )
+        return topology.topology_type_name in TRANSACTION_TOPOLOGIES
+    
+    async def run_in_transaction(self, write):
+        """`await write(session)` in a transaction (retried on transient errors), or with session=None on a standalone server"""
+        if not (OUTBOX_ENABLED and self.supports_transactions()):
+            return await write(None)
+        async with await self.client.start_session() as session:
+            return await session.with_transaction(write)
+    
+    async def record(self, event_type: str, entity_id: str, data: dict = None, session=None):
+        """Append one event (call inside run_in_transaction, after the write succeeded)"""
+        await self.record_many([(event_type, entity_id, data)], session)
+    
+    async def record_many(self, events: list, session=None):
+        """Append [(type, entity_id, data), ...] with consecutive sequence numbers"""
+        if not OUTBOX_ENABLED or not events:
+            return
+        counter = await self.counters.find_one_and_update(
+            {"_id": OUTBOX_COUNTER_ID},
+            {"$inc": {"seq": len(events)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+            session=session
+        )
+        first_seq = counter["seq"] - len(events) + 1
+        now = datetime.now()
+        await self.collection.insert_many([
+            {
+                "seq": first_seq + i,
+                "type": event_type,
+                "entityId": entity_id,
+                "data": event_data(data or {}),
+                "createdAt": now
+            }
+            for i, (event_type, entity_id, data) in enumerate(events)
+        ], session=session)
+    
+    async def get_events_after(self, seq: int, limit: int) -> List[Dict[str, Any]]:
+        """Next events in sequence order"""
+        cursor = self.collection.find({"seq": {"$gt": seq}}).sort("seq", 1).limit(limit)
+        return await cursor.to_list(length=limit)
+    
+    async def get_head_seq(self) -> int:
+        """Last allocated sequence number"""
+        counter = await self.counters.find_one({"_id": OUTBOX_COUNTER_ID})
+        return counter["seq"] if counter else 0
+    
+    async def get_first_seq(self) -> Optional[int]:
+        """Oldest retained sequence number (None when the outbox is empty)"""
+        event = await self.collection.find_one({}, {"seq": 1}, sort=[("seq", 1)])
+        return event["seq"] if event else None
+    
+    async def get_seq_before(self, at: datetime) -> int:
+        """Sequence number just before the first event at or after `at` (replay starting point)"""
+        event = await self.collection.find_one({"createdAt": {"$gte": at}}, {"seq": 1}, sort=[("seq", 1)])
+        return event["seq"] - 1 if event else await self.get_head_seq()
+    
+    async def ensure_consumer(self, name: str):
+        """Register a consumer - a new one starts at the oldest retained event"""
+        await self.consumers.update_one(
+            {"_id": name},
+            {"$setOnInsert": {"seq": 0, "owner": None, "lockedUntil": None, "deliveredAt": None}},
+            upsert=True
+        )
+    
+    async def claim_consumer(self, name: str, owner: str, lease_seconds: int) -> Optional[Dict[str, Any]]:
+        """Take or renew the consumer's lease; None if another dispatcher holds it"""
+        now = datetime.now()
+        return await self.consumers.find_one_and_update(
+            {"_id": name, "$or": [{"lockedUntil": None}, {"lockedUntil": {"$lt": now}}, {"owner": owner}]},
+            {"$set": {"owner": owner, "lockedUntil": now + timedelta(seconds=lease_seconds)}},
+            return_document=ReturnDocument.AFTER
+        )
+    
+    async def advance_consumer(self, name: str, owner: str, from_seq: int, to_seq: int, lease_seconds: int) -> bool:
+        """Move the delivered sequence forward; False if the lease was lost or the consumer was reset meanwhile"""
+        now = datetime.now()
+        result = await self.consumers.update_one(
+            {"_id": name, "owner": owner, "seq": from_seq},
+            {"$set": {"seq": to_seq, "deliveredAt": now, "lockedUntil": now + timedelta(seconds=lease_seconds)}}
+        )
+        return result.matched_count > 0
+    
+    async def reset_consumer(self, name: str, seq: int) -> bool:
+        """Replay: deliver everything after seq again (the running dispatcher picks it up)"""
+        result = await self.consumers.update_one({"_id": name}, {"$set": {"seq": seq}}, upsert=True)
+        return result.acknowledged
+    
+    async def get_consumers(self) -> List[Dict[str, Any]]:
+        return await self.consumers.find().sort("_id", 1).to_list(length=None)
+    
+    async def get_oldest_event_after(self, seq: int) -> Optional[Dict[str, Any]]:
+        """First undelivered event for a consumer at seq (its createdAt is the lag)"""
+        return await self.collection.find_one({"seq": {"$gt": seq}}, {"seq": 1, "createdAt": 1}, sort=[("seq", 1)])
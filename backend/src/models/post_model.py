@@ -2,18 +2,33 @@
 from datetime import datetime
 from bson import ObjectId
 from typing import Optional, List, Dict, Any
+from pymongo import UpdateOne, ReturnDocument
+from .facet_model import facet_deltas
 
 class PostModel:
     def __init__(self):
         from ..configs.database import get_post_collection
+        from .outbox_model import OutboxModel
+        from .facet_model import FacetModel
+        from .deletion_job_model import DeletionJobModel
         self.collection = get_post_collection()
+        self.outbox = OutboxModel()
+        self.facets = FacetModel()
+        self.deletion_jobs = DeletionJobModel()
     
     async def create_post(self, post_data: dict) -> str:
-        """Create a new post and return post ID"""
+        """Create a new post and return post ID (records post.created, counts its category / tags)"""
         post_data["createdAt"] = datetime.now()
         post_data["updatedAt"] = datetime.now()
-        result = await self.collection.insert_one(post_data)
-        return str(result.inserted_id)
+        
+        async def write(session):
+            result = await self.collection.insert_one(post_data, session=session)
+            post_id = str(result.inserted_id)
+            await self.facets.apply(facet_deltas(None, post_data), session)
+            await self.outbox.record("post.created", post_id, post_data, session)
+            return post_id
+        
+        return await self.outbox.run_in_transaction(write)
     
     async def find_post_by_slug(self, slug: str) -> Optional[Dict[str, Any]]:
         """Find post by slug"""
@@ -30,23 +45,67 @@ class PostModel:
         """Find post by title"""
         return await self.collection.find_one({"title": title})
     
-    async def update_post(self, post_id: str, update_data: dict) -> bool:
-        """Update post and return success status"""
+    async def find_post_id_by_slug(self, slug: str) -> Optional[str]:
+        """Resolve a current or previous slug to a post ID (current slugs win)"""
+        posts = await self.collection.find(
+            {"$or": [{"slug": slug}, {"previousSlugs": slug}]},
+            {"_id": 1, "slug": 1}
+        ).to_list(length=None)
+        if not posts:
+            return None
+        posts.sort(key=lambda post: post.get("slug") != slug)
+        return str(posts[0]["_id"])
+    
+    async def update_post(self, post_id: str, update_data: dict, previous_slug: str = None) -> bool:
+        """Update post and return success status (previous_slug is kept for redirects; records post.updated, moves facet counts)"""
         update_data["updatedAt"] = datetime.now()
-        try:
-            result = await self.collection.update_one(
+        update = {"$set": update_data}
+        if previous_slug:
+            update["$addToSet"] = {"previousSlugs": previous_slug}
+        
+        async def write(session):
+            # The old category / tags come back with the write - no extra read for the facet counts
+            before = await self.collection.find_one_and_update(
                 {"_id": ObjectId(post_id)},
-                {"$set": update_data}
+                update,
+                projection={"category": 1, "tags": 1},
+                return_document=ReturnDocument.BEFORE,
+                session=session
             )
-            return result.modified_count > 0
+            if before is None:
+                return False
+            if "category" in update_data or "tags" in update_data:
+                await self.facets.apply(facet_deltas(before, {**before, **update_data}), session)
+            data = {**update_data, "previousSlug": previous_slug} if previous_slug else update_data
+            await self.outbox.record("post.updated", post_id, data, session)
+            return True
+        
+        try:
+            return await self.outbox.run_in_transaction(write)
         except:
             return False
     
-    async def delete_post(self, post_id: str) -> bool:
-        """Delete post and return success status"""
+    async def delete_post(self, post_id: str, cleanup_job: dict = None) -> bool:
+        """
+        Delete post and return success status (records post.deleted with its author and slugs, uncounts its facets)
+        - cleanup_job (DeletionJobModel.new_job) is inserted in the same transaction
+        """
+        async def write(session):
+            post = await self.collection.find_one_and_delete(
+                {"_id": ObjectId(post_id)},
+                projection={"userId": 1, "slug": 1, "previousSlugs": 1, "category": 1, "tags": 1},
+                session=session
+            )
+            if post is None:
+                return False
+            await self.facets.apply(facet_deltas(post, None), session)
+            await self.outbox.record("post.deleted", post_id, post, session)
+            if cleanup_job:
+                await self.deletion_jobs.insert_job(cleanup_job, session)
+            return True
+        
         try:
-            result = await self.collection.delete_one({"_id": ObjectId(post_id)})
-            return result.deleted_count > 0
+            return await self.outbox.run_in_transaction(write)
         except:
             return False
     
@@ -70,10 +129,10 @@ class PostModel:
     
     async def count_posts(self, query: dict = None) -> int:
         """Count posts matching query"""
-        if query is None:
-            query = {}
-        
         try:
+            # No filter - collection metadata count instead of scanning every document
+            if not query:
+                return await self.collection.estimated_document_count()
             return await self.collection.count_documents(query)
         except Exception as e:
             print(f"Error counting posts: {e}")
@@ -95,4 +154,83 @@ class PostModel:
                 {"content": {"$regex": search_term, "$options": "i"}}
             ]
         }
-        return await self.get_posts(query, skip=skip, limit=limit)
\ No newline at end of file
+        return await self.get_posts(query, skip=skip, limit=limit)
+    
+    async def find_posts_by_ids(self, post_ids: List[str], projection: dict = None) -> List[Dict[str, Any]]:
+        """Find many posts in one query (unordered; invalid IDs are skipped)"""
+        object_ids = [ObjectId(post_id) for post_id in set(post_ids) if ObjectId.is_valid(post_id)]
+        if not object_ids:
+            return []
+        cursor = self.collection.find({"_id": {"$in": object_ids}}, projection)
+        return await cursor.to_list(length=len(object_ids))
+    
+    async def set_view_counts(self, counts: Dict[str, int]) -> int:
+        """
+        Store unique-view counts (flushed from Redis in batches) - one bulk_write
+        - Derived counters, not content: no outbox event and updatedAt is left alone
+        """
+        if not counts:
+            return 0
+        result = await self.collection.bulk_write([
+            UpdateOne({"_id": ObjectId(post_id)}, {"$set": {"views": count}})
+            for post_id, count in counts.items()
+        ], ordered=False)
+        return result.modified_count
+    
+    def find_feed_posts(self, limit: int):
+        """Cursor over the newest posts with what a feed entry shows"""
+        return self.collection.find(
+            {},
+            {"title": 1, "slug": 1, "content": 1, "category": 1, "tags": 1, "createdAt": 1, "updatedAt": 1}
+        ).sort("createdAt", -1).limit(limit)
+    
+    def find_sitemap_posts(self, batch_size: int = 1000):
+        """Cursor over every post's slug / updatedAt in _id order"""
+        return self.collection.find({}, {"slug": 1, "updatedAt": 1}).sort("_id", 1).batch_size(batch_size)
+    
+    def find_all_post_texts(self, batch_size: int = 1000):
+        """Cursor over every post's title / content / category (iterate with `async for`)"""
+        return self.collection.find({}, {"title": 1, "content": 1, "category": 1}).batch_size(batch_size)
+    
+    async def set_related_posts(self, related: Dict[str, list], computed_at: datetime) -> int:
+        """Store [(post_id, score), ...] neighbour lists - derived data, no outbox event"""
+        if not related:
+            return 0
+        result = await self.collection.bulk_write([
+            UpdateOne({"_id": ObjectId(post_id)}, {"$set": {
+                "relatedPosts": [
+                    {"postId": ObjectId(related_id), "score": round(score, 4)}
+                    for related_id, score in neighbours
+                ],
+                "relatedUpdatedAt": computed_at
+            }})
+            for post_id, neighbours in related.items()
+        ], ordered=False)
+        return result.modified_count
+    
+    async def get_related_posts(self, post_id: str) -> List[Dict[str, Any]]:
+        """A post's stored neighbours as cards (no content), best first - one aggregate"""
+        try:
+            results = await self.collection.aggregate([
+                {"$match": {"_id": ObjectId(post_id)}},
+                {"$project": {"relatedPosts": 1}},
+                {"$lookup": {
+                    "from": self.collection.name,
+                    "localField": "relatedPosts.postId",
+                    "foreignField": "_id",
+                    "pipeline": [{"$project": {"title": 1, "slug": 1, "image": 1, "category": 1, "userId": 1}}],
+                    "as": "posts"
+                }}
+            ]).to_list(length=1)
+        except Exception as e:
+            print(f"Error getting related posts: {e}")
+            return []
+        if not results:
+            return []
+        posts = {post["_id"]: post for post in results[0]["posts"]}
+        # $lookup doesn't keep the stored order; deleted neighbours are skipped
+        return [
+            {**posts[entry["postId"]], "score": entry["score"]}
+            for entry in results[0].get("relatedPosts", [])
+            if entry["postId"] in posts
+        ]
\ No newline at end of file
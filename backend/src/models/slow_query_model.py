@@ -0,0 +1,52 @@
+# models/slow_query_model.py
+from typing import List, Dict, Any, Optional
+
+class SlowQueryModel:
+    def __init__(self):
+        from ..configs.database import get_slow_query_collection
+        self.collection = get_slow_query_collection()
+    
+    async def get_slow_queries(self, limit: int = 50, collection_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Most recent slow operations (capped collection - natural order is insertion order)"""
+        query = {}
+        if collection_name:
+            query["collection"] = collection_name
+        
+        try:
+            cursor = self.collection.find(query).sort("$natural", -1).limit(limit)
+            return await cursor.to_list(length=limit)
+        except Exception as e:
+            print(f"Error getting slow queries: {e}")
+            return []
+    
+    async def get_slow_query_summary(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Slow operations grouped by query shape, slowest first"""
+        pipeline = [
+            # Newest first (ObjectId order - $natural isn't allowed in $sort) so $first is the latest sample
+            {"$sort": {"_id": -1}},
+            {"$group": {
+                "_id": "$shape",
+                "command": {"$first": "$command"},
+                "collection": {"$first": "$collection"},
+                "count": {"$sum": 1},
+                "avgDurationMs": {"$avg": "$durationMs"},
+                "maxDurationMs": {"$max": "$durationMs"},
+                "lastSeen": {"$max": "$createdAt"},
+                # Latest explain summary recorded for this shape - most samples have none (explain
+                # runs once per shape per SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS), so skip those
+                "explain": {"$max": {"$cond": [
+                    {"$gt": ["$explain", None]},
+                    {"at": "$_id", "summary": "$explain"},
+                    None
+                ]}}
+            }},
+            {"$set": {"explain": {"$ifNull": ["$explain.summary", None]}}},
+            {"$sort": {"maxDurationMs": -1}},
+            {"$limit": limit}
+        ]
+        try:
+            cursor = self.collection.aggregate(pipeline)
+            return await cursor.to_list(length=limit)
+        except Exception as e:
+            print(f"Error summarizing slow queries: {e}")
+            return []
@@ -6,14 +6,24 @@ from typing import Optional, List, Dict, Any
 class UserModel:
     def __init__(self):
         from ..configs.database import get_user_collection
+        from .outbox_model import OutboxModel
+        from .deletion_job_model import DeletionJobModel
         self.collection = get_user_collection()
+        self.outbox = OutboxModel()
+        self.deletion_jobs = DeletionJobModel()
     
     async def create_user(self, user_data: dict) -> str:
-        """Create a new user and return user ID"""
+        """Create a new user and return user ID (records user.created, password excluded)"""
         user_data["createdAt"] = datetime.now()
         user_data["updatedAt"] = datetime.now()
-        result = await self.collection.insert_one(user_data)
-        return str(result.inserted_id)
+        
+        async def write(session):
+            result = await self.collection.insert_one(user_data, session=session)
+            user_id = str(result.inserted_id)
+            await self.outbox.record("user.created", user_id, user_data, session)
+            return user_id
+        
+        return await self.outbox.run_in_transaction(write)
     
     async def find_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
         """Find user by email"""
@@ -30,23 +40,55 @@ class UserModel:
         except:
             return None
     
+    async def find_users_by_ids(self, user_ids: List[str]) -> List[Dict[str, Any]]:
+        """Find many users in one query (password excluded)"""
+        object_ids = []
+        for user_id in set(user_ids):
+            try:
+                object_ids.append(ObjectId(user_id))
+            except:
+                continue
+        if not object_ids:
+            return []
+        cursor = self.collection.find({"_id": {"$in": object_ids}}, {"password": 0})
+        return await cursor.to_list(length=len(object_ids))
+    
     async def update_user(self, user_id: str, update_data: dict) -> bool:
-        """Update user and return success status"""
+        """Update user and return success status (records user.updated, password excluded)"""
         update_data["updatedAt"] = datetime.now()
-        try:
+        
+        async def write(session):
             result = await self.collection.update_one(
                 {"_id": ObjectId(user_id)},
-                {"$set": update_data}
+                {"$set": update_data},
+                session=session
             )
-            return result.modified_count > 0
+            if result.modified_count == 0:
+                return False
+            await self.outbox.record("user.updated", user_id, update_data, session)
+            return True
+        
+        try:
+            return await self.outbox.run_in_transaction(write)
         except:
             return False
     
-    async def delete_user(self, user_id: str) -> bool:
-        """Delete user and return success status"""
+    async def delete_user(self, user_id: str, cleanup_job: dict = None) -> bool:
+        """
+        Delete user and return success status (records user.deleted)
+        - cleanup_job (DeletionJobModel.new_job) is inserted in the same transaction
+        """
+        async def write(session):
+            result = await self.collection.delete_one({"_id": ObjectId(user_id)}, session=session)
+            if result.deleted_count == 0:
+                return False
+            await self.outbox.record("user.deleted", user_id, None, session)
+            if cleanup_job:
+                await self.deletion_jobs.insert_job(cleanup_job, session)
+            return True
+        
         try:
-            result = await self.collection.delete_one({"_id": ObjectId(user_id)})
-            return result.deleted_count > 0
+            return await self.outbox.run_in_transaction(write)
         except:
             return False
     
@@ -66,10 +108,10 @@ class UserModel:
     
     async def count_users(self, query: dict = None) -> int:
         """Count users matching query"""
-        if query is None:
-            query = {}
-        
         try:
+            # No filter - collection metadata count instead of scanning every document
+            if not query:
+                return await self.collection.estimated_document_count()
             return await self.collection.count_documents(query)
         except Exception as e:
             print(f"Error counting users: {e}")
@@ -0,0 +1,70 @@
+# routes/admin_route.py
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from datetime import date, timedelta
+from ..controllers.admin_controller import admin_controller
+from ..schemas.admin_schema import DashboardResponse, AnalyticsResponse
+from ..utils.auth_dependency import get_current_user
+
+router = APIRouter()
+
+@router.get("/dashboard", response_model=DashboardResponse)
+async def get_dashboard(
+    current_user: dict = Depends(get_current_user)  # ✅ GET - no CSRF needed
+):
+    """Dashboard totals, last-month counts and five most recent users/posts/comments (admin only)"""
+    return await admin_controller.get_dashboard(current_user)
+
+@router.get("/analytics", response_model=AnalyticsResponse)
+async def get_analytics(
+    current_user: dict = Depends(get_current_user),
+    start: date = Query(None, description="first day (default: 30 days before end)"),
+    end: date = Query(None, description="last day, inclusive (default: today)"),
+    interval: str = Query("day", regex="^(day|week|month)$")
+):
+    """Signups, posts, comments and likes per day / week / month (admin only)"""
+    end = end or date.today()
+    start = start or end - timedelta(days=29)
+    return await admin_controller.get_analytics(current_user, start, end, interval)
+
+@router.get("/deletion-jobs/{job_id}")
+async def get_deletion_job(
+    job_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """Phase and processed counts of a cascade deletion job (admin only)"""
+    return await admin_controller.get_deletion_job(current_user, job_id)
+
+@router.get("/slow-queries")
+async def get_slow_queries(
+    current_user: dict = Depends(get_current_user),  # ✅ GET - no CSRF needed
+    limit: int = Query(50, ge=1, le=500),
+    collection: str = Query(None)
+):
+    """Recent slow MongoDB operations with explain summary (admin only)"""
+    return await admin_controller.get_slow_queries(current_user, limit, collection)
+
+@router.get("/slow-queries/summary")
+async def get_slow_query_summary(
+    current_user: dict = Depends(get_current_user),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """Slow MongoDB operations grouped by query shape (admin only)"""
+    return await admin_controller.get_slow_query_summary(current_user, limit)
+
+@router.get("/export/{collection}")
+async def export_collection(
+    collection: str,
+    current_user: dict = Depends(get_current_user),  # ✅ GET - no CSRF needed
+    after: str = Query(None, description="resume after this _id (the last line received)"),
+    fields: str = Query(None, description="comma-separated fields to include (default: all but secrets)"),
+    limit: int = Query(0, ge=0, description="stop after this many documents (0: no limit)"),
+    gzip: bool = Query(False)
+):
+    """posts / comments / users as NDJSON, streamed in _id order (admin only; passwords never included)"""
+    body, media_type, file_name = admin_controller.export(current_user, collection, after, fields, limit, gzip)
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{file_name}"'}
+    )
\ No newline at end of file
@@ -3,6 +3,12 @@
 
 from fastapi import APIRouter
 from ..configs.redis_client import redis_client
+from ..utils.security import is_token_blacklisted, local_blacklist
+from ..utils.csrf_security import csrf_protection
+from ..utils.entity_cache import post_cache, user_cache
+from ..utils.job_queue import job_queue
+from ..utils.live_events import live_events
+from ..utils.outbox import outbox_dispatcher
 
 router = APIRouter()
 
@@ -11,11 +17,10 @@ async def get_redis_keys():
     """Debug endpoint to check Redis keys"""
     try:
         keys = await redis_client.keys("*")
-        key_values = {}
         
-        for key in keys:
-            value = await redis_client.get_key(key)
-            key_values[key] = value
+        # ✅ One MGET instead of a GET per key
+        values = await redis_client.mget(keys)
+        key_values = dict(zip(keys, values))
         
         return {
             "keys_count": len(keys),
@@ -56,3 +61,35 @@ async def get_redis_stats():
     except Exception as e:
         return {"error": str(e)}
 
+@router.get("/redis-health")
+async def get_redis_health():
+    """Redis circuit breaker state, latency and degraded-mode cache sizes"""
+    return {
+        **redis_client.get_health(),
+        "degraded_mode": not redis_client.is_available,
+        "local_blacklist_entries": len(local_blacklist),
+        "local_csrf_entries": len(csrf_protection.local_tokens)
+    }
+
+@router.get("/entity-cache")
+async def get_entity_cache_stats():
+    """Post / user-profile cache sizes (hit and miss counters are on /metrics)"""
+    return {
+        "post": post_cache.get_stats(),
+        "user": user_cache.get_stats()
+    }
+
+@router.get("/jobs")
+async def get_job_queue_stats():
+    """Job stream length, pending (unacknowledged) jobs and dead letters"""
+    return await job_queue.get_stats()
+
+@router.get("/live-events")
+async def get_live_event_stats():
+    """SSE subscribers in this worker process"""
+    return live_events.get_stats()
+
+@router.get("/outbox")
+async def get_outbox_stats():
+    """Outbox head sequence and each consumer's position and lag"""
+    return await outbox_dispatcher.report_lag()
\ No newline at end of file
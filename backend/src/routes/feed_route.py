@@ -0,0 +1,39 @@
+# routes/feed_route.py
+## RSS / Atom feeds and sitemaps at the site root (the frontend proxies these paths)
+from fastapi import APIRouter, Request
+from fastapi.responses import FileResponse, Response
+from ..controllers.post_controller import post_controller
+from ..configs.config import FEED_MAX_AGE_SECONDS
+
+router = APIRouter()
+
+async def serve_feed_file(request: Request, name: str, media_type: str):
+    """The generation is the ETag - a reader that already has it gets a 304"""
+    path, generation = await post_controller.get_feed_file(name)
+    headers = {
+        "ETag": f'"{generation}"',
+        "Cache-Control": f"public, max-age={FEED_MAX_AGE_SECONDS}"
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+@router.get("/feed.xml", include_in_schema=False)
+async def get_rss_feed(request: Request):
+    """RSS 2.0 - newest posts"""
+    return await serve_feed_file(request, "feed.xml", "application/rss+xml; charset=utf-8")
+
+@router.get("/atom.xml", include_in_schema=False)
+async def get_atom_feed(request: Request):
+    """Atom - newest posts"""
+    return await serve_feed_file(request, "atom.xml", "application/atom+xml; charset=utf-8")
+
+@router.get("/sitemap.xml", include_in_schema=False)
+async def get_sitemap(request: Request):
+    """Every post URL, or the sitemap index once there are more than SITEMAP_MAX_URLS"""
+    return await serve_feed_file(request, "sitemap.xml", "application/xml; charset=utf-8")
+
+@router.get("/sitemap-{number:int}.xml", include_in_schema=False)
+async def get_sitemap_part(number: int, request: Request):
+    """One file listed in the sitemap index"""
+    return await serve_feed_file(request, f"sitemap-{number}.xml", "application/xml; charset=utf-8")
@@ -1,10 +1,13 @@
 # routes/post_route.py (CSRF Compatible Version)
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, Request, Response, Header
+from typing import List
+from fastapi.responses import RedirectResponse, StreamingResponse
 from bson import ObjectId
 from ..controllers.post_controller import post_controller
-from ..schemas.post_schema import PostCreate, PostUpdate, PostResponse, PostsResponse
+from ..schemas.post_schema import PostCreate, PostUpdate, PostResponse, PostsResponse, PostPageResponse, TrendingResponse, FacetsResponse
 from ..utils.auth_dependency import get_current_user
 from ..utils.csrf_dependency import verify_csrf_token  # ✅ CSRF import
+from ..utils.trending import viewer_key
 
 router = APIRouter()
 
@@ -23,6 +26,8 @@ async def get_posts(
     slug: str = Query(None),
     postId: str = Query(None),
     searchTerm: str = Query(None),
+    tags: List[str] = Query(None),
+    tagMatch: str = Query("all", regex="^(all|any)$"),
     startIndex: int = Query(0, ge=0),
     limit: int = Query(9, ge=1, le=100),
     order: str = Query("desc", regex="^(asc|desc)$"),
@@ -35,26 +40,60 @@ async def get_posts(
         slug=slug,
         postId=postId,
         searchTerm=searchTerm,
+        tags=tags,
+        tagMatch=tagMatch,
         startIndex=startIndex,
         limit=limit,
         order=order,
         current_user=current_user  # ✅ Pass current_user to controller
     )
 
+@router.get("/slug/{slug}", response_model=PostResponse)
+async def get_post_by_slug(
+    slug: str,
+    request: Request,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get single post by slug (old slugs redirect to the current one)"""
+    post = await post_controller.get_post_by_slug(slug)
+    if post.slug != slug:
+        return RedirectResponse(request.url_for("get_post_by_slug", slug=post.slug), status_code=301)
+    return post
+
+@router.get("/page/{slug}", response_model=PostPageResponse)
+async def get_post_page(
+    slug: str,
+    request: Request,
+    commentLimit: int = Query(10, ge=1, le=50),
+    current_user: dict = Depends(get_current_user)
+):
+    """Post page in one call: post, author, first page of comments with authors, counts"""
+    page = await post_controller.get_post_page(slug, comment_limit=commentLimit)
+    if page.post.slug != slug:
+        return RedirectResponse(request.url_for("get_post_page", slug=page.post.slug), status_code=301)
+    return page
+
+# Before /{post_id} - "trending" / "facets" are not post IDs
+@router.get("/trending", response_model=TrendingResponse)
+async def get_trending_posts(
+    sort: str = Query("trending", regex="^(trending|popular)$"),
+    limit: int = Query(10, ge=1, le=50)
+):
+    """Most read posts: decayed unique views (trending) or all-time unique views (popular)"""
+    return await post_controller.get_trending(sort, limit)
+
+@router.get("/facets", response_model=FacetsResponse)
+async def get_post_facets(limit: int = Query(50, ge=1, le=200)):
+    """Categories and tags with their post counts, largest first"""
+    return await post_controller.get_facets(limit)
+
 @router.get("/{post_id}", response_model=PostResponse)
 async def get_single_post(
     post_id: str,
     current_user: dict = Depends(get_current_user)  # ✅ Optional authentication
 ):
     """Get single post by ID"""
-    posts_response = await post_controller.get_posts(
-        postId=post_id, 
-        limit=1,
-        current_user=current_user
-    )
-    if not posts_response.posts:
-        raise HTTPException(status_code=404, detail="Post not found")
-    return posts_response.posts[0]
+    return await post_controller.get_post(post_id)
 
 @router.delete("/deletepost/{post_id}/{user_id}")
 async def delete_post(
@@ -83,6 +122,8 @@ async def get_public_posts(
     slug: str = Query(None),
     postId: str = Query(None),
     searchTerm: str = Query(None),
+    tags: List[str] = Query(None),
+    tagMatch: str = Query("all", regex="^(all|any)$"),
     startIndex: int = Query(0, ge=0),
     limit: int = Query(9, ge=1, le=100),
     order: str = Query("desc", regex="^(asc|desc)$")
@@ -94,20 +135,55 @@ async def get_public_posts(
         slug=slug,
         postId=postId,
         searchTerm=searchTerm,
+        tags=tags,
+        tagMatch=tagMatch,
         startIndex=startIndex,
         limit=limit,
         order=order,
         current_user=None  # ✅ No user authentication for public access
     )
 
-@router.get("/public/{post_id}", response_model=PostResponse)
-async def get_public_single_post(post_id: str):
-    """Get single post publicly by ID"""
-    posts_response = await post_controller.get_posts(
-        postId=post_id, 
-        limit=1,
-        current_user=None  # ✅ Public access
+@router.get("/public/slug/{slug}", response_model=PostResponse)
+async def get_public_post_by_slug(slug: str, request: Request, response: Response):
+    """Get single post publicly by slug (old slugs redirect to the current one)"""
+    post = await post_controller.get_post_by_slug(slug)
+    if post.slug != slug:
+        return RedirectResponse(request.url_for("get_public_post_by_slug", slug=post.slug), status_code=301)
+    await post_controller.record_view(post.id, viewer_key(request, response))
+    return post
+
+@router.get("/public/page/{slug}", response_model=PostPageResponse)
+async def get_public_post_page(
+    slug: str,
+    request: Request,
+    response: Response,
+    commentLimit: int = Query(10, ge=1, le=50)
+):
+    """Post page publicly in one call"""
+    page = await post_controller.get_post_page(slug, comment_limit=commentLimit)
+    if page.post.slug != slug:
+        return RedirectResponse(request.url_for("get_public_post_page", slug=page.post.slug), status_code=301)
+    await post_controller.record_view(page.post.id, viewer_key(request, response))
+    return page
+
+@router.get("/public/live/{post_id}")
+async def stream_post_events(
+    post_id: str,
+    request: Request,
+    last_event_id: str = Header(None, alias="Last-Event-ID"),
+    lastEventId: str = Query(None)
+):
+    """Server-sent events: new / liked / edited / deleted comments and post updates (diffs only)"""
+    events = await post_controller.stream_post_events(post_id, last_event_id or lastEventId, request.is_disconnected)
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
-    if not posts_response.posts:
-        raise HTTPException(status_code=404, detail="Post not found")
-    return posts_response.posts[0]
\ No newline at end of file
+
+@router.get("/public/{post_id}", response_model=PostResponse)
+async def get_public_single_post(post_id: str, request: Request, response: Response):
+    """Get single post publicly by ID (counts a view)"""
+    post = await post_controller.get_post(post_id)
+    await post_controller.record_view(post.id, viewer_key(request, response))
+    return post
\ No newline at end of file
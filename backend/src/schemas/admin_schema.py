@@ -0,0 +1,42 @@
+# schemas/admin_schema.py
+from pydantic import BaseModel
+from typing import List
+from datetime import datetime, date
+from .user_schema import UserResponse
+from .post_schema import PostResponse
+from .comment_schema import CommentResponse
+
+class DashboardUsers(BaseModel):
+    total: int
+    lastMonth: int
+    recent: List[UserResponse]
+
+class DashboardPosts(BaseModel):
+    total: int
+    lastMonth: int
+    recent: List[PostResponse]
+
+class DashboardComments(BaseModel):
+    total: int
+    lastMonth: int
+    recent: List[CommentResponse]
+
+class DashboardResponse(BaseModel):
+    users: DashboardUsers
+    posts: DashboardPosts
+    comments: DashboardComments
+    generatedAt: datetime
+
+class AnalyticsBucket(BaseModel):
+    start: date
+    signups: int = 0
+    posts: int = 0
+    comments: int = 0
+    likes: int = 0
+
+class AnalyticsResponse(BaseModel):
+    interval: str
+    start: date
+    end: date
+    buckets: List[AnalyticsBucket]
+    totals: AnalyticsBucket
@@ -2,18 +2,51 @@
 from pydantic import BaseModel, validator
 from typing import Optional
 from datetime import datetime
+import re
+from .comment_schema import CommentResponse
+from .user_schema import AuthorResponse
+
+MAX_POST_TAGS = 10
+MAX_TAG_LENGTH = 40
+
+def normalize_tags(tags) -> list:
+    """Lowercase, dash-separated, deduplicated tags in the order given ("Machine Learning" -> "machine-learning")"""
+    normalized = []
+    for tag in tags or []:
+        tag = re.sub(r'[^a-z0-9-]', '', re.sub(r'\s+', '-', tag.strip().lower())).strip('-')[:MAX_TAG_LENGTH]
+        if tag and tag not in normalized:
+            normalized.append(tag)
+    return normalized
 
 class PostCreate(BaseModel):
     title: str
     content: str
     image: Optional[str] = None
     category: Optional[str] = "uncategorized"
+    tags: list[str] = []
+    
+    @validator('tags')
+    def validate_tags(cls, v):
+        v = normalize_tags(v)
+        if len(v) > MAX_POST_TAGS:
+            raise ValueError(f'A post can have at most {MAX_POST_TAGS} tags')
+        return v
 
 class PostUpdate(BaseModel):
     title: Optional[str] = None
     content: Optional[str] = None
     image: Optional[str] = None
     category: Optional[str] = None
+    tags: Optional[list[str]] = None
+    
+    @validator('tags')
+    def validate_tags(cls, v):
+        if v is None:
+            return v
+        v = normalize_tags(v)
+        if len(v) > MAX_POST_TAGS:
+            raise ValueError(f'A post can have at most {MAX_POST_TAGS} tags')
+        return v
 
 class PostResponse(BaseModel):
     id: str
@@ -22,14 +55,64 @@ class PostResponse(BaseModel):
     content: str
     image: Optional[str]
     category: Optional[str]
+    tags: list[str] = []
     slug: str
     createdAt: Optional[datetime] = None
     updatedAt: Optional[datetime] = None
-
+    
     class Config:
         from_attributes = True
 
 class PostsResponse(BaseModel):
     posts: list[PostResponse]
     totalPosts: int
-    lastMonthPosts: int
\ No newline at end of file
+    lastMonthPosts: int
+
+class PageCommentResponse(CommentResponse):
+    author: Optional[AuthorResponse] = None
+
+class RelatedPost(BaseModel):
+    """Post card for "related posts" (no content)"""
+    id: str
+    title: str
+    image: Optional[str]
+    category: Optional[str]
+    slug: str
+    # Cosine similarity of the two posts' TF-IDF vectors
+    score: float
+
+class PostPageResponse(BaseModel):
+    """Everything the post page renders, in one response"""
+    post: PostResponse
+    author: Optional[AuthorResponse] = None
+    comments: list[PageCommentResponse]
+    totalComments: int
+    hasMoreComments: bool
+    related: list[RelatedPost] = []
+
+class TrendingPost(BaseModel):
+    """Post card for the trending / popular lists (no content)"""
+    id: str
+    userId: str
+    title: str
+    image: Optional[str]
+    category: Optional[str]
+    slug: str
+    # Unique views as of the last flush
+    views: int = 0
+    # Decayed unique views (trending) or unique views (popular)
+    score: float
+    createdAt: Optional[datetime] = None
+
+class TrendingResponse(BaseModel):
+    sort: str
+    posts: list[TrendingPost]
+
+class FacetCount(BaseModel):
+    value: str
+    # Posts with this category / tag
+    count: int
+
+class FacetsResponse(BaseModel):
+    categories: list[FacetCount]
+    tags: list[FacetCount]
@@ -63,6 +63,12 @@ class UserResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class AuthorResponse(BaseModel):
+    """Public author card - no email"""
+    id: str
+    username: str
+    profilePicture: Optional[str] = None
+
 # schemas/user_schema.py (update UserUpdate)
 class UserUpdate(BaseModel):
     username: Optional[str] = None
@@ -0,0 +1,125 @@
+# scripts/benchmark_cascade_delete.py
+## Cascade deletion check with many dependents (needs a local mongod + redis-server)
+## - Post case: one post with --documents comments
+## - User case: the user liked half of --documents comments, wrote a quarter,
+##   and owns posts carrying the last quarter
+## - Reports how long start() takes (what the HTTP response waits for) and how long the
+##   background job runs, then asserts nothing dependent is left
+## Usage (from backend/):  python -m src.scripts.benchmark_cascade_delete --documents 100000
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime
+from bson import ObjectId
+
+MARKER = "cascade-bench"
+
+async def insert_comments(comments, count: int, make, batch_size: int = 10000):
+    for start in range(0, count, batch_size):
+        await comments.insert_many(
+            [make(i) for i in range(start, min(start + batch_size, count))],
+            ordered=False
+        )
+
+def comment(post_id: str, user_id: str, i: int, likes: list = None) -> dict:
+    now = datetime.now()
+    return {
+        "content": f"{MARKER} {i}",
+        "postId": post_id,
+        "userId": user_id,
+        "likes": likes or [],
+        "numberOfLikes": len(likes or []),
+        "createdAt": now,
+        "updatedAt": now
+    }
+
+def post(user_id: str, i: int) -> dict:
+    now = datetime.now()
+    return {
+        "_id": ObjectId(),
+        "userId": user_id,
+        "title": f"{MARKER} {i}",
+        "content": MARKER,
+        "category": "uncategorized",
+        "slug": f"{MARKER}-{ObjectId()}",
+        "createdAt": now,
+        "updatedAt": now
+    }
+
+async def run_job(kind: str, target_id: str) -> dict:
+    from ..utils.cascade_delete import cascade_deleter
+    from ..models.deletion_job_model import DeletionJobModel
+    
+    started = time.perf_counter()
+    job_id = await cascade_deleter.start(kind, target_id)
+    start_ms = (time.perf_counter() - started) * 1000
+    await asyncio.gather(*cascade_deleter.tasks)
+    job = await DeletionJobModel().find_job(job_id)
+    return {
+        "start_ms": round(start_ms, 2),
+        "job_seconds": round(time.perf_counter() - started, 2),
+        "status": job["status"],
+        "processed": job["processed"]
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description="Cascade deletion benchmark")
+    parser.add_argument("--documents", type=int, default=100000, help="dependent documents per case")
+    parser.add_argument("--user-posts", type=int, default=20)
+    args = parser.parse_args()
+    
+    from ..configs.database import get_database
+    from ..configs.indexes import ensure_indexes
+    from ..configs.redis_client import redis_client
+    from ..utils.cascade_delete import DELETED_USER_ID
+    from ..configs.config import CASCADE_USER_COMMENTS
+    
+    db = get_database()
+    await ensure_indexes(db)
+    await redis_client.connect()
+    posts, comments = db["posts"], db["comments"]
+    n = args.documents
+    results = {}
+    
+    # Post case
+    target = post("bench-author", 0)
+    await posts.insert_one(target)
+    post_id = str(target["_id"])
+    await insert_comments(comments, n, lambda i: comment(post_id, f"bench-commenter-{i % 100}", i))
+    await posts.delete_one({"_id": target["_id"]})
+    results["post"] = await run_job("post", post_id)
+    assert await comments.count_documents({"postId": post_id}) == 0, "post comments left behind"
+    
+    # User case - a bystander post collects the liked and the written comments
+    user_id = str(ObjectId())
+    bystander = post("bench-author", 1)
+    user_posts = [post(user_id, i) for i in range(args.user_posts)]
+    await posts.insert_many([bystander, *user_posts])
+    bystander_id = str(bystander["_id"])
+    liked, written, on_posts = n // 2, n // 4, n - n // 2 - n // 4
+    await insert_comments(comments, liked, lambda i: comment(bystander_id, "bench-commenter", i, [user_id, "bench-other"]))
+    await insert_comments(comments, written, lambda i: comment(bystander_id, user_id, i))
+    await insert_comments(comments, on_posts, lambda i: comment(str(user_posts[i % len(user_posts)]["_id"]), "bench-commenter", i))
+    results["user"] = await run_job("user", user_id)
+    
+    assert await comments.count_documents({"likes": user_id}) == 0, "likes left behind"
+    assert await comments.count_documents({"userId": user_id}) == 0, "comments left behind"
+    assert await posts.count_documents({"userId": user_id}) == 0, "posts left behind"
+    assert await comments.count_documents({"postId": {"$in": [str(p["_id"]) for p in user_posts]}}) == 0, "post comments left behind"
+    assert await comments.count_documents({"postId": bystander_id, "numberOfLikes": 1}) == liked, "like counters not decremented"
+    if CASCADE_USER_COMMENTS != "delete":
+        assert await comments.count_documents({"postId": bystander_id, "userId": DELETED_USER_ID}) == written
+    
+    # Cleanup
+    await comments.delete_many({"postId": bystander_id})
+    await posts.delete_one({"_id": bystander["_id"]})
+    await redis_client.disconnect()
+    
+    for kind, result in results.items():
+        print(f"🧹 {kind}: start() {result['start_ms']}ms, job {result['job_seconds']}s, "
+              f"{result['status']}, processed {result['processed']}", file=sys.stderr)
+    print(f"✅ Cascade deletion removed every dependent of {n} documents per case", file=sys.stderr)
+
+if __name__ == "__main__":
+    asyncio.run(main())
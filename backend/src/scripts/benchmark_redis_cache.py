@@ -0,0 +1,89 @@
+# scripts/benchmark_redis_cache.py
+## Redis client-side cache benchmark (needs a local redis-server)
+## Usage (from backend/):  REDIS_HOST=localhost REDIS_PASSWORD= python -m src.scripts.benchmark_redis_cache
+## Exits 1 when a write from another connection isn't seen by the cached reader within INVALIDATION_DEADLINE
+import asyncio
+import json
+import secrets
+import sys
+import time
+import redis.asyncio as redis
+from ..configs.redis_client import redis_client
+from ..configs.config import REDIS_URL
+
+USERS = 50
+LOOKUPS = 20000
+# Seconds a CLIENT TRACKING invalidation push may take to reach the cached reader
+INVALIDATION_DEADLINE = 1.0
+
+async def run_lookups(keys: list) -> dict:
+    """Hot-key lookup pattern of an authenticated request: blacklist miss + CSRF hit"""
+    started = time.perf_counter()
+    for i in range(LOOKUPS):
+        blacklist_key, csrf_key = keys[i % len(keys)]
+        await redis_client.exists_key(blacklist_key)
+        await redis_client.exists_key(csrf_key)
+    elapsed = time.perf_counter() - started
+    return {
+        "lookups": LOOKUPS * 2,
+        "seconds": round(elapsed, 3),
+        "ops_per_second": round(LOOKUPS * 2 / elapsed),
+        "avg_us": round(elapsed / (LOOKUPS * 2) * 1_000_000, 2)
+    }
+
+async def main():
+    await redis_client.connect()
+    
+    keys = []
+    for user in range(USERS):
+        token = secrets.token_urlsafe(32)
+        csrf_key = f"csrf_token:bench-user-{user}:{token}"
+        await redis_client.set_key(csrf_key, "valid", 300)
+        keys.append((f"blacklist:access:bench-{token}", csrf_key))
+    
+    # Baseline: every lookup is a network round trip
+    await redis_client.cache.stop()
+    without_cache = await run_lookups(keys)
+    
+    await redis_client.cache.start()
+    with_cache = await run_lookups(keys)
+    
+    # Invalidation check: a write by another client (another worker process) must reach the cached
+    # reader through an invalidation push - writing through redis_client would evict locally
+    blacklist_key = keys[0][0]
+    await redis_client.exists_key(blacklist_key)
+    writer = redis.from_url(REDIS_URL, decode_responses=True)
+    try:
+        await writer.setex(blacklist_key, 60, "blacklisted")
+        written = time.perf_counter()
+        invalidated = False
+        while time.perf_counter() - written < INVALIDATION_DEADLINE:
+            if await redis_client.exists_key(blacklist_key):
+                invalidated = True
+                break
+            await asyncio.sleep(0.005)
+        invalidation_ms = round((time.perf_counter() - written) * 1000, 2) if invalidated else None
+    finally:
+        await writer.aclose()
+    
+    for blacklist_key, csrf_key in keys:
+        await redis_client.delete_key(blacklist_key)
+        await redis_client.delete_key(csrf_key)
+    
+    print(json.dumps({
+        "without_cache": without_cache,
+        "with_cache": with_cache,
+        "speedup": round(with_cache["ops_per_second"] / without_cache["ops_per_second"], 2),
+        "write_visible_after_invalidation": invalidated,
+        "invalidation_ms": invalidation_ms,
+        "client_cache": redis_client.cache.get_stats()
+    }, indent=2))
+    
+    await redis_client.disconnect()
+    
+    if not invalidated:
+        print(f"❌ Cached reader still served the old value {INVALIDATION_DEADLINE}s after another client's write", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())
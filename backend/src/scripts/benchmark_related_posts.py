@@ -0,0 +1,116 @@
+# scripts/benchmark_related_posts.py
+## Related-posts benchmark on a synthetic corpus (no database needed)
+## - Posts are drawn from --topics topics, each with its own Zipf-distributed words over a shared
+##   vocabulary, so a good neighbour is one from the same topic
+## - Times vectorizing, the full neighbour computation and an incremental update
+##   (--changes new posts, as many edits, a tenth as many deletions), and reports
+##   matrix size and how many neighbours share the post's topic
+## Usage (from backend/):
+##   python -m src.scripts.benchmark_related_posts --posts 100000
+import argparse
+import random
+import sys
+import time
+import numpy as np
+from ..utils.related_posts import RelatedPostsIndex, TermMatrixBuilder
+
+def make_vocabulary(size: int) -> list:
+    rng = random.Random(7)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return [f"{''.join(rng.choices(letters, k=rng.randint(3, 8)))}{i}" for i in range(size)]
+
+class Corpus:
+    def __init__(self, vocabulary: list, topics: int, seed: int):
+        self.rng = random.Random(seed)
+        self.vocabulary = vocabulary
+        # Zipf weights over each topic's own word order
+        weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+        self.topics = []
+        for topic in range(topics):
+            order = list(range(len(vocabulary)))
+            random.Random(topic).shuffle(order)
+            self.topics.append(([vocabulary[i] for i in order], weights))
+    
+    def post(self, post_id: str, topic: int) -> dict:
+        words, weights = self.topics[topic]
+        length = min(max(int(self.rng.lognormvariate(5.5, 0.8)), 30), 3000)
+        body = self.rng.choices(words, weights, k=length)
+        return {
+            "_id": post_id,
+            "title": " ".join(self.rng.choices(words[:200], k=6)),
+            "content": "<p>" + " ".join(body) + "</p>",
+            "category": f"topic{topic % 12}"
+        }
+
+def topic_precision(index: RelatedPostsIndex, topics: dict, sample: int) -> float:
+    rows = [row for row in range(len(index.post_ids)) if index.alive[row]][:sample]
+    related = index.export(np.array(rows))
+    same = total = 0
+    for post_id, neighbours in related.items():
+        for other, _ in neighbours:
+            total += 1
+            same += topics[other] == topics[post_id]
+    return same / total if total else 0.0
+
+def main():
+    parser = argparse.ArgumentParser(description="Related posts (hashed TF-IDF) benchmark")
+    parser.add_argument("--posts", type=int, default=100000)
+    parser.add_argument("--topics", type=int, default=200)
+    parser.add_argument("--vocabulary", type=int, default=50000)
+    parser.add_argument("--changes", type=int, default=100, help="new posts and edits in the incremental step")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    corpus = Corpus(make_vocabulary(args.vocabulary), args.topics, args.seed)
+    topics = {}
+    posts = []
+    for i in range(args.posts):
+        topic = corpus.rng.randrange(args.topics)
+        topics[f"p{i}"] = topic
+        posts.append(corpus.post(f"p{i}", topic))
+    
+    started = time.perf_counter()
+    builder = TermMatrixBuilder()
+    for start in range(0, len(posts), 1000):
+        builder.add(posts[start:start + 1000])
+    counts = builder.matrix()
+    vectorized = time.perf_counter() - started
+    print(f"🧮 Vectorized {args.posts} posts in {vectorized:.1f}s "
+          f"({counts.nnz:,} non-zeros, {(counts.data.nbytes + counts.indices.nbytes) / 2**20:.0f} MiB)", file=sys.stderr)
+    
+    index = RelatedPostsIndex()
+    started = time.perf_counter()
+    index.build([post["_id"] for post in posts], counts)
+    built = time.perf_counter() - started
+    print(f"🔗 Top-{index.k} neighbours for every post in {built:.1f}s "
+          f"({args.posts / built:,.0f} posts/s, block {index.block_size})", file=sys.stderr)
+    print(f"🎯 Neighbours from the same topic: {topic_precision(index, topics, 2000):.1%}", file=sys.stderr)
+    
+    # Incremental: new posts, edits (a post moves to another topic) and deletions
+    changed = []
+    for i in range(args.changes):
+        topic = corpus.rng.randrange(args.topics)
+        topics[f"new{i}"] = topic
+        changed.append(corpus.post(f"new{i}", topic))
+    for post_id in corpus.rng.sample(list(index.rows), args.changes):
+        topic = corpus.rng.randrange(args.topics)
+        topics[post_id] = topic
+        changed.append(corpus.post(post_id, topic))
+    edited = {post["_id"] for post in changed}
+    deleted = [post_id for post_id in corpus.rng.sample(list(index.rows), args.changes // 10 + 1) if post_id not in edited]
+    
+    started = time.perf_counter()
+    related = index.apply(changed, deleted)
+    applied = time.perf_counter() - started
+    print(f"♻️ Incremental update ({len(changed)} created/edited, {len(deleted)} deleted) in {applied:.2f}s - "
+          f"{len(related)} neighbour lists rewritten instead of {len(index.rows)}", file=sys.stderr)
+    
+    leaked = [post_id for post_id, neighbours in related.items() for other, _ in neighbours if other in deleted]
+    if leaked:
+        print(f"❌ Deleted posts still listed as related: {len(leaked)}", file=sys.stderr)
+        sys.exit(1)
+    print(f"🎯 Neighbours from the same topic after the update: {topic_precision(index, topics, 2000):.1%}", file=sys.stderr)
+    print("✅ Done", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+# scripts/build_related_posts.py
+## Full related-posts rebuild - vectorize every post, recompute every neighbour list, store them
+## - Needed once for existing posts, after bulk imports (seed_data bypasses the outbox), and now and
+##   then to refresh idf and drop retired rows; the worker keeps lists current in between
+## Usage (from backend/):
+##   python -m src.scripts.build_related_posts
+import asyncio
+import sys
+import time
+
+async def main():
+    from ..utils.related_posts import related_posts
+    
+    started = time.perf_counter()
+    count = await related_posts.rebuild()
+    print(f"✅ Stored related posts for {count} post(s) in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+if __name__ == "__main__":
+    asyncio.run(main())
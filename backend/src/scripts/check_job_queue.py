@@ -0,0 +1,109 @@
+# scripts/check_job_queue.py
+## End-to-end check of the Redis Stream job queue against a local redis-server
+## - Uses a throwaway stream / group / dead-letter stream with fast retries, deleted afterwards
+## - Covers: delivery, retry with backoff, dead-lettering, re-claiming a crashed consumer's job,
+##   and skipping a job whose done marker exists (acknowledgement lost)
+## Usage (from backend/):  REDIS_HOST=localhost REDIS_PASSWORD= python -m src.scripts.check_job_queue
+import asyncio
+import sys
+import time
+import uuid
+from ..configs.redis_client import redis_client
+from ..utils.job_queue import JobQueue
+
+JOBS = 50
+TIMEOUT_SECONDS = 20
+
+async def wait_for(condition, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if await condition():
+            return True
+        await asyncio.sleep(0.1)
+    return False
+
+async def main():
+    await redis_client.connect()
+    prefix = f"jobs:check:{uuid.uuid4().hex[:8]}"
+    queue = JobQueue(
+        stream=f"{prefix}:stream",
+        group="check",
+        dead_letter_stream=f"{prefix}:dead",
+        retry_seconds=0.2,
+        max_attempts=3
+    )
+    runs = {"ok": [], "flaky": 0, "broken": 0, "skipped": 0}
+    
+    @queue.handler("ok")
+    async def ok(job_id, payload):
+        runs["ok"].append(payload["n"])
+    
+    @queue.handler("flaky")
+    async def flaky(job_id, payload):
+        runs["flaky"] += 1
+        if runs["flaky"] < 3:
+            raise RuntimeError(f"flaky failure {runs['flaky']}")
+    
+    @queue.handler("broken")
+    async def broken(job_id, payload):
+        runs["broken"] += 1
+        raise RuntimeError("always fails")
+    
+    @queue.handler("skipped")
+    async def skipped(job_id, payload):
+        runs["skipped"] += 1
+    
+    try:
+        await redis_client.xgroup_create(queue.stream, queue.group)
+        
+        # A consumer that reads a job and dies before acknowledging it
+        crashed_id = await queue.enqueue("ok", {"n": -1})
+        await redis_client.xreadgroup(queue.group, "crashed-consumer", queue.stream, 1, 1)
+        
+        # A job that already succeeded but whose XACK was lost
+        skipped_id = await queue.enqueue("skipped", {})
+        await redis_client.set_key(f"{queue.stream}:done:{skipped_id}", "1", 60)
+        
+        started = time.perf_counter()
+        await queue.enqueue_many([("ok", {"n": n}) for n in range(JOBS)] + [("flaky", {}), ("broken", {})])
+        enqueue_ms = (time.perf_counter() - started) * 1000
+        
+        worker = asyncio.create_task(queue.run_worker())
+        
+        async def settled():
+            info = await redis_client.stream_info(queue.stream, queue.group)
+            dead = await redis_client.stream_info(queue.dead_letter_stream, queue.group)
+            return (
+                info["pending"] == 0 and dead["length"] == 1
+                and len(runs["ok"]) == JOBS + 1 and runs["flaky"] == 3
+            )
+        
+        finished = await wait_for(settled, TIMEOUT_SECONDS)
+        queue.stop()
+        await worker
+        
+        problems = []
+        if not finished:
+            problems.append("queue did not settle")
+        if sorted(runs["ok"]) != [-1, *range(JOBS)]:
+            problems.append(f"ok jobs ran {len(runs['ok'])} times, expected {JOBS + 1} (crashed consumer's job included)")
+        if runs["flaky"] != 3:
+            problems.append(f"flaky job ran {runs['flaky']} times, expected 3 (two failures, one success)")
+        if runs["broken"] != queue.max_attempts:
+            problems.append(f"broken job ran {runs['broken']} times, expected {queue.max_attempts}")
+        if runs["skipped"]:
+            problems.append("job with a done marker ran again")
+        
+        print(f"📨 {JOBS + 2} jobs enqueued in {enqueue_ms:.1f}ms (one pipeline), crashed job {crashed_id} re-claimed", file=sys.stderr)
+        if problems:
+            for problem in problems:
+                print(f"❌ {problem}", file=sys.stderr)
+            sys.exit(1)
+        print("✅ Delivery, retries, dead-lettering, crash recovery and duplicate suppression work", file=sys.stderr)
+    finally:
+        for key in await redis_client.keys(f"{prefix}:*"):
+            await redis_client.delete_key(key)
+        await redis_client.disconnect()
+
+if __name__ == "__main__":
+    asyncio.run(main())
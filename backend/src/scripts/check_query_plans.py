@@ -0,0 +1,252 @@
+# scripts/check_query_plans.py
+## Query-plan regression check - explain() every query shape issued by the models
+## - Runs the real PostModel / CommentModel / UserModel methods (and PostController.get_posts
+##   query building) against a seeded local mongod, capturing the commands they send
+## - Each captured command is explained (executionStats) and must use an index, with
+##   keys examined bounded by what the query needs; failures print the winning plan
+## - Exits 1 on any regression, so it can run in CI next to the app
+## Usage (from backend/, after `python -m src.scripts.seed_data`):
+##   python -m src.scripts.check_query_plans
+##   python -m src.scripts.check_query_plans --verbose    # print every plan
+import argparse
+import asyncio
+import json
+import sys
+from pymongo import monitoring
+from ..utils.slow_query_log import EXPLAINABLE_COMMANDS, explain_command, summarize_explain
+
+# Metadata-only plans (estimated_document_count) - no scan at all
+METADATA_STAGES = {"RECORD_STORE_FAST_COUNT"}
+# Extra keys an index scan may look at beyond the documents it needs (bounds edges, sort ties)
+KEYS_SLACK = 1
+
+# Shapes that are known to scan - reported, not failed. Keep this list short and explained.
+KNOWN_SCANS = {
+    # Unanchored case-insensitive $regex on title/content can't use index bounds
+    "PostModel.search_posts",
+    "PostController.get_posts(searchTerm)",
+    # Index scans, but over more keys than results: $all bounds on its first tag and filters the
+    # others after the fetch; $in merges one sorted scan per tag (a post with both tags is read twice)
+    "PostController.get_posts(all tags)",
+    "PostController.get_posts(any tag)",
+    # Walks the whole _id index by design - one pass per sitemap rebuild
+    "PostModel.find_sitemap_posts",
+}
+
+class CommandCapture(monitoring.CommandListener):
+    """Records explainable commands while `active` - registered before the Motor client is created"""
+    def __init__(self):
+        self.active = False
+        self.commands = []
+    
+    def started(self, event):
+        if self.active and event.command_name in EXPLAINABLE_COMMANDS:
+            self.commands.append((event.database_name, event.command_name, dict(event.command)))
+    
+    def succeeded(self, event):
+        pass
+    
+    def failed(self, event):
+        pass
+
+capture = CommandCapture()
+monitoring.register(capture)
+
+def command_filter(command_name: str, command: dict) -> dict:
+    if command_name == "find":
+        return command.get("filter", {})
+    if command_name == "aggregate":
+        first_stage = (command.get("pipeline") or [{}])[0]
+        return first_stage.get("$match", {})
+    if command_name in ("update", "delete"):
+        statements = command.get("updates") or command.get("deletes") or [{}]
+        return statements[0].get("q", {})
+    # count / distinct / findAndModify
+    return command.get("query", {})
+
+def keys_budget(command_name: str, command: dict, matching: int) -> int:
+    """Keys an index plan should need: matching docs, or skip + limit when the sort is indexed"""
+    if command_name == "find" and command.get("limit"):
+        return min(matching, command.get("skip", 0) + command["limit"]) + KEYS_SLACK
+    if command_name in ("update", "delete"):
+        # single-document writes by _id
+        return 1 + KEYS_SLACK
+    return matching + KEYS_SLACK
+
+async def check_command(db, label: str, command_name: str, command: dict, verbose: bool) -> bool:
+    collection = command.get(command_name)
+    raw = await explain_command(db, command)
+    plan = summarize_explain(raw)
+    filter_doc = command_filter(command_name, command)
+    
+    capture.active = False
+    matching = await db[collection].count_documents(filter_doc) if filter_doc else 0
+    capture.active = True
+    
+    budget = keys_budget(command_name, command, matching)
+    keys_examined = plan["keysExamined"] or 0
+    problems = []
+    if set(plan["stages"]) & METADATA_STAGES:
+        pass
+    elif plan["collscan"] or not plan["ixscan"]:
+        problems.append(f"no index scan (stages: {' > '.join(plan['stages'])})")
+    elif keys_examined > budget:
+        problems.append(f"keysExamined {keys_examined} > budget {budget}")
+    
+    shape = f"{command_name} {collection} {json.dumps(filter_doc, default=str)}"
+    if problems and label in KNOWN_SCANS:
+        print(f"⚠️ KNOWN  {label}: {shape} - {'; '.join(problems)}")
+        return True
+    if problems:
+        print(f"❌ FAIL   {label}: {shape} - {'; '.join(problems)}")
+        winning_plan = (raw.get("queryPlanner") or {}).get("winningPlan") or raw.get("stages")
+        print(json.dumps(winning_plan, indent=2, default=str))
+        return False
+    
+    print(f"✅ PASS   {label}: {command_name} {collection} via {', '.join(plan['indexes']) or '/'.join(plan['stages'])} "
+          f"(keys {keys_examined}, returned {plan['nReturned']})")
+    if verbose:
+        print(json.dumps(plan, indent=2, default=str))
+    return True
+
+async def sample_values(db) -> dict:
+    """Real values from the seeded data, so bounds and counts are realistic"""
+    from bson import ObjectId
+    
+    # Popular post / author / category - the worst case for keys examined
+    top_post = await db["comments"].aggregate([
+        {"$sortByCount": "$postId"}, {"$limit": 1}
+    ]).to_list(length=1)
+    post = await db["posts"].find_one({"_id": ObjectId(top_post[0]["_id"])}) if top_post else await db["posts"].find_one()
+    user = await db["users"].find_one({"isAdmin": False}) or await db["users"].find_one()
+    comment = await db["comments"].find_one({"postId": str(post["_id"])}) if post else None
+    if not (post and user and comment):
+        raise SystemExit("❌ Seed the database first: python -m src.scripts.seed_data")
+    return {
+        "user": user,
+        "post": post,
+        "comment": comment,
+        # Writes are explained against an id that matches nothing - same shape, no side effects
+        "missing_id": str(ObjectId())
+    }
+
+def build_cases(values: dict) -> list:
+    from datetime import datetime, timedelta
+    from ..models.user_model import UserModel
+    from ..models.post_model import PostModel
+    from ..models.comment_model import CommentModel
+    from ..models.daily_stats_model import DailyStatsModel
+    from ..models.outbox_model import OutboxModel
+    from ..models.facet_model import FacetModel
+    from ..models.export_model import ExportModel
+    from ..controllers.post_controller import PostController
+    
+    users, posts, comments = UserModel(), PostModel(), CommentModel()
+    daily_stats = DailyStatsModel()
+    outbox = OutboxModel()
+    facets = FacetModel()
+    exports = ExportModel()
+    controller = PostController()
+    user, post, comment = values["user"], values["post"], values["comment"]
+    missing = values["missing_id"]
+    admin = {"id": post["userId"], "isAdmin": True}
+    tags = (post.get("tags") or []) + ["performance", "tutorial"]
+    month_ago = datetime.now() - timedelta(days=30)
+    
+    return [
+        ("UserModel.find_user_by_email", lambda: users.find_user_by_email(user["email"])),
+        ("UserModel.find_user_by_username", lambda: users.find_user_by_username(user["username"])),
+        ("UserModel.find_user_by_id", lambda: users.find_user_by_id(str(user["_id"]))),
+        ("UserModel.find_users_by_ids", lambda: users.find_users_by_ids([str(user["_id"]), post["userId"]])),
+        ("UserModel.update_user", lambda: users.update_user(missing, {"username": "plan-check"})),
+        ("UserModel.delete_user", lambda: users.delete_user(missing)),
+        ("UserModel.get_all_users", lambda: users.get_all_users(skip=0, limit=9)),
+        ("UserModel.count_users", lambda: users.count_users()),
+        ("UserModel.get_users_count_since_date", lambda: users.get_users_count_since_date(month_ago)),
+        
+        ("PostModel.find_post_by_slug", lambda: posts.find_post_by_slug(post["slug"])),
+        ("PostModel.find_post_by_id", lambda: posts.find_post_by_id(str(post["_id"]))),
+        ("PostModel.find_post_by_title", lambda: posts.find_post_by_title(post["title"])),
+        ("PostModel.find_post_id_by_slug", lambda: posts.find_post_id_by_slug(post["slug"])),
+        ("PostModel.find_posts_by_ids", lambda: posts.find_posts_by_ids([str(post["_id"]), missing])),
+        ("PostModel.get_related_posts", lambda: posts.get_related_posts(str(post["_id"]))),
+        ("PostModel.find_feed_posts", lambda: posts.find_feed_posts(50).to_list(length=50)),
+        ("PostModel.find_sitemap_posts", lambda: posts.find_sitemap_posts().to_list(length=None)),
+        ("PostModel.update_post", lambda: posts.update_post(missing, {"title": "plan-check"})),
+        ("PostModel.delete_post", lambda: posts.delete_post(missing)),
+        ("PostModel.get_posts", lambda: posts.get_posts({}, skip=0, limit=9)),
+        ("PostModel.get_posts(asc, page 3)", lambda: posts.get_posts({}, skip=18, limit=9, sort_direction=1)),
+        ("PostModel.count_posts", lambda: posts.count_posts()),
+        ("PostModel.get_posts_by_user_id", lambda: posts.get_posts_by_user_id(post["userId"])),
+        ("PostModel.get_posts_by_category", lambda: posts.get_posts_by_category(post["category"])),
+        ("PostModel.search_posts", lambda: posts.search_posts("cache")),
+        
+        ("PostController.get_posts()", lambda: controller.get_posts(current_user=admin)),
+        ("PostController.get_posts(userId)", lambda: controller.get_posts(userId=post["userId"], current_user=admin)),
+        ("PostController.get_posts(category)", lambda: controller.get_posts(category=post["category"], current_user=admin)),
+        ("PostController.get_posts(slug)", lambda: controller.get_posts(slug=post["slug"], current_user=admin)),
+        ("PostController.get_posts(postId)", lambda: controller.get_posts(postId=str(post["_id"]), current_user=admin)),
+        ("PostController.get_posts(searchTerm)", lambda: controller.get_posts(searchTerm="cache", current_user=admin)),
+        ("PostController.get_posts(tag)", lambda: controller.get_posts(tags=tags[:1], current_user=admin)),
+        ("PostController.get_posts(all tags)", lambda: controller.get_posts(tags=tags[:2], current_user=admin)),
+        ("PostController.get_posts(any tag)", lambda: controller.get_posts(tags=tags[:2], tagMatch="any", current_user=admin)),
+        
+        ("FacetModel.get_facets(category)", lambda: facets.get_facets("category")),
+        ("FacetModel.get_facets(tag)", lambda: facets.get_facets("tag")),
+        
+        ("CommentModel.find_comment_by_id", lambda: comments.find_comment_by_id(str(comment["_id"]))),
+        ("CommentModel.get_comments_by_post_id", lambda: comments.get_comments_by_post_id(str(post["_id"]))),
+        ("CommentModel.get_comments_page", lambda: comments.get_comments_page(str(post["_id"]), limit=10)),
+        ("CommentModel.count_comments(postId)", lambda: comments.count_comments({"postId": str(post["_id"])})),
+        ("CommentModel.update_comment", lambda: comments.update_comment(missing, {"content": "plan-check"})),
+        ("CommentModel.delete_comment", lambda: comments.delete_comment(missing)),
+        ("CommentModel.get_all_comments", lambda: comments.get_all_comments(skip=0, limit=9)),
+        ("CommentModel.count_comments", lambda: comments.count_comments()),
+        ("CommentModel.get_comments_count_since_date", lambda: comments.get_comments_count_since_date(month_ago)),
+        
+        ("DailyStatsModel.get_days", lambda: daily_stats.get_days(month_ago - timedelta(days=335), datetime.now())),
+        
+        ("OutboxModel.get_events_after", lambda: outbox.get_events_after(0, 100)),
+        ("OutboxModel.get_seq_before", lambda: outbox.get_seq_before(month_ago)),
+        
+        # Resumed export: one _id range, one batch
+        ("ExportModel.find_after(posts)", lambda: exports.find_after("posts", post["_id"], None, 100, 100).to_list(length=100)),
+        ("ExportModel.find_after(users)", lambda: exports.find_after("users", user["_id"], {"password": 0}, 100, 100).to_list(length=100)),
+    ]
+
+async def main():
+    parser = argparse.ArgumentParser(description="Assert index usage for every model query shape")
+    parser.add_argument("--verbose", action="store_true")
+    parser.add_argument("--skip-index-creation", action="store_true", help="check the indexes as they are")
+    args = parser.parse_args()
+    
+    from ..configs.database import get_database
+    from ..configs.indexes import ensure_indexes
+    
+    db = get_database()
+    if not args.skip_index_creation:
+        await ensure_indexes(db)
+    values = await sample_values(db)
+    
+    failures = 0
+    for label, run in build_cases(values):
+        capture.commands = []
+        capture.active = True
+        try:
+            await run()
+            commands = list(capture.commands)
+            if not commands:
+                print(f"⚠️ SKIP   {label}: no explainable command captured")
+            for database_name, command_name, command in commands:
+                if not await check_command(db.client[database_name], label, command_name, command, args.verbose):
+                    failures += 1
+        finally:
+            capture.active = False
+    
+    if failures:
+        print(f"❌ {failures} query shape(s) regressed")
+        sys.exit(1)
+    print("✅ Every query shape uses an index")
+
+if __name__ == "__main__":
+    asyncio.run(main())
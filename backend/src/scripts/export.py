@@ -0,0 +1,148 @@
+# scripts/export.py
+## NDJSON export of posts / comments / users to a file or stdout - same lines as /api/admin/export
+## - Memory stays at one cursor batch (--batch-size); passwords are never exported
+## - Writing to a file records a checkpoint (<file>.checkpoint: last _id + byte offset) every
+##   --checkpoint-every documents; --resume cuts the file back to the last checkpoint and continues
+##   after its _id, so an interrupted export neither duplicates nor skips documents
+## - .gz output is a series of complete gzip members, one per checkpoint (gunzip / zcat / mongoimport
+##   via zcat read it as one stream)
+## Usage (from backend/):
+##   python -m src.scripts.export posts --out posts.ndjson.gz
+##   python -m src.scripts.export comments --out comments.ndjson --resume
+##   python -m src.scripts.export users --fields username,email,createdAt > users.ndjson
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import zlib
+
+class ExportWriter:
+    """NDJSON bytes to a binary stream, optionally as gzip members ended by end_member()"""
+    def __init__(self, stream, compress: bool):
+        self.stream = stream
+        self.compress = compress
+        self.compressor = None
+    
+    def write(self, data: bytes):
+        if self.compress:
+            if self.compressor is None:
+                self.compressor = zlib.compressobj(wbits=31)
+            data = self.compressor.compress(data)
+        self.stream.write(data)
+    
+    def end_member(self):
+        if self.compressor is not None:
+            self.stream.write(self.compressor.flush())
+            self.compressor = None
+        self.stream.flush()
+
+def checkpoint_path(out: str) -> str:
+    return f"{out}.checkpoint"
+
+def load_checkpoint(out: str, collection: str, fields: list) -> dict:
+    try:
+        with open(checkpoint_path(out)) as f:
+            checkpoint = json.load(f)
+    except FileNotFoundError:
+        raise SystemExit(f"❌ No checkpoint for {out} - that export already finished")
+    if checkpoint["collection"] != collection or checkpoint["fields"] != fields:
+        raise SystemExit(f"❌ {out} is an export of {checkpoint['collection']} (fields: {checkpoint['fields']}) - resume it with the same arguments")
+    return checkpoint
+
+def save_checkpoint(out: str, checkpoint: dict):
+    """Atomic - a crash leaves the previous checkpoint"""
+    temp_path = f"{checkpoint_path(out)}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, checkpoint_path(out))
+
+async def main():
+    from ..configs.config import EXPORT_BATCH_SIZE
+    from ..utils.export import EXPORT_COLLECTIONS, export_batches, export_projection, parse_after
+    
+    parser = argparse.ArgumentParser(description="Stream a collection as NDJSON (passwords excluded)")
+    parser.add_argument("collection", choices=EXPORT_COLLECTIONS)
+    parser.add_argument("--out", help="output file (default: stdout); .gz compresses")
+    parser.add_argument("--gzip", action="store_true", help="compress stdout too")
+    parser.add_argument("--fields", help="comma-separated fields to include (default: all but secrets)")
+    parser.add_argument("--after", help="start after this _id")
+    parser.add_argument("--resume", action="store_true", help="continue an interrupted --out export from its checkpoint")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    parser.add_argument("--checkpoint-every", type=int, default=10000, help="documents between checkpoints")
+    args = parser.parse_args()
+    
+    fields = [field.strip() for field in args.fields.split(",") if field.strip()] if args.fields else None
+    try:
+        export_projection(args.collection, fields)
+        after = parse_after(args.after)
+    except ValueError as e:
+        raise SystemExit(f"❌ {e}")
+    compress = args.gzip or bool(args.out and args.out.endswith(".gz"))
+    
+    exported = 0
+    if args.out:
+        if args.resume:
+            checkpoint = load_checkpoint(args.out, args.collection, fields)
+            after, exported = parse_after(checkpoint["after"]), checkpoint["documents"]
+            stream = open(args.out, "r+b")
+            # Anything after the checkpoint may be a partial line or gzip member
+            stream.truncate(checkpoint["offset"])
+            stream.seek(checkpoint["offset"])
+            print(f"↩️ Resuming {args.out} after {exported} document(s) (_id {checkpoint['after']})", file=sys.stderr)
+        elif os.path.exists(args.out):
+            raise SystemExit(f"❌ {args.out} exists - use --resume to continue it, or remove it")
+        else:
+            stream = open(args.out, "wb")
+            save_checkpoint(args.out, {
+                "collection": args.collection,
+                "fields": fields,
+                "after": str(after) if after else None,
+                "offset": 0,
+                "documents": 0
+            })
+    else:
+        if args.resume:
+            raise SystemExit("❌ --resume needs --out")
+        stream = sys.stdout.buffer
+    
+    writer = ExportWriter(stream, compress)
+    started = time.perf_counter()
+    since_checkpoint = 0
+    last_id = after
+    try:
+        async for data, last_id, count in export_batches(args.collection, after, fields, batch_size=args.batch_size):
+            writer.write(data)
+            exported += count
+            since_checkpoint += count
+            if args.out and since_checkpoint >= args.checkpoint_every:
+                writer.end_member()
+                os.fsync(stream.fileno())
+                save_checkpoint(args.out, {
+                    "collection": args.collection,
+                    "fields": fields,
+                    "after": str(last_id),
+                    "offset": stream.tell(),
+                    "documents": exported
+                })
+                since_checkpoint = 0
+        writer.end_member()
+    finally:
+        if args.out:
+            stream.close()
+    
+    if args.out and os.path.exists(checkpoint_path(args.out)):
+        os.remove(checkpoint_path(args.out))
+    elapsed = time.perf_counter() - started
+    print(
+        f"✅ Exported {exported} {args.collection} document(s) in {elapsed:.1f}s"
+        + (f" to {args.out}" if args.out else "")
+        + (f" (last _id {last_id})" if last_id else ""),
+        file=sys.stderr
+    )
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,297 @@
+# scripts/load_test.py
+## End-to-end load test / benchmark harness
+## Flow per virtual user: signin -> csrf-token -> getposts -> getPostComments -> create comment -> likeComment
+## Prints p50/p95/p99 latency, throughput and worst-case round trips per route as JSON (compare the output between commits)
+## Exits 1 when a route went over its ROUTE_ROUND_TRIP_BUDGETS entry (needs ROUND_TRIP_HEADER_ENABLED=true
+## on the server), so CI can gate on it
+##
+## Needs `httpx`. Usage (from backend/):
+##   Against a running server backed by local mongod/redis-server (same MONGO_* / REDIS_* env, used for seeding):
+##     python -m src.scripts.load_test --base-url http://localhost:8000 --concurrency 20 --iterations 10
+##   Spawn uvicorn for the run:
+##     python -m src.scripts.load_test --spawn --concurrency 20
+##   In-memory fakes for unit-level runs (needs `mongomock-motor` and `fakeredis`, no servers):
+##     python -m src.scripts.load_test --in-memory --concurrency 5
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from ..utils.round_trips import ROUTE_ROUND_TRIP_BUDGETS, parse_round_trip_header, budget_violations, assert_round_trip_budget
+
+BENCH_PASSWORD = "Bench#Pass123"
+BENCH_EMAIL_DOMAIN = "bench.local"
+CATEGORIES = ["javascript", "python", "devops", "databases", "uncategorized"]
+WORDS = (
+    "fastapi mongo redis async cache index query latency token cookie session "
+    "stream cursor pipeline worker queue shard replica benchmark profile"
+).split()
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+async def seed_data(users: int, posts: int, comments_per_post: int, seed: int) -> list:
+    """Insert benchmark users/posts/comments directly through the models, returns user emails"""
+    from ..models.user_model import UserModel
+    from ..models.post_model import PostModel
+    from ..models.comment_model import CommentModel
+    from ..utils.security import hash_password
+    
+    rng = random.Random(seed)
+    user_model, post_model, comment_model = UserModel(), PostModel(), CommentModel()
+    
+    # Start from a clean benchmark data set
+    await user_model.collection.delete_many({"email": {"$regex": f"@{BENCH_EMAIL_DOMAIN}$"}})
+    await post_model.collection.delete_many({"slug": {"$regex": "^bench-"}})
+    await comment_model.collection.delete_many({"content": {"$regex": "^bench "}})
+    
+    # bcrypt is slow on purpose - hash once and reuse
+    password_hash = hash_password(BENCH_PASSWORD)
+    now = datetime.now()
+    user_docs = [{
+        "username": f"benchuser{i}",
+        "email": f"benchuser{i}@{BENCH_EMAIL_DOMAIN}",
+        "password": password_hash,
+        "profilePicture": "https://cdn.pixabay.com/photo/2015/10/05/22/37/blank-profile-picture-973460_960_720.png",
+        "isAdmin": i == 0,
+        "createdAt": now - timedelta(days=rng.randint(0, 365)),
+        "updatedAt": now
+    } for i in range(users)]
+    result = await user_model.collection.insert_many(user_docs)
+    user_ids = [str(user_id) for user_id in result.inserted_ids]
+    
+    post_docs = [{
+        "userId": user_ids[0],
+        "title": f"Bench post {i}",
+        "content": _text(rng, rng.randint(50, 800)),
+        "image": None,
+        "category": rng.choice(CATEGORIES),
+        "slug": f"bench-post-{i}",
+        "createdAt": now - timedelta(days=rng.randint(0, 365)),
+        "updatedAt": now - timedelta(minutes=i)
+    } for i in range(posts)]
+    result = await post_model.collection.insert_many(post_docs)
+    post_ids = [str(post_id) for post_id in result.inserted_ids]
+    
+    comment_docs = []
+    for post_id in post_ids:
+        for _ in range(comments_per_post):
+            likes = rng.sample(user_ids, k=min(len(user_ids), rng.randint(0, 5)))
+            comment_docs.append({
+                "content": f"bench {_text(rng, rng.randint(5, 40))}",
+                "postId": post_id,
+                "userId": rng.choice(user_ids),
+                "likes": likes,
+                "numberOfLikes": len(likes),
+                "createdAt": now - timedelta(days=rng.randint(0, 30)),
+                "updatedAt": now
+            })
+    if comment_docs:
+        await comment_model.collection.insert_many(comment_docs)
+    
+    print(f"🌱 Seeded {users} users, {posts} posts, {len(comment_docs)} comments", file=sys.stderr)
+    return [doc["email"] for doc in user_docs]
+
+class VirtualUser:
+    """
+    One simulated browser session
+    - Cookies are kept by hand: /csrf-token sets a `secure` cookie that an http
+      client jar would otherwise refuse to send back
+    """
+    def __init__(self, client, email: str, timings: dict):
+        self.client = client
+        self.email = email
+        self.timings = timings
+        self.cookies = {}
+    
+    async def call(self, route: str, method: str, url: str, **kwargs):
+        headers = kwargs.pop("headers", {})
+        if self.cookies:
+            headers["Cookie"] = "; ".join(f"{name}={value}" for name, value in self.cookies.items())
+        started = time.perf_counter()
+        response = await self.client.request(method, url, headers=headers, **kwargs)
+        elapsed = time.perf_counter() - started
+        
+        stats = self.timings.setdefault(route, {"latencies": [], "errors": 0, "round_trips": {}})
+        stats["latencies"].append(elapsed)
+        if response.status_code >= 400:
+            stats["errors"] += 1
+        # Worst case Mongo/Redis round trips seen for this route (X-Round-Trips debug header)
+        header = response.headers.get("x-round-trips")
+        if header:
+            for backend, count in parse_round_trip_header(header).items():
+                stats["round_trips"][backend] = max(stats["round_trips"].get(backend, 0), count)
+        for name, value in response.cookies.items():
+            self.cookies[name] = value
+        return response
+    
+    async def run_flow(self):
+        response = await self.call("POST /api/auth/signin", "POST", "/api/auth/signin",
+                                   json={"email": self.email, "password": BENCH_PASSWORD})
+        if response.status_code != 200:
+            return
+        user_id = response.json()["user"]["id"]
+        
+        response = await self.call("GET /api/auth/csrf-token", "GET", "/api/auth/csrf-token")
+        csrf_token = response.json().get("csrfToken")
+        self.cookies["csrf_token"] = csrf_token
+        
+        response = await self.call("GET /api/post/getposts", "GET", "/api/post/getposts", params={"limit": 9})
+        posts = response.json().get("posts", []) if response.status_code == 200 else []
+        if not posts:
+            return
+        post_id = random.choice(posts)["id"]
+        
+        await self.call("GET /api/comment/getPostComments/{post_id}", "GET", f"/api/comment/getPostComments/{post_id}")
+        
+        response = await self.call("POST /api/comment/create", "POST", "/api/comment/create",
+                                   json={"content": "bench load test comment", "postId": post_id, "userId": user_id},
+                                   headers={"X-CSRF-Token": csrf_token})
+        if response.status_code != 200:
+            return
+        comment_id = response.json()["id"]
+        
+        await self.call("PUT /api/comment/likeComment/{comment_id}", "PUT", f"/api/comment/likeComment/{comment_id}",
+                        headers={"X-CSRF-Token": csrf_token})
+
+async def run_load(client, emails: list, concurrency: int, iterations: int) -> dict:
+    timings = {}
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def one_flow(index: int):
+        async with semaphore:
+            await VirtualUser(client, emails[index % len(emails)], timings).run_flow()
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(one_flow(i) for i in range(concurrency * iterations)))
+    wall_seconds = time.perf_counter() - started
+    
+    routes = {}
+    for route, stats in timings.items():
+        latencies = stats["latencies"]
+        routes[route] = {
+            "requests": len(latencies),
+            "errors": stats["errors"],
+            "throughput_rps": round(len(latencies) / wall_seconds, 2),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "max_ms": round(max(latencies) * 1000, 2),
+            "max_round_trips": stats["round_trips"],
+            "over_budget": {
+                backend: {"count": count, "budget": limit}
+                for backend, (count, limit) in budget_violations(route, stats["round_trips"]).items()
+            } if stats["round_trips"] else {}
+        }
+    return {
+        "concurrency": concurrency,
+        "flows": concurrency * iterations,
+        "wall_seconds": round(wall_seconds, 3),
+        "routes": routes
+    }
+
+def check_budgets(report: dict) -> list:
+    """Round-trip budget failures of a run (worst request per budgeted route)"""
+    failures = []
+    for route, stats in report["routes"].items():
+        if route not in ROUTE_ROUND_TRIP_BUDGETS or not stats["requests"]:
+            continue
+        if not stats["max_round_trips"]:
+            failures.append(f"{route}: no X-Round-Trips header - start the server with ROUND_TRIP_HEADER_ENABLED=true")
+            continue
+        try:
+            assert_round_trip_budget(route, mongo=stats["max_round_trips"].get("mongo"), redis=stats["max_round_trips"].get("redis"))
+        except AssertionError as e:
+            failures.append(str(e))
+    return failures
+
+def _use_in_memory_backends():
+    """Swap Motor and Redis for in-memory fakes before the app modules are imported"""
+    from mongomock_motor import AsyncMongoMockClient
+    import fakeredis.aioredis
+    from ..configs import database
+    from ..configs.config import MONGO_DBNAME
+    from ..configs.redis_client import redis_client
+    
+    database.client = AsyncMongoMockClient()
+    database.db = database.client[MONGO_DBNAME]
+    redis_client.redis_client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+
+async def _wait_for_server(client, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError("Server did not start in time")
+
+async def main():
+    import httpx
+    
+    parser = argparse.ArgumentParser(description="End-to-end load test")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--spawn", action="store_true", help="start uvicorn for the run")
+    parser.add_argument("--in-memory", action="store_true", help="run the app in-process on mongomock/fakeredis")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--posts", type=int, default=200)
+    parser.add_argument("--comments-per-post", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+    
+    server = None
+    if args.in_memory:
+        _use_in_memory_backends()
+        from ..server import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+    else:
+        if args.spawn:
+            server = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "src.server:app", "--port", args.base_url.rsplit(":", 1)[-1]],
+                env=os.environ.copy()
+            )
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=30.0)
+    
+    try:
+        if not args.in_memory:
+            await _wait_for_server(client)
+        emails = await seed_data(args.users, args.posts, args.comments_per_post, args.seed)
+        report = await run_load(client, emails, args.concurrency, args.iterations)
+        report["mode"] = "in-memory" if args.in_memory else "live"
+        report["generatedAt"] = datetime.now().isoformat()
+        
+        output = json.dumps(report, indent=2)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as report_file:
+                report_file.write(output)
+        print(output)
+    finally:
+        await client.aclose()
+        if server:
+            server.terminate()
+            server.wait()
+    
+    failures = check_budgets(report)
+    for failure in failures:
+        print(f"❌ {failure}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+# scripts/outbox.py
+## Outbox status and replays
+## - status: head sequence, retained range, and each consumer's position / lag
+## - replay: move a consumer back so the running worker delivers those events again
+##   (rebuilding a cache or counter). Only retained events (OUTBOX_RETENTION_DAYS) can be
+##   replayed; rebuild older derived data from the collections (e.g. rebuild_daily_stats)
+## - daily_stats can't be moved back: its increments are only deduplicated against the last
+##   APPLIED_OPS_KEPT events per day, so a replay double-counts busy days - rebuild_daily_stats instead
+## Usage (from backend/):
+##   python -m src.scripts.outbox status
+##   python -m src.scripts.outbox replay entity_cache --since 2024-06-01
+##   python -m src.scripts.outbox replay dashboard --from-seq 0       # everything retained
+##   python -m src.scripts.outbox replay daily_stats --from-seq 1234  # only forwards, past a poison event
+import argparse
+import asyncio
+import json
+import sys
+from datetime import datetime
+
+# Consumers whose effects aren't idempotent over a full replay -> how to rebuild their data instead
+NOT_REPLAYABLE = {
+    "daily_stats": "python -m src.scripts.rebuild_daily_stats --since YYYY-MM-DD"
+}
+
+async def status():
+    from ..models.outbox_model import OutboxModel
+    from ..utils.outbox import outbox_dispatcher
+    
+    report = await outbox_dispatcher.report_lag()
+    report["firstRetainedSeq"] = await OutboxModel().get_first_seq()
+    print(json.dumps(report, indent=2, default=str))
+
+async def replay(consumer: str, from_seq: int = None, since: str = None):
+    from ..models.outbox_model import OutboxModel
+    from ..utils.outbox import outbox_dispatcher
+    
+    outbox_dispatcher._load_consumers()
+    if consumer not in outbox_dispatcher.consumers:
+        raise SystemExit(f"❌ Unknown consumer {consumer} (known: {', '.join(outbox_dispatcher.consumers)})")
+    
+    outbox = OutboxModel()
+    if since:
+        from_seq = await outbox.get_seq_before(datetime.strptime(since, "%Y-%m-%d"))
+    # Expired events can't be replayed - start at the oldest retained one instead of reporting a gap
+    first_seq = await outbox.get_first_seq()
+    if first_seq is not None:
+        from_seq = max(from_seq, first_seq - 1)
+    if consumer in NOT_REPLAYABLE:
+        position = next((state["seq"] for state in await outbox.get_consumers() if state["_id"] == consumer), 0)
+        if from_seq < position:
+            raise SystemExit(
+                f"❌ {consumer} can't be replayed (it would count events again) - it can only skip ahead "
+                f"of seq {position}. Rebuild its data instead: {NOT_REPLAYABLE[consumer]}"
+            )
+    await outbox.reset_consumer(consumer, from_seq)
+    print(f"✅ {consumer} will receive events after seq {from_seq} again", file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description="Outbox status and consumer replays")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status")
+    replay_parser = commands.add_parser("replay")
+    replay_parser.add_argument("consumer")
+    position = replay_parser.add_mutually_exclusive_group(required=True)
+    position.add_argument("--since", help="replay events from this day on (YYYY-MM-DD)")
+    position.add_argument("--from-seq", type=int, help="replay events after this sequence number")
+    args = parser.parse_args()
+    
+    if args.command == "status":
+        asyncio.run(status())
+    else:
+        asyncio.run(replay(args.consumer, args.from_seq, args.since))
+
+if __name__ == "__main__":
+    main()
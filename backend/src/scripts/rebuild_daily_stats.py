@@ -0,0 +1,33 @@
+# scripts/rebuild_daily_stats.py
+## Recompute the daily analytics rollups from users / posts / comments
+## - Needed once for data that predates the rollups and after bulk imports (seed_data bypasses the controllers)
+## - Only days from --since onwards are rewritten; older days keep their write-time counts
+## Usage (from backend/):
+##   python -m src.scripts.rebuild_daily_stats --since 2024-01-01
+##   python -m src.scripts.rebuild_daily_stats --days 7    # nightly reconciliation of the last week
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta
+
+async def main():
+    parser = argparse.ArgumentParser(description="Rebuild daily analytics rollups")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--since", help="first day to rebuild (YYYY-MM-DD)")
+    group.add_argument("--days", type=int, default=3650, help="rebuild the last N days")
+    args = parser.parse_args()
+    
+    from ..models.daily_stats_model import DailyStatsModel
+    
+    if args.since:
+        since = datetime.strptime(args.since, "%Y-%m-%d")
+    else:
+        since = datetime.now() - timedelta(days=args.days)
+    
+    started = time.perf_counter()
+    days = await DailyStatsModel().rebuild(since)
+    print(f"✅ Rebuilt {days} day bucket(s) since {since:%Y-%m-%d} in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,20 @@
+# scripts/rebuild_facets.py
+## Recount post facets (posts per category / tag) from the posts collection
+## - Needed once for existing posts, after bulk imports (seed_data writes posts directly), and to
+##   repair counts after a crash on a standalone server (no transaction around post write + counters)
+## - Posts written while it runs may be counted twice or not at all - run it again, or in a quiet moment
+## Usage (from backend/):
+##   python -m src.scripts.rebuild_facets
+import asyncio
+import sys
+import time
+
+async def main():
+    from ..models.facet_model import FacetModel
+    
+    started = time.perf_counter()
+    count = await FacetModel().rebuild()
+    print(f"✅ Recounted {count} facet(s) in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+if __name__ == "__main__":
+    asyncio.run(main())
\ No newline at end of file
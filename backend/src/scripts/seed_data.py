@@ -0,0 +1,259 @@
+# scripts/seed_data.py
+## Bulk data generator for benchmarks - users, posts and comments straight into MongoDB
+## - Reproducible: every document (including its _id) is derived from --seed, --until and its index,
+##   so re-running with the same seed skips what already exists (duplicate _id) and fills the gaps
+## - Users share a small pool of precomputed bcrypt hashes of SEED_PASSWORD (bcrypt is slow on purpose)
+## - Skewed distributions: a few authors write most posts, a few posts get most comments,
+##   a few users write most comments, likes are Pareto distributed
+## - Batches are generated and inserted with insert_many(ordered=False) in parallel processes
+## Usage (from backend/, pointed at a benchmark database via MONGO_* env):
+##   python -m src.scripts.seed_data --users 100000 --posts 200000 --comments 1000000 --processes 8
+##   python -m src.scripts.seed_data --drop ...   # drop users/posts/comments first
+import argparse
+import asyncio
+import multiprocessing
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from bson import ObjectId
+
+SEED_PASSWORD = "Seed#Pass123"
+SEED_EMAIL_DOMAIN = "seed.example"
+DEFAULT_PROFILE_PICTURE = "https://cdn.pixabay.com/photo/2015/10/05/22/37/blank-profile-picture-973460_960_720.png"
+DEFAULT_POST_IMAGE = "https://www.hostinger.com/tutorials/wp-content/uploads/sites/2/2021/09/how-to-write-a-blog-post.png"
+
+# (category, weight)
+CATEGORIES = [
+    ("javascript", 30), ("reactjs", 20), ("nextjs", 10), ("python", 15),
+    ("devops", 8), ("databases", 7), ("uncategorized", 10)
+]
+# Tags are picked with a power law - a few tags are on most posts
+TAGS = (
+    "tutorial performance beginners webdev testing security docker kubernetes mongodb redis "
+    "fastapi nextjs typescript css career architecture caching async ci observability"
+).split()
+MAX_SEED_TAGS = 4
+WORDS = (
+    "the a and of to in is for on with as by at from api async await cache client cookie "
+    "database deploy docker endpoint fastapi frontend hook index javascript latency mongo "
+    "network performance query react redis request response route schema server session "
+    "state stream test token user worker build component config error event function "
+    "module package promise render service storage update version"
+).split()
+
+KINDS = {"users": 1, "posts": 2, "comments": 3}
+# Documents are spread over this window, oldest first
+HISTORY_DAYS = 730
+# Multiplier used to shuffle popularity ranks (prime larger than any count, so rank -> index is a permutation)
+SHUFFLE_PRIME = 2_147_483_647
+
+def object_id(seed: int, kind: str, index: int, created_at: datetime) -> ObjectId:
+    """Deterministic ObjectId: creation timestamp + seed + kind + index"""
+    return ObjectId(
+        int(created_at.timestamp()).to_bytes(4, "big")
+        + (seed & 0xFFFF).to_bytes(2, "big")
+        + KINDS[kind].to_bytes(1, "big")
+        + index.to_bytes(5, "big")
+    )
+
+def created_at(options: dict, kind: str, index: int) -> datetime:
+    """Creation times grow with the index - signups and posts accumulate over time"""
+    total = max(options[kind], 1)
+    return options["start"] + timedelta(days=HISTORY_DAYS * index / total)
+
+def skewed_index(rng: random.Random, count: int, skew: float) -> int:
+    """Power-law pick: rank 0 is the most popular; ranks are shuffled so popularity doesn't follow age"""
+    rank = int(count * rng.random() ** skew)
+    return (rank * SHUFFLE_PRIME) % count
+
+def user_id(options: dict, index: int) -> str:
+    return str(object_id(options["seed"], "users", index, created_at(options, "users", index)))
+
+def author_index(options: dict, rng: random.Random) -> int:
+    # Authors are the first --authors users (admins)
+    return skewed_index(rng, options["authors"], 2.0)
+
+def build_users(options: dict, start: int, end: int, rng: random.Random) -> list:
+    hashes = options["password_hashes"]
+    docs = []
+    for i in range(start, end):
+        created = created_at(options, "users", i)
+        docs.append({
+            "_id": object_id(options["seed"], "users", i, created),
+            "username": f"user{i}",
+            "email": f"user{i}@{SEED_EMAIL_DOMAIN}",
+            "password": hashes[i % len(hashes)],
+            "profilePicture": DEFAULT_PROFILE_PICTURE,
+            "isAdmin": i < options["authors"],
+            "createdAt": created,
+            "updatedAt": created + timedelta(days=rng.random() * 30)
+        })
+    return docs
+
+def build_posts(options: dict, start: int, end: int, rng: random.Random) -> list:
+    categories = [name for name, _ in CATEGORIES]
+    weights = [weight for _, weight in CATEGORIES]
+    docs = []
+    for i in range(start, end):
+        created = created_at(options, "posts", i)
+        title_words = rng.choices(WORDS, k=rng.randint(3, 9))
+        title = " ".join(title_words).capitalize() + f" {i}"
+        # Lengths are log-normal: mostly short posts, a long tail of long reads
+        words = min(max(int(rng.lognormvariate(5.5, 0.8)), 30), 5000)
+        paragraphs = []
+        while words > 0:
+            size = min(words, rng.randint(40, 120))
+            paragraphs.append("<p>" + " ".join(rng.choices(WORDS, k=size)) + "</p>")
+            words -= size
+        docs.append({
+            "_id": object_id(options["seed"], "posts", i, created),
+            "userId": user_id(options, author_index(options, rng)),
+            "title": title,
+            "content": "".join(paragraphs),
+            "image": DEFAULT_POST_IMAGE,
+            "category": rng.choices(categories, weights)[0],
+            "tags": sorted({TAGS[skewed_index(rng, len(TAGS), 2.0)] for _ in range(rng.randint(0, MAX_SEED_TAGS))}),
+            "slug": "-".join(title.lower().split()),
+            "createdAt": created,
+            "updatedAt": created + timedelta(hours=rng.random() * 48)
+        })
+    return docs
+
+def build_comments(options: dict, start: int, end: int, rng: random.Random) -> list:
+    users, posts = options["users"], options["posts"]
+    # Keep likers a small fraction of users so distinct skewed picks stay cheap
+    max_likes = min(options["max_likes"], users // 10)
+    docs = []
+    for i in range(start, end):
+        post_index = skewed_index(rng, posts, options["comment_skew"])
+        post_created = created_at(options, "posts", post_index)
+        # Most comments arrive soon after the post is published
+        created = min(post_created + timedelta(hours=rng.expovariate(1 / 72)), options["now"])
+        
+        number_of_likes = min(int(rng.paretovariate(1.2)) - 1, max_likes)
+        likes = set()
+        while len(likes) < number_of_likes:
+            likes.add(user_id(options, skewed_index(rng, users, 1.5)))
+        
+        docs.append({
+            "_id": object_id(options["seed"], "comments", i, created),
+            "content": " ".join(rng.choices(WORDS, k=rng.randint(3, 60))),
+            "postId": str(object_id(options["seed"], "posts", post_index, post_created)),
+            "userId": user_id(options, skewed_index(rng, users, 2.0)),
+            "likes": list(likes),
+            "numberOfLikes": number_of_likes,
+            "createdAt": created,
+            "updatedAt": created
+        })
+    return docs
+
+BUILDERS = {"users": build_users, "posts": build_posts, "comments": build_comments}
+
+async def insert_batches(kind: str, batches: list, options: dict) -> int:
+    """Build and insert this worker's batches, a few insert_many calls in flight at a time"""
+    from pymongo.errors import BulkWriteError
+    from ..configs.database import get_database
+    
+    collection = get_database()[kind]
+    semaphore = asyncio.Semaphore(options["parallel"])
+    inserted = 0
+    
+    async def insert(docs: list):
+        nonlocal inserted
+        try:
+            result = await collection.insert_many(docs, ordered=False)
+            inserted += len(result.inserted_ids)
+        except BulkWriteError as e:
+            # Same seed re-run: existing documents are skipped (duplicate _id)
+            inserted += e.details.get("nInserted", 0)
+        finally:
+            semaphore.release()
+    
+    tasks = []
+    for start, end in batches:
+        await semaphore.acquire()
+        # Per-batch RNG - output doesn't depend on the number of processes
+        rng = random.Random(f"{options['seed']}-{kind}-{start}")
+        tasks.append(asyncio.create_task(insert(BUILDERS[kind](options, start, end, rng))))
+    await asyncio.gather(*tasks)
+    return inserted
+
+def _worker(kind: str, batches: list, options: dict) -> int:
+    return asyncio.run(insert_batches(kind, batches, options))
+
+def precompute_password_hashes(count: int) -> list:
+    from ..utils.security import hash_password
+    return [hash_password(SEED_PASSWORD) for _ in range(count)]
+
+async def drop_collections():
+    from ..configs.database import get_database
+    db = get_database()
+    for kind in KINDS:
+        await db.drop_collection(kind)
+    print(f"🗑️ Dropped collections: {', '.join(KINDS)}", file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk benchmark data generator")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--authors", type=int, default=20, help="first N users are admins who write the posts")
+    parser.add_argument("--posts", type=int, default=50000)
+    parser.add_argument("--comments", type=int, default=500000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--processes", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--parallel", type=int, default=4, help="insert_many calls in flight per process")
+    parser.add_argument("--password-hashes", type=int, default=8, help="distinct bcrypt hashes to reuse")
+    parser.add_argument("--max-likes", type=int, default=500)
+    parser.add_argument("--comment-skew", type=float, default=3.0, help="higher = comments concentrate on fewer posts")
+    parser.add_argument("--until", default=datetime.now().strftime("%Y-%m-%d"),
+                        help="end of the generated history (YYYY-MM-DD) - part of the reproducible output")
+    parser.add_argument("--drop", action="store_true", help="drop users/posts/comments before seeding")
+    args = parser.parse_args()
+    
+    if args.users < 1 or args.posts < 1:
+        parser.error("--users and --posts must be at least 1")
+    
+    now = datetime.strptime(args.until, "%Y-%m-%d")
+    options = {
+        "seed": args.seed,
+        "users": args.users,
+        "authors": max(1, min(args.authors, args.users)),
+        "posts": args.posts,
+        "comments": args.comments,
+        "max_likes": args.max_likes,
+        "comment_skew": args.comment_skew,
+        "parallel": args.parallel,
+        # Same --seed and --until => same documents and _ids
+        "now": now,
+        "start": now - timedelta(days=HISTORY_DAYS),
+        "password_hashes": precompute_password_hashes(args.password_hashes)
+    }
+    
+    if args.drop:
+        asyncio.run(drop_collections())
+    
+    # Spawn - each process opens its own MongoDB client
+    context = multiprocessing.get_context("spawn")
+    total_started = time.perf_counter()
+    total_inserted = 0
+    with context.Pool(args.processes) as pool:
+        for kind in KINDS:
+            batches = [
+                (start, min(start + args.batch_size, options[kind]))
+                for start in range(0, options[kind], args.batch_size)
+            ]
+            started = time.perf_counter()
+            # Round-robin batches across processes
+            jobs = [(kind, batches[p::args.processes], options) for p in range(args.processes)]
+            inserted = sum(pool.starmap(_worker, [job for job in jobs if job[1]]))
+            elapsed = time.perf_counter() - started
+            total_inserted += inserted
+            print(f"🌱 {kind}: {inserted} inserted in {elapsed:.1f}s ({inserted / max(elapsed, 1e-9):,.0f} docs/s)", file=sys.stderr)
+    
+    elapsed = time.perf_counter() - total_started
+    print(f"✅ Seeded {total_inserted} documents in {elapsed:.1f}s ({total_inserted / max(elapsed, 1e-9) * 60:,.0f} docs/min)", file=sys.stderr)
+    print(f"🔑 Password for every seeded user: {SEED_PASSWORD}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
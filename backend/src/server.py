@@ -1,10 +1,15 @@
 # server.py (update version)
 # //utils/server.py
 import os
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .routes import auth_route, user_route, post_route, comment_route, debug_route
+from .routes import auth_route, user_route, post_route, comment_route, debug_route, admin_route, feed_route
 from .configs.database import db
+from .utils.metrics import MetricsMiddleware, metrics_endpoint, monitor_event_loop_lag
+from .utils.profiling import ProfilingMiddleware
+from .utils.round_trips import RoundTripMiddleware
+from .utils.slow_query_log import run_slow_query_worker
 
 environment = os.getenv("ENVIRONMENT", "development")
 
@@ -32,11 +37,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ✅ Prometheus metrics (request latency by route template, in-flight requests)
+app.add_middleware(MetricsMiddleware)
+app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
+
+# ✅ Mongo/Redis round trips per request (metrics + X-Round-Trips debug header)
+app.add_middleware(RoundTripMiddleware)
+
+# ✅ On-demand profiling for admins (no-op unless PROFILING_ENABLED=true)
+app.add_middleware(ProfilingMiddleware)
+
 # Include routers
 app.include_router(auth_route.router, prefix="/api/auth")
 app.include_router(user_route.router, prefix="/api/user")
 app.include_router(post_route.router, prefix="/api/post")  
 app.include_router(comment_route.router, prefix="/api/comment")
+app.include_router(admin_route.router, prefix="/api/admin")
+# /feed.xml, /atom.xml, /sitemap.xml
+app.include_router(feed_route.router)
 
 app.include_router(debug_route.router, prefix="/api/debug")
 
@@ -54,6 +72,10 @@ async def startup_event():
         await db.command("ping")
         print("✅ MongoDB connected successfully")
         
+        # Indexes for every model query shape
+        from .configs.indexes import ensure_indexes
+        await ensure_indexes(db)
+        
         # Connect to Redis
         from .configs.redis_client import redis_client
         await redis_client.connect()
@@ -63,6 +85,16 @@ async def startup_event():
         from .utils.admin_setup import setup_admin_user
         await setup_admin_user()
         
+        # Event loop lag sampler for /metrics
+        app.state.loop_lag_task = asyncio.create_task(monitor_event_loop_lag())
+        
+        # Slow-query log (explain + capped collection)
+        app.state.slow_query_task = asyncio.create_task(run_slow_query_worker(db))
+        
+        # Cascade deletions interrupted by a restart
+        from .utils.cascade_delete import cascade_deleter
+        await cascade_deleter.resume_unfinished()
+        
     except Exception as e:
         print(f"❌ Startup failed: {e}")
         raise e
@@ -70,6 +102,11 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Disconnect from Redis on shutdown"""
+    for task_name in ("loop_lag_task", "slow_query_task"):
+        task = getattr(app.state, task_name, None)
+        if task:
+            task.cancel()
+    
     from .configs.redis_client import redis_client
     await redis_client.disconnect()
     print("✅ Redis disconnected")
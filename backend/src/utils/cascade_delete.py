@@ -0,0 +1,214 @@
+# utils/cascade_delete.py
+## Background cascade deletion - a deleted post's / user's dependents are cleaned up after the response
+## - Post: its comments are deleted
+## - User: their likes are pulled, their comments anonymized (or deleted, CASCADE_USER_COMMENTS),
+##   their posts deleted together with those posts' comments
+## - Each phase repeats "fetch up to CASCADE_BATCH_SIZE matching _ids -> one bulk_write" until nothing
+##   matches; a processed document stops matching, so a restarted job simply continues its phase
+## - The job document is checkpointed (phase, processed counts, lease) after every batch
+## - Each batch records its outbox events (comment.updated / comment.deleted / post.deleted)
+##   in the same transaction as the bulk_write, like the model writes; deleted posts' category / tag
+##   counts are taken off in that transaction too
+import asyncio
+import os
+import socket
+from datetime import datetime
+from pymongo import DeleteOne, UpdateOne
+from ..configs.config import CASCADE_BATCH_SIZE, CASCADE_USER_COMMENTS, CASCADE_LEASE_SECONDS, CASCADE_MAX_ATTEMPTS
+from .entity_cache import post_cache, invalidate_dashboard
+from .slug_map import post_slugs
+from ..models.deletion_job_model import UNFINISHED
+from ..models.facet_model import facet_deltas
+
+# userId of comments left behind by a deleted account
+DELETED_USER_ID = "deleted"
+
+# Carried by comment.deleted events
+COMMENT_FIELDS = {"_id": 1, "postId": 1, "userId": 1}
+# Carried by post.deleted events (category / tags for the facet counts)
+POST_FIELDS = {"_id": 1, "userId": 1, "slug": 1, "previousSlugs": 1, "category": 1, "tags": 1}
+
+PHASES = {
+    "post": ["comments"],
+    "user": ["likes", "comments", "posts"],
+}
+
+class CascadeDeleter:
+    def __init__(self):
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        # Strong references - the event loop only keeps weak ones to running tasks
+        self.tasks = set()
+        self._models = None
+    
+    def _collections(self):
+        if self._models is None:
+            from ..configs.database import get_post_collection, get_comment_collection
+            from ..models.deletion_job_model import DeletionJobModel
+            from ..models.outbox_model import OutboxModel
+            from ..models.facet_model import FacetModel
+            self._models = (DeletionJobModel(), get_post_collection(), get_comment_collection())
+            self.outbox = OutboxModel()
+            self.facets = FacetModel()
+        return self._models
+    
+    def new_job(self, kind: str, target_id: str) -> dict:
+        """
+        Job document for a delete - the model inserts it in the delete's transaction, so a deleted
+        post / user always has its cleanup job; launch() it once the delete has committed
+        """
+        job_model, _, _ = self._collections()
+        return job_model.new_job(kind, target_id, PHASES[kind][0])
+    
+    def launch(self, job_id: str):
+        """Run a committed job in the background (resume_unfinished picks it up after a crash)"""
+        self._spawn(job_id)
+    
+    async def start(self, kind: str, target_id: str) -> str:
+        """Record a job and run it in the background - returns the job ID immediately"""
+        job_model, _, _ = self._collections()
+        job_id = await job_model.create_job(kind, target_id, PHASES[kind][0])
+        self._spawn(job_id)
+        return job_id
+    
+    async def resume_unfinished(self):
+        """Startup: pick up jobs interrupted by a restart (leases held elsewhere are skipped)"""
+        job_model, _, _ = self._collections()
+        job_ids = await job_model.find_unfinished_job_ids()
+        for job_id in job_ids:
+            self._spawn(job_id)
+        if job_ids:
+            print(f"🧹 Resuming {len(job_ids)} cascade deletion job(s)")
+    
+    def _spawn(self, job_id: str):
+        task = asyncio.create_task(self.run(job_id))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+    
+    async def run(self, job_id: str):
+        job_model, _, _ = self._collections()
+        for attempt in range(CASCADE_MAX_ATTEMPTS):
+            try:
+                await self._run_once(job_id)
+                return
+            except Exception as e:
+                print(f"❌ Cascade deletion job {job_id} attempt {attempt + 1} failed: {e}")
+                await job_model.release_job(job_id, self.owner, str(e))
+                await asyncio.sleep(min(2 ** attempt, 30))
+        await job_model.finish_job(job_id, "failed", "Too many failed attempts")
+    
+    async def _run_once(self, job_id: str):
+        job_model, _, _ = self._collections()
+        job = await job_model.claim_job(job_id, self.owner, CASCADE_LEASE_SECONDS)
+        while not job:
+            # Held by another worker (or a crashed one) - take over once its lease expires
+            job = await job_model.find_job(job_id)
+            if not job or job["status"] not in UNFINISHED:
+                return
+            wait = (job["lockedUntil"] - datetime.now()).total_seconds() if job["lockedUntil"] else 0
+            await asyncio.sleep(max(wait, 0) + 1)
+            job = await job_model.claim_job(job_id, self.owner, CASCADE_LEASE_SECONDS)
+        
+        phases = PHASES[job["kind"]]
+        for phase in phases[phases.index(job["phase"]):]:
+            step = getattr(self, f"_{job['kind']}_{phase}")
+            if not await job_model.checkpoint(job_id, self.owner, phase, {}, CASCADE_LEASE_SECONDS):
+                return
+            while True:
+                counts = await step(job["targetId"])
+                if counts is None:
+                    break
+                if not await job_model.checkpoint(job_id, self.owner, phase, counts, CASCADE_LEASE_SECONDS):
+                    print(f"⚠️ Cascade deletion job {job_id} lease lost - another worker continues it")
+                    return
+        
+        await job_model.finish_job(job_id, "done")
+        await invalidate_dashboard()
+        print(f"✅ Cascade deletion job {job_id} ({job['kind']} {job['targetId']}) finished")
+    
+    async def _next_batch(self, collection, query: dict, projection: dict = None) -> list:
+        cursor = collection.find(query, projection or {"_id": 1}).limit(CASCADE_BATCH_SIZE)
+        return await cursor.to_list(length=CASCADE_BATCH_SIZE)
+    
+    async def _write_batch(self, collection, operations: list, events: list, facet_changes: dict = None):
+        """bulk_write + the batch's outbox events and facet count changes (one transaction where supported)"""
+        async def write(session):
+            result = await collection.bulk_write(operations, ordered=False, session=session)
+            await self.facets.apply(facet_changes, session)
+            await self.outbox.record_many(events, session)
+            return result
+        return await self.outbox.run_in_transaction(write)
+    
+    async def _delete_comments(self, comments, batch: list):
+        return await self._write_batch(
+            comments,
+            [DeleteOne({"_id": doc["_id"]}) for doc in batch],
+            [("comment.deleted", str(doc["_id"]), {"postId": doc.get("postId"), "userId": doc.get("userId")}) for doc in batch]
+        )
+    
+    async def _post_comments(self, post_id: str):
+        _, _, comments = self._collections()
+        batch = await self._next_batch(comments, {"postId": post_id}, COMMENT_FIELDS)
+        if not batch:
+            return None
+        result = await self._delete_comments(comments, batch)
+        return {"comments": result.deleted_count}
+    
+    async def _user_likes(self, user_id: str):
+        _, _, comments = self._collections()
+        batch = await self._next_batch(comments, {"likes": user_id})
+        if not batch:
+            return None
+        result = await self._write_batch(comments, [
+            # likes in the filter - a concurrent unlike can't be decremented twice
+            UpdateOne({"_id": doc["_id"], "likes": user_id}, {"$pull": {"likes": user_id}, "$inc": {"numberOfLikes": -1}})
+            for doc in batch
+        ], [("comment.updated", str(doc["_id"]), {"unlikedBy": user_id}) for doc in batch])
+        return {"likes": result.modified_count}
+    
+    async def _user_comments(self, user_id: str):
+        _, _, comments = self._collections()
+        batch = await self._next_batch(comments, {"userId": user_id}, COMMENT_FIELDS)
+        if not batch:
+            return None
+        if CASCADE_USER_COMMENTS == "delete":
+            result = await self._delete_comments(comments, batch)
+            return {"comments": result.deleted_count}
+        result = await self._write_batch(comments, [
+            UpdateOne({"_id": doc["_id"]}, {"$set": {"userId": DELETED_USER_ID}})
+            for doc in batch
+        ], [("comment.updated", str(doc["_id"]), {"userId": DELETED_USER_ID}) for doc in batch])
+        return {"anonymizedComments": result.modified_count}
+    
+    async def _user_posts(self, user_id: str):
+        """One batch of the user's posts: their comments first, the posts once no comments are left"""
+        _, posts, comments = self._collections()
+        batch = await self._next_batch(posts, {"userId": user_id}, POST_FIELDS)
+        if not batch:
+            return None
+        
+        post_ids = [str(doc["_id"]) for doc in batch]
+        comment_batch = await self._next_batch(comments, {"postId": {"$in": post_ids}}, COMMENT_FIELDS)
+        if comment_batch:
+            result = await self._delete_comments(comments, comment_batch)
+            return {"comments": result.deleted_count}
+        
+        result = await self._write_batch(
+            posts,
+            [DeleteOne({"_id": doc["_id"]}) for doc in batch],
+            [("post.deleted", str(doc["_id"]), doc) for doc in batch],
+            self._removed_facets(batch)
+        )
+        slugs = [slug for doc in batch for slug in [doc.get("slug"), *doc.get("previousSlugs", [])] if slug]
+        await asyncio.gather(*(post_cache.invalidate(post_id) for post_id in post_ids))
+        if slugs:
+            await post_slugs.forget(*slugs)
+        return {"posts": result.deleted_count}
+    
+    def _removed_facets(self, posts: list) -> dict:
+        deltas = {}
+        for post in posts:
+            for facet, delta in facet_deltas(post, None).items():
+                deltas[facet] = deltas.get(facet, 0) + delta
+        return deltas
+
+cascade_deleter = CascadeDeleter()
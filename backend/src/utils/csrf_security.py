@@ -1,13 +1,31 @@
 # utils/csrf_security.py (Optimized Version)
 import secrets
 from fastapi import HTTPException, status
-from ..configs.redis_client import redis_client
+from ..configs.redis_client import redis_client, RedisUnavailableError
+from ..configs.config import DEGRADED_CACHE_MAX_ENTRIES
+from .local_cache import LocalTTLCache
 
 class CSRFProtection:
     def __init__(self):
         # ✅ CSRF token ကို session တစ်ခုလုံးအတွက် သိမ်းထားမယ်
         # Frontend က multiple requests လုပ်နိုင်အောင်
         self.token_expiry = 1 * 60  # 15 minutes (session duration)
+        
+        # ✅ Degraded mode: tokens issued/verified by this process recently
+        # Redis မရတဲ့အချိန်မှာ ဒီ cache နဲ့ verify လုပ်မယ်
+        self.local_tokens = LocalTTLCache(DEGRADED_CACHE_MAX_ENTRIES, self.token_expiry)
+    
+    def token_key(self, user_id: str, token: str) -> str:
+        """Redis key for a user's CSRF token (token="*" gives the user's key pattern)"""
+        return f"csrf_token:{user_id}:{token}"
+    
+    def build_csrf_token(self) -> str:
+        """Random CSRF token value (caller stores it, e.g. inside a pipeline)"""
+        return secrets.token_urlsafe(32)
+    
+    def remember_token(self, user_id: str, token: str):
+        """Keep token in the in-process degraded-mode cache"""
+        self.local_tokens.set(self.token_key(user_id, token))
     
     async def generate_csrf_token(self, user_id: str = None) -> str:
         """
@@ -15,14 +33,18 @@ class CSRFProtection:
         - User-based token: Redis ထဲမှာ သိမ်းမယ်
         - Anonymous token: သိမ်းစရာမလိုဘူး
         """
-        csrf_token = secrets.token_urlsafe(32)
+        csrf_token = self.build_csrf_token()
         
         if user_id:
-            key = f"csrf_token:{user_id}:{csrf_token}"
+            key = self.token_key(user_id, csrf_token)
+            self.remember_token(user_id, csrf_token)
             success = await redis_client.set_key(key, "valid", self.token_expiry)
             if not success:
-                print(f"❌ Failed to store CSRF token in Redis for user: {user_id}")
-                raise Exception("Failed to store CSRF token in Redis")
+                if redis_client.is_available:
+                    print(f"❌ Failed to store CSRF token in Redis for user: {user_id}")
+                    raise Exception("Failed to store CSRF token in Redis")
+                # Degraded mode - token is only known to this process
+                print(f"⚠️ Redis unavailable - CSRF token kept in local cache for user: {user_id}")
             print(f"✅ Generated CSRF token for user: {user_id} (expires in {self.token_expiry}s)")
         else:
             print(f"✅ Generated anonymous CSRF token")
@@ -40,11 +62,18 @@ class CSRFProtection:
             return False
         
         if user_id:
-            key = f"csrf_token:{user_id}:{token}"
-            exists = await redis_client.exists_key(key)
+            key = self.token_key(user_id, token)
+            try:
+                exists = await redis_client.exists_key(key, raise_errors=True)
+            except RedisUnavailableError:
+                # ✅ Degraded mode - Redis မရရင် recently seen tokens နဲ့ စစ်မယ်
+                exists = key in self.local_tokens
+                print(f"⚠️ Redis unavailable - CSRF token checked against local cache: {exists}")
+                return exists
             if exists:
                 # ✅ CORRECT: Token verified successfully - DON'T DELETE
                 # Frontend က同一个 token နဲ့ multiple requests လုပ်နိုင်အောင်
+                self.remember_token(user_id, token)
                 print(f"✅ CSRF token verified for user: {user_id}")
                 return True
             else:
@@ -65,7 +94,8 @@ class CSRFProtection:
                 print("❌ No user_id provided for CSRF token revocation")
                 return False
                 
-            pattern = f"csrf_token:{user_id}:*"
+            self.local_tokens.delete_prefix(self.token_key(user_id, ""))
+            pattern = self.token_key(user_id, "*")
             success = await redis_client.delete_pattern(pattern)
             
             if success:
@@ -179,10 +209,13 @@ class CSRFProtection:
         - Batch operations အတွက် useful
         """
         try:
-            results = {}
-            
-            for token in tokens:
-                results[token] = await self.verify_csrf_token(token, user_id)
+            if user_id:
+                # ✅ One pipelined round trip instead of one EXISTS per token
+                keys = [self.token_key(user_id, token) for token in tokens]
+                exists = await redis_client.exists_many(keys)
+                results = {token: bool(token) and found for token, found in zip(tokens, exists)}
+            else:
+                results = {token: bool(token) for token in tokens}
             
             print(f"✅ Bulk verified {len(tokens)} CSRF tokens for user: {user_id}")
             return {
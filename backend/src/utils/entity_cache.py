@@ -0,0 +1,119 @@
+# utils/entity_cache.py
+## Two-tier cache for single-post and user-profile lookups
+## - Tier 1: bounded in-process LRU (short TTL), tier 2: Redis (JSON, ENTITY_CACHE_TTL_SECONDS)
+## - Concurrent misses for the same id share one MongoDB load (request coalescing)
+## - PostController / UserController call invalidate() after update and delete
+## - The admin dashboard stats are cached the same way, dropped by every content write
+import asyncio
+import json
+from ..configs.redis_client import redis_client
+from ..configs.config import (
+    ENTITY_CACHE_ENABLED,
+    ENTITY_CACHE_TTL_SECONDS,
+    ENTITY_CACHE_LOCAL_TTL_SECONDS,
+    ENTITY_CACHE_MAX_ENTRIES,
+    DASHBOARD_CACHE_TTL_SECONDS
+)
+from .local_cache import LocalTTLCache
+from .metrics import ENTITY_CACHE_REQUESTS, ENTITY_CACHE_EVICTIONS, ENTITY_CACHE_COALESCED
+
+class EntityCache:
+    """
+    Cache-aside for JSON-serializable values (response dicts, never raw documents)
+    - Not-found results are not cached
+    - A load that overlaps an invalidation is returned but not stored, so a
+      slow read can't put the pre-update value back
+    """
+    def __init__(
+        self,
+        name: str,
+        ttl: int = ENTITY_CACHE_TTL_SECONDS,
+        local_ttl: float = ENTITY_CACHE_LOCAL_TTL_SECONDS,
+        max_entries: int = ENTITY_CACHE_MAX_ENTRIES
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.local = LocalTTLCache(
+            max_entries,
+            local_ttl,
+            on_evict=ENTITY_CACHE_EVICTIONS.labels(name).inc
+        )
+        self.in_flight = {}
+        # Bumped on every invalidation
+        self.epoch = 0
+    
+    def _redis_key(self, entity_id: str) -> str:
+        return f"cache:{self.name}:{entity_id}"
+    
+    async def get(self, entity_id: str, loader):
+        """Cached value for entity_id, or `await loader()` on a miss"""
+        if not ENTITY_CACHE_ENABLED:
+            return await loader()
+        
+        value = self.local.get(entity_id)
+        if value is not None:
+            ENTITY_CACHE_REQUESTS.labels(self.name, "local").inc()
+            return value
+        
+        # ✅ Hot key: wait for the load that is already running
+        task = self.in_flight.get(entity_id)
+        if task is not None:
+            ENTITY_CACHE_COALESCED.labels(self.name).inc()
+            return await asyncio.shield(task)
+        
+        task = asyncio.ensure_future(self._load(entity_id, loader))
+        self.in_flight[entity_id] = task
+        try:
+            # shield - a cancelled request must not cancel the load other requests wait on
+            return await asyncio.shield(task)
+        finally:
+            if self.in_flight.get(entity_id) is task:
+                del self.in_flight[entity_id]
+    
+    async def _load(self, entity_id: str, loader):
+        epoch = self.epoch
+        key = self._redis_key(entity_id)
+        
+        cached = await redis_client.get_key(key)
+        if cached is not None:
+            ENTITY_CACHE_REQUESTS.labels(self.name, "redis").inc()
+            value = json.loads(cached)
+        else:
+            ENTITY_CACHE_REQUESTS.labels(self.name, "miss").inc()
+            value = await loader()
+            if value is None:
+                return None
+            if epoch == self.epoch:
+                await redis_client.set_key(key, json.dumps(value), self.ttl)
+        
+        if epoch == self.epoch:
+            self.local.set(entity_id, value)
+        return value
+    
+    async def invalidate(self, entity_id: str):
+        """Drop entity_id from both tiers (call after the write succeeded)"""
+        self.epoch += 1
+        self.local.delete(entity_id)
+        self.in_flight.pop(entity_id, None)
+        await redis_client.delete_key(self._redis_key(entity_id))
+    
+    def get_stats(self) -> dict:
+        return {
+            "local_entries": len(self.local),
+            "local_max_entries": self.local.max_entries,
+            "local_evictions": self.local.evictions,
+            "in_flight": len(self.in_flight)
+        }
+
+post_cache = EntityCache("post")
+user_cache = EntityCache("user")
+# One entry ("stats") - any post/comment/user write drops it
+dashboard_cache = EntityCache(
+    "dashboard",
+    ttl=DASHBOARD_CACHE_TTL_SECONDS,
+    local_ttl=min(ENTITY_CACHE_LOCAL_TTL_SECONDS, DASHBOARD_CACHE_TTL_SECONDS),
+    max_entries=1
+)
+
+async def invalidate_dashboard():
+    await dashboard_cache.invalidate("stats")
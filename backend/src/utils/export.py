@@ -0,0 +1,80 @@
+# utils/export.py
+## NDJSON exports of posts / comments / users for backups and analytics - one document per line
+## - Streamed from an _id-ordered cursor EXPORT_BATCH_SIZE documents at a time: memory stays at
+##   one batch however large the collection, and there is no skip or count per page
+## - Resumable: every line carries its _id - pass the last one as `after` to continue an interrupted export
+## - Lines are MongoDB Relaxed Extended JSON ({"$oid": ...}, {"$date": ...}) - mongoimport reads them back
+## - Secret fields (users.password) are excluded by the projection and can't be asked for
+import re
+import zlib
+from bson import ObjectId, json_util
+from bson.errors import InvalidId
+from ..configs.config import EXPORT_BATCH_SIZE
+
+EXPORT_COLLECTIONS = ("posts", "comments", "users")
+SECRET_FIELDS = {"users": ("password",)}
+FIELD_RE = re.compile(r"^[A-Za-z][A-Za-z0-9_]*(\.[A-Za-z0-9_]+)*$")
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+GZIP_MEDIA_TYPE = "application/gzip"
+
+def parse_after(after: str = None):
+    """Resume point -> ObjectId (None = from the start); ValueError if it isn't one"""
+    if not after:
+        return None
+    try:
+        return ObjectId(after)
+    except (InvalidId, TypeError):
+        raise ValueError(f"after must be a document _id, got {after!r}")
+
+def export_projection(collection: str, fields: list = None):
+    """
+    Projection for an export: the requested fields (plus _id, which resuming needs) or every field;
+    secret fields are never included. ValueError for an unknown collection or a bad field name
+    """
+    if collection not in EXPORT_COLLECTIONS:
+        raise ValueError(f"Unknown export {collection!r} (one of: {', '.join(EXPORT_COLLECTIONS)})")
+    secret = SECRET_FIELDS.get(collection, ())
+    if not fields:
+        return {field: 0 for field in secret} or None
+    
+    projection = {}
+    for field in fields:
+        if not FIELD_RE.match(field):
+            raise ValueError(f"Invalid field name {field!r}")
+        if field.split(".")[0] in secret or field == "_id":
+            continue
+        projection[field] = 1
+    if not projection:
+        raise ValueError("No exportable fields requested")
+    return projection
+
+async def export_batches(collection: str, after: ObjectId = None, fields: list = None, limit: int = 0, batch_size: int = EXPORT_BATCH_SIZE):
+    """Yields (ndjson bytes, last _id, documents) per batch of the cursor"""
+    from ..models.export_model import ExportModel
+    
+    projection = export_projection(collection, fields)
+    cursor = ExportModel().find_after(collection, after, projection, batch_size, limit)
+    lines, last_id = [], None
+    try:
+        async for document in cursor:
+            lines.append(json_util.dumps(document, json_options=json_util.RELAXED_JSON_OPTIONS))
+            last_id = document["_id"]
+            if len(lines) == batch_size:
+                yield ("\n".join(lines) + "\n").encode(), last_id, len(lines)
+                lines = []
+        if lines:
+            yield ("\n".join(lines) + "\n").encode(), last_id, len(lines)
+    finally:
+        # Client went away mid-export - free the server-side cursor now, not at its timeout
+        await cursor.close()
+
+async def export_stream(collection: str, after: ObjectId = None, fields: list = None, limit: int = 0, compress: bool = False):
+    """Response body: NDJSON bytes, or one gzip stream of them"""
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    async for data, _, _ in export_batches(collection, after, fields, limit):
+        if compressor:
+            data = compressor.compress(data)
+        if data:
+            yield data
+    if compressor:
+        yield compressor.flush()
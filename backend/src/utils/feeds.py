@@ -0,0 +1,341 @@
+# utils/feeds.py
+## RSS / Atom feeds and sitemaps - prebuilt XML files on local disk, served as static files
+## - Files live in FEED_CACHE_DIR/<generation>/; the generation is a counter the outbox "feeds"
+##   consumer bumps after post creates / updates / deletes, so nothing is rebuilt while posts don't change
+## - A build streams posts from a Motor cursor with a projection into a temporary file that is
+##   renamed into place (memory stays flat): the newest FEED_MAX_ITEMS posts for the feeds, every
+##   post in _id order for the sitemap
+## - A sitemap file holds at most SITEMAP_MAX_URLS URLs: past that, sitemap.xml is a sitemap index
+##   of sitemap-1.xml, sitemap-2.xml, ...
+## - Requests for a new generation get the previous generation's file while it is rebuilt in the
+##   background; only the very first build of a file runs inside a request
+import asyncio
+import html
+import os
+import re
+import shutil
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from email.utils import format_datetime
+from xml.sax.saxutils import escape, quoteattr
+from ..configs.config import (
+    SITE_URL,
+    SITE_TITLE,
+    FEED_CACHE_DIR,
+    FEED_MAX_ITEMS,
+    SITEMAP_MAX_URLS,
+    FEED_GENERATION_TTL_SECONDS
+)
+from .metrics import FEED_BUILDS, FEED_BUILD_DURATION
+
+FEED_GENERATION_COUNTER = "feeds"
+# Artifact -> the file whose presence means it is complete (sitemap chunks are renamed in first)
+ARTIFACT_FILES = {"rss": "feed.xml", "atom": "atom.xml", "sitemap": "sitemap.xml"}
+SITEMAP_CHUNK_RE = re.compile(r"^sitemap-(\d+)\.xml$")
+TAG_RE = re.compile(r"<[^>]+>")
+SUMMARY_LENGTH = 300
+# Posts per cursor batch while writing a sitemap
+SITEMAP_BATCH_SIZE = 1000
+# Buffered text is written to disk in chunks of about this many characters
+WRITE_CHUNK_SIZE = 64 * 1024
+
+def post_url(slug: str) -> str:
+    return f"{SITE_URL}/post/{slug}"
+
+def post_guid(post_id) -> str:
+    """Stable across slug changes"""
+    return f"{SITE_URL}/api/post/public/{post_id}"
+
+def summary(content: str) -> str:
+    """Plain-text excerpt of a post's HTML content"""
+    text = " ".join(html.unescape(TAG_RE.sub(" ", content or "")).split())
+    if len(text) <= SUMMARY_LENGTH:
+        return text
+    return text[:SUMMARY_LENGTH].rsplit(" ", 1)[0] + "…"
+
+def local_time(value: datetime = None) -> datetime:
+    """Stored datetimes are naive local times (datetime.now())"""
+    return (value or datetime.now()).astimezone()
+
+def rfc822(value: datetime = None) -> str:
+    return format_datetime(local_time(value))
+
+def w3c(value: datetime = None) -> str:
+    return local_time(value).isoformat(timespec="seconds")
+
+def artifact_for(name: str):
+    """File name -> artifact that produces it (None for anything else)"""
+    for artifact, file_name in ARTIFACT_FILES.items():
+        if name == file_name:
+            return artifact
+    return "sitemap" if SITEMAP_CHUNK_RE.match(name) else None
+
+class ArtifactWriter:
+    """Buffered text written off the event loop to a temporary file; commit() renames it into place"""
+    def __init__(self, path: str):
+        self.path = path
+        self.temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        self.file = open(self.temp_path, "w", encoding="utf-8")
+        self.buffer = []
+        self.buffered = 0
+    
+    async def write(self, text: str):
+        self.buffer.append(text)
+        self.buffered += len(text)
+        if self.buffered >= WRITE_CHUNK_SIZE:
+            await self.flush()
+    
+    async def flush(self):
+        data = "".join(self.buffer)
+        self.buffer = []
+        self.buffered = 0
+        if data:
+            await asyncio.to_thread(self.file.write, data)
+    
+    async def commit(self, path: str = None):
+        await self.flush()
+        self.file.close()
+        os.replace(self.temp_path, path or self.path)
+    
+    def discard(self):
+        self.file.close()
+        try:
+            os.remove(self.temp_path)
+        except FileNotFoundError:
+            pass
+
+class FeedArtifacts:
+    def __init__(self, cache_dir: str = FEED_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._generation = None
+        self._checked_at = 0.0
+        self._locks = {artifact: asyncio.Lock() for artifact in ARTIFACT_FILES}
+        # Strong references to background rebuilds
+        self.tasks = set()
+        self._posts = None
+        self._counter_model = None
+    
+    def _post_model(self):
+        if self._posts is None:
+            from ..models.post_model import PostModel
+            self._posts = PostModel()
+        return self._posts
+    
+    def _counters(self):
+        if self._counter_model is None:
+            from ..models.counter_model import CounterModel
+            self._counter_model = CounterModel()
+        return self._counter_model
+    
+    async def generation(self) -> int:
+        """Current generation, re-read at most every FEED_GENERATION_TTL_SECONDS"""
+        now = time.monotonic()
+        if self._generation is None or now - self._checked_at >= FEED_GENERATION_TTL_SECONDS:
+            self._generation = await self._counters().get(FEED_GENERATION_COUNTER)
+            self._checked_at = now
+        return self._generation
+    
+    async def bump_generation(self) -> int:
+        """Posts changed - every process rebuilds on its next request"""
+        return await self._counters().increment(FEED_GENERATION_COUNTER)
+    
+    def _directory(self, generation: int) -> str:
+        return os.path.join(self.cache_dir, str(generation))
+    
+    def _is_built(self, artifact: str, generation: int) -> bool:
+        return os.path.exists(os.path.join(self._directory(generation), ARTIFACT_FILES[artifact]))
+    
+    def _built_generations(self) -> list:
+        """Generations with a directory on disk, newest first"""
+        try:
+            names = os.listdir(self.cache_dir)
+        except FileNotFoundError:
+            return []
+        return sorted((int(name) for name in names if name.isdigit()), reverse=True)
+    
+    async def get(self, name: str):
+        """(path, generation) of a prebuilt file, building it if needed; None if there is no such file"""
+        artifact = artifact_for(name)
+        if artifact is None:
+            return None
+        generation = await self.generation()
+        if not self._is_built(artifact, generation):
+            previous = next(
+                (built for built in self._built_generations() if built < generation and self._is_built(artifact, built)),
+                None
+            )
+            if previous is None:
+                await self.build(artifact, generation, mode="inline")
+            else:
+                self._build_in_background(artifact, generation)
+                generation = previous
+        path = os.path.join(self._directory(generation), name)
+        return (path, generation) if os.path.exists(path) else None
+    
+    def _build_in_background(self, artifact: str, generation: int):
+        if self._locks[artifact].locked():
+            return
+        task = asyncio.create_task(self.build(artifact, generation, mode="background"))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+    
+    async def build(self, artifact: str, generation: int, mode: str = "inline"):
+        """One build per artifact at a time in this process; other processes may build the same files"""
+        async with self._locks[artifact]:
+            if self._is_built(artifact, generation):
+                return
+            directory = self._directory(generation)
+            os.makedirs(directory, exist_ok=True)
+            started = time.perf_counter()
+            try:
+                await getattr(self, f"_build_{artifact}")(directory)
+            except Exception as e:
+                print(f"❌ Building {ARTIFACT_FILES[artifact]} (generation {generation}) failed: {e}")
+                if mode == "inline":
+                    raise
+                return
+            FEED_BUILDS.labels(artifact, mode).inc()
+            FEED_BUILD_DURATION.labels(artifact).observe(time.perf_counter() - started)
+            self._remove_superseded()
+    
+    def _remove_superseded(self):
+        """
+        Drop generation directories whose every file has two newer builds - get() may have just
+        handed out the previous build of a file (served while the new one was built), so the
+        directory one build back stays until the build after that
+        """
+        generations = self._built_generations()
+        newer = Counter()
+        for generation in generations:
+            built = [artifact for artifact in ARTIFACT_FILES if self._is_built(artifact, generation)]
+            # A directory with nothing built yet may have a build in progress
+            if built and all(newer[artifact] >= 2 for artifact in built):
+                shutil.rmtree(self._directory(generation), ignore_errors=True)
+            newer.update(built)
+    
+    async def _build_rss(self, directory: str):
+        writer = ArtifactWriter(os.path.join(directory, ARTIFACT_FILES["rss"]))
+        try:
+            await writer.write(
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom">\n<channel>\n'
+                f"<title>{escape(SITE_TITLE)}</title>\n"
+                f"<link>{escape(SITE_URL)}/</link>\n"
+                f"<description>{escape(SITE_TITLE)} - latest posts</description>\n"
+                f"<lastBuildDate>{rfc822()}</lastBuildDate>\n"
+                f"<atom:link href={quoteattr(SITE_URL + '/feed.xml')} rel=\"self\" type=\"application/rss+xml\"/>\n"
+            )
+            async for post in self._post_model().find_feed_posts(FEED_MAX_ITEMS):
+                categories = "".join(
+                    f"<category>{escape(term)}</category>"
+                    for term in [post.get("category"), *(post.get("tags") or [])] if term
+                )
+                await writer.write(
+                    "<item>"
+                    f"<title>{escape(post.get('title', ''))}</title>"
+                    f"<link>{escape(post_url(post['slug']))}</link>"
+                    f"<guid isPermaLink=\"false\">{escape(post_guid(post['_id']))}</guid>"
+                    f"<pubDate>{rfc822(post.get('createdAt'))}</pubDate>"
+                    f"<description>{escape(summary(post.get('content')))}</description>"
+                    f"{categories}"
+                    "</item>\n"
+                )
+            await writer.write("</channel>\n</rss>\n")
+            await writer.commit()
+        except BaseException:
+            writer.discard()
+            raise
+    
+    async def _build_atom(self, directory: str):
+        writer = ArtifactWriter(os.path.join(directory, ARTIFACT_FILES["atom"]))
+        try:
+            await writer.write(
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<feed xmlns="http://www.w3.org/2005/Atom">\n'
+                f"<id>{escape(SITE_URL)}/</id>\n"
+                f"<title>{escape(SITE_TITLE)}</title>\n"
+                f"<updated>{w3c()}</updated>\n"
+                f"<author><name>{escape(SITE_TITLE)}</name></author>\n"
+                f"<link href={quoteattr(SITE_URL + '/')}/>\n"
+                f"<link rel=\"self\" href={quoteattr(SITE_URL + '/atom.xml')}/>\n"
+            )
+            async for post in self._post_model().find_feed_posts(FEED_MAX_ITEMS):
+                categories = "".join(
+                    f"<category term={quoteattr(term)}/>"
+                    for term in [post.get("category"), *(post.get("tags") or [])] if term
+                )
+                await writer.write(
+                    "<entry>"
+                    f"<id>{escape(post_guid(post['_id']))}</id>"
+                    f"<title>{escape(post.get('title', ''))}</title>"
+                    f"<link href={quoteattr(post_url(post['slug']))}/>"
+                    f"<published>{w3c(post.get('createdAt'))}</published>"
+                    f"<updated>{w3c(post.get('updatedAt') or post.get('createdAt'))}</updated>"
+                    f"<summary>{escape(summary(post.get('content')))}</summary>"
+                    f"{categories}"
+                    "</entry>\n"
+                )
+            await writer.write("</feed>\n")
+            await writer.commit()
+        except BaseException:
+            writer.discard()
+            raise
+    
+    async def _build_sitemap(self, directory: str):
+        """
+        sitemap-N.xml files of up to SITEMAP_MAX_URLS URLs, then sitemap.xml last: the only file
+        when everything fits in one, otherwise the index of the others
+        """
+        urlset_open = '<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        urlset_close = "</urlset>\n"
+        chunks = []
+        writer = ArtifactWriter(os.path.join(directory, "sitemap-1.xml"))
+        try:
+            await writer.write(urlset_open)
+            await writer.write(f"<url><loc>{escape(SITE_URL)}/</loc></url>\n")
+            urls, lastmod = 1, None
+            async for post in self._post_model().find_sitemap_posts(SITEMAP_BATCH_SIZE):
+                if urls == SITEMAP_MAX_URLS:
+                    await writer.write(urlset_close)
+                    await writer.commit()
+                    chunks.append(lastmod)
+                    writer = ArtifactWriter(os.path.join(directory, f"sitemap-{len(chunks) + 1}.xml"))
+                    await writer.write(urlset_open)
+                    urls, lastmod = 0, None
+                updated = post.get("updatedAt")
+                if updated and (lastmod is None or updated > lastmod):
+                    lastmod = updated
+                await writer.write(
+                    f"<url><loc>{escape(post_url(post['slug']))}</loc>"
+                    + (f"<lastmod>{w3c(updated)}</lastmod>" if updated else "")
+                    + "</url>\n"
+                )
+                urls += 1
+            await writer.write(urlset_close)
+            if not chunks:
+                await writer.commit(os.path.join(directory, ARTIFACT_FILES["sitemap"]))
+                return
+            await writer.commit()
+            chunks.append(lastmod)
+        except BaseException:
+            writer.discard()
+            raise
+        
+        index = ArtifactWriter(os.path.join(directory, ARTIFACT_FILES["sitemap"]))
+        try:
+            await index.write('<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+            for number, chunk_lastmod in enumerate(chunks, start=1):
+                await index.write(
+                    f"<sitemap><loc>{escape(SITE_URL)}/sitemap-{number}.xml</loc>"
+                    + (f"<lastmod>{w3c(chunk_lastmod)}</lastmod>" if chunk_lastmod else "")
+                    + "</sitemap>\n"
+                )
+            await index.write("</sitemapindex>\n")
+            await index.commit()
+        except BaseException:
+            index.discard()
+            raise
+
+feed_artifacts = FeedArtifacts()
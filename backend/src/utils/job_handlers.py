@@ -0,0 +1,9 @@
+# utils/job_handlers.py
+## Handlers for background jobs - each one is safe to run more than once for the same job ID
+from .job_queue import job_queue
+from .csrf_security import csrf_protection
+
+@job_queue.handler("user.revoke_csrf_tokens")
+async def revoke_csrf_tokens(job_id: str, payload: dict):
+    """Deleted user's CSRF tokens (KEYS scan + DEL) - their refresh token is revoked inline"""
+    await csrf_protection.revoke_user_csrf_tokens(payload["userId"])
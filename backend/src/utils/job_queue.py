@@ -0,0 +1,214 @@
+# utils/job_queue.py
+## Background jobs on a Redis Stream with one consumer group
+## - enqueue_many() is one pipelined XADD; without Redis (or JOB_QUEUE_ENABLED=false) the handlers run inline
+## - Workers (`python -m src.worker`) read with XREADGROUP and XACK once the handler succeeded
+## - A failed job stays pending and is re-claimed (XCLAIM) after JOB_RETRY_SECONDS * 2^(deliveries-1);
+##   after JOB_MAX_ATTEMPTS deliveries it moves to the dead-letter stream. Jobs a crashed worker
+##   left pending are re-claimed the same way
+## - Delivery is at-least-once: handlers get the job ID as idempotency key, and a done marker
+##   skips jobs that succeeded but whose XACK was lost
+import asyncio
+import json
+import os
+import socket
+import time
+import uuid
+from datetime import datetime
+from ..configs.redis_client import redis_client
+from ..configs.config import (
+    JOB_QUEUE_ENABLED,
+    JOB_STREAM_MAXLEN,
+    JOB_MAX_ATTEMPTS,
+    JOB_RETRY_SECONDS,
+    JOB_BATCH_SIZE,
+    JOB_BLOCK_MS
+)
+from .metrics import JOBS_ENQUEUED, JOBS_PROCESSED, JOB_DURATION
+
+JOB_STREAM = "jobs:stream"
+JOB_GROUP = "workers"
+DEAD_LETTER_STREAM = "jobs:dead"
+DONE_KEY_TTL_SECONDS = 24 * 60 * 60
+# Pending entries looked at per retry scan (some may still be backing off)
+PENDING_SCAN_SIZE = 100
+MAX_TRACKED_ERRORS = 1000
+
+class JobQueue:
+    def __init__(
+        self,
+        stream: str = JOB_STREAM,
+        group: str = JOB_GROUP,
+        dead_letter_stream: str = DEAD_LETTER_STREAM,
+        retry_seconds: float = JOB_RETRY_SECONDS,
+        max_attempts: int = JOB_MAX_ATTEMPTS
+    ):
+        self.stream = stream
+        self.group = group
+        self.dead_letter_stream = dead_letter_stream
+        self.retry_seconds = retry_seconds
+        self.max_attempts = max_attempts
+        self.handlers = {}
+        self.consumer = f"{socket.gethostname()}:{os.getpid()}"
+        self.running = False
+        # Last error per entry, copied into the dead letter
+        self.last_errors = {}
+    
+    def handler(self, name: str):
+        """Register `async def handler(job_id, payload)` for a job name"""
+        def register(func):
+            self.handlers[name] = func
+            return func
+        return register
+    
+    def _load_handlers(self):
+        if not self.handlers and self.stream == JOB_STREAM:
+            from . import job_handlers  # noqa: F401 - registers the handlers
+    
+    async def enqueue(self, name: str, payload: dict = None) -> str:
+        """Queue one job and return its ID"""
+        return (await self.enqueue_many([(name, payload or {})]))[0]
+    
+    async def enqueue_many(self, jobs: list) -> list:
+        """Queue [(name, payload), ...] in one round trip and return their IDs"""
+        self._load_handlers()
+        if JOB_QUEUE_ENABLED and redis_client.is_available:
+            try:
+                batch = redis_client.pipeline()
+                async with batch as pipe:
+                    for name, payload in jobs:
+                        pipe.xadd(
+                            self.stream,
+                            {"job": name, "payload": json.dumps(payload)},
+                            maxlen=JOB_STREAM_MAXLEN,
+                            approximate=True
+                        )
+                for name, _ in jobs:
+                    JOBS_ENQUEUED.labels(name, "queued").inc()
+                return batch.results
+            except Exception as e:
+                print(f"⚠️ Job enqueue failed, running inline: {e}")
+        
+        # Queue unavailable - run the same handlers inside the request
+        job_ids = []
+        for name, payload in jobs:
+            job_id = f"inline-{uuid.uuid4().hex}"
+            JOBS_ENQUEUED.labels(name, "inline").inc()
+            try:
+                await self.handlers[name](job_id, payload)
+            except Exception as e:
+                print(f"❌ Inline job {name} failed: {e}")
+            job_ids.append(job_id)
+        return job_ids
+    
+    async def run_worker(self):
+        """Consume jobs until stop() is called"""
+        self._load_handlers()
+        await redis_client.xgroup_create(self.stream, self.group)
+        self.running = True
+        print(f"👷 Job worker {self.consumer} consuming {self.stream} ({', '.join(sorted(self.handlers))})")
+        
+        last_retry_scan = 0.0
+        while self.running:
+            try:
+                if time.monotonic() - last_retry_scan >= min(self.retry_seconds, 1):
+                    last_retry_scan = time.monotonic()
+                    await self._retry_pending()
+                
+                entries = await redis_client.xreadgroup(self.group, self.consumer, self.stream, JOB_BATCH_SIZE, JOB_BLOCK_MS)
+                for entry_id, fields in entries:
+                    await self._process(entry_id, fields)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Job worker error: {e}")
+                await asyncio.sleep(1)
+        print(f"👷 Job worker {self.consumer} stopped")
+    
+    def stop(self):
+        self.running = False
+    
+    async def _retry_pending(self):
+        """Re-run failed jobs (and jobs of crashed workers) whose backoff has passed"""
+        min_idle_ms = int(self.retry_seconds * 1000)
+        pending = await redis_client.xpending(self.stream, self.group, PENDING_SCAN_SIZE, min_idle_ms)
+        for entry in pending:
+            deliveries = entry["times_delivered"]
+            backoff_ms = min_idle_ms * 2 ** (deliveries - 1)
+            if entry["time_since_delivered"] < backoff_ms:
+                continue
+            
+            # min idle again - another worker may have claimed it in the meantime
+            claimed = await redis_client.xclaim(self.stream, self.group, self.consumer, backoff_ms, [entry["message_id"]])
+            for entry_id, fields in claimed:
+                if not fields:
+                    continue
+                if deliveries >= self.max_attempts:
+                    await self._dead_letter(entry_id, fields, deliveries)
+                else:
+                    await self._process(entry_id, fields)
+    
+    async def _process(self, entry_id: str, fields: dict):
+        name = fields.get("job")
+        handler = self.handlers.get(name)
+        if handler is None:
+            await self._dead_letter(entry_id, fields, 0, f"Unknown job: {name}")
+            return
+        
+        done_key = f"{self.stream}:done:{entry_id}"
+        if await redis_client.exists_key(done_key):
+            # Succeeded before, only the XACK was lost
+            JOBS_PROCESSED.labels(name, "duplicate").inc()
+            batch = redis_client.pipeline()
+            async with batch as pipe:
+                pipe.xack(self.stream, self.group, entry_id)
+            return
+        
+        started = time.perf_counter()
+        try:
+            await handler(entry_id, json.loads(fields.get("payload") or "{}"))
+        except Exception as e:
+            # Left pending - _retry_pending picks it up after the backoff
+            if len(self.last_errors) >= MAX_TRACKED_ERRORS:
+                self.last_errors.clear()
+            self.last_errors[entry_id] = str(e)
+            JOBS_PROCESSED.labels(name, "failure").inc()
+            print(f"❌ Job {name} ({entry_id}) failed: {e}")
+            return
+        finally:
+            JOB_DURATION.labels(name).observe(time.perf_counter() - started)
+        
+        self.last_errors.pop(entry_id, None)
+        batch = redis_client.transaction()
+        async with batch as pipe:
+            pipe.set(done_key, "1", ex=DONE_KEY_TTL_SECONDS)
+            pipe.xack(self.stream, self.group, entry_id)
+        JOBS_PROCESSED.labels(name, "success").inc()
+    
+    async def _dead_letter(self, entry_id: str, fields: dict, deliveries: int, error: str = None):
+        batch = redis_client.transaction()
+        async with batch as pipe:
+            pipe.xadd(self.dead_letter_stream, {
+                **fields,
+                "entryId": entry_id,
+                "deliveries": deliveries,
+                "error": error or self.last_errors.pop(entry_id, "unknown (failed on another worker)"),
+                "failedAt": datetime.now().isoformat()
+            }, maxlen=JOB_STREAM_MAXLEN, approximate=True)
+            pipe.xack(self.stream, self.group, entry_id)
+        JOBS_PROCESSED.labels(fields.get("job", "unknown"), "dead").inc()
+        print(f"☠️ Job {fields.get('job')} ({entry_id}) moved to {self.dead_letter_stream} after {deliveries} deliveries")
+    
+    async def get_stats(self) -> dict:
+        try:
+            stream = await redis_client.stream_info(self.stream, self.group)
+            dead = await redis_client.stream_info(self.dead_letter_stream, self.group)
+        except Exception as e:
+            return {"error": str(e)}
+        return {
+            "enabled": JOB_QUEUE_ENABLED,
+            "stream": stream,
+            "dead_letters": dead["length"],
+            "handlers": sorted(self.handlers)
+        }
+
+job_queue = JobQueue()
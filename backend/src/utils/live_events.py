@@ -0,0 +1,161 @@
+# utils/live_events.py
+## Live post/comment updates for SSE clients (/api/post/live/{post_id})
+## - Writers XADD a small diff to one Redis Stream (post_events) - the entry ID is the SSE event id
+## - Each worker process runs ONE reader (XREAD) and fans events out to its local subscribers
+##   by postId, so clients never query MongoDB or Redis themselves
+## - Reconnects send Last-Event-ID: missed events are replayed from the stream (XRANGE); if the
+##   id was trimmed away, the client gets a "reset" event and refetches the comment list
+## - MongoDB change streams need a replica set (compose runs a standalone mongod), hence Redis
+import asyncio
+import contextvars
+import json
+from ..configs.redis_client import redis_client
+from ..configs.config import (
+    LIVE_EVENTS_ENABLED,
+    LIVE_EVENTS_STREAM_MAXLEN,
+    LIVE_EVENTS_REPLAY_MAX,
+    LIVE_EVENTS_QUEUE_SIZE,
+    LIVE_EVENTS_KEEPALIVE_SECONDS,
+    JOB_BLOCK_MS
+)
+
+LIVE_EVENTS_STREAM = "post_events"
+READ_BATCH_SIZE = 100
+RESET_EVENT = {"id": None, "type": "reset", "data": {}}
+
+def parse_event_id(event_id: str) -> tuple:
+    """Stream IDs ("<ms>-<seq>") as comparable tuples; None for anything else"""
+    try:
+        ms, seq = event_id.split("-")
+        return int(ms), int(seq)
+    except (AttributeError, ValueError):
+        return None
+
+def format_sse(event: dict) -> str:
+    lines = []
+    if event["id"]:
+        lines.append(f"id: {event['id']}")
+    lines.append(f"event: {event['type']}")
+    lines.append(f"data: {json.dumps(event['data'], default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+def to_event(entry_id: str, fields: dict) -> dict:
+    return {"id": entry_id, "postId": fields.get("postId"), "type": fields.get("type"), "data": json.loads(fields.get("data") or "{}")}
+
+async def publish_post_event(post_id: str, event_type: str, data: dict):
+    """Append one diff event for a post's live subscribers (best effort - never fails the write)"""
+    if not LIVE_EVENTS_ENABLED:
+        return None
+    try:
+        return await redis_client.xadd(
+            LIVE_EVENTS_STREAM,
+            {"postId": post_id, "type": event_type, "data": json.dumps(data, default=str)},
+            maxlen=LIVE_EVENTS_STREAM_MAXLEN
+        )
+    except Exception as e:
+        print(f"⚠️ Live event {event_type} for post {post_id} not published: {e}")
+        return None
+
+class LiveEventHub:
+    def __init__(self):
+        # post_id -> set of subscriber queues
+        self.subscribers = {}
+        self.reader_task = None
+    
+    def subscribe(self, post_id: str) -> asyncio.Queue:
+        if self.reader_task is None or self.reader_task.done():
+            # Fresh context - the first subscriber's request must not be charged for the reader's round trips
+            self.reader_task = asyncio.create_task(self._read(), context=contextvars.Context())
+        queue = asyncio.Queue(maxsize=LIVE_EVENTS_QUEUE_SIZE)
+        self.subscribers.setdefault(post_id, set()).add(queue)
+        return queue
+    
+    def unsubscribe(self, post_id: str, queue: asyncio.Queue):
+        queues = self.subscribers.get(post_id)
+        if queues:
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[post_id]
+    
+    async def replay(self, post_id: str, last_event_id: str):
+        """(events after last_event_id for this post, complete?) - incomplete means send a reset"""
+        if parse_event_id(last_event_id) is None:
+            return [], False
+        oldest = await redis_client.xrange(LIVE_EVENTS_STREAM, count=1)
+        if oldest and parse_event_id(oldest[0][0]) > parse_event_id(last_event_id):
+            # Trimmed past the client's position - events were lost
+            return [], False
+        
+        entries = await redis_client.xrange(LIVE_EVENTS_STREAM, f"({last_event_id}", "+", count=LIVE_EVENTS_REPLAY_MAX)
+        if len(entries) == LIVE_EVENTS_REPLAY_MAX:
+            # Too far behind - a refetch is cheaper than replaying
+            return [], False
+        return [to_event(entry_id, fields) for entry_id, fields in entries if fields.get("postId") == post_id], True
+    
+    async def stream(self, post_id: str, last_event_id: str, is_disconnected):
+        """SSE body for one client: replay after last_event_id, then live events until it disconnects"""
+        # Subscribe first - nothing published during the replay is missed
+        queue = self.subscribe(post_id)
+        try:
+            last_sent = None
+            if last_event_id:
+                missed, complete = await self.replay(post_id, last_event_id)
+                if not complete:
+                    yield format_sse(RESET_EVENT)
+                for event in missed:
+                    last_sent = parse_event_id(event["id"])
+                    yield format_sse(event)
+            # Tell EventSource how long to wait before reconnecting
+            yield "retry: 3000\n\n"
+            
+            while not await is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=LIVE_EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ": keepalive\n\n"
+                    continue
+                # Already sent during the replay
+                if event["id"] and last_sent and parse_event_id(event["id"]) <= last_sent:
+                    continue
+                yield format_sse(event)
+        finally:
+            self.unsubscribe(post_id, queue)
+    
+    def _deliver(self, event: dict):
+        for queue in list(self.subscribers.get(event["postId"], ())):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow client - drop its backlog, it refetches on reset
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESET_EVENT)
+    
+    async def _read(self):
+        """The worker's single stream reader - runs while the process lives"""
+        last_id = None
+        while True:
+            try:
+                if last_id is None:
+                    newest = await redis_client.xrevrange(LIVE_EVENTS_STREAM, count=1)
+                    last_id = newest[0][0] if newest else "0-0"
+                
+                entries = await redis_client.xread({LIVE_EVENTS_STREAM: last_id}, READ_BATCH_SIZE, JOB_BLOCK_MS)
+                for entry_id, fields in entries:
+                    last_id = entry_id
+                    self._deliver(to_event(entry_id, fields))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Live event reader error: {e}")
+                await asyncio.sleep(1)
+    
+    def get_stats(self) -> dict:
+        return {
+            "posts": len(self.subscribers),
+            "subscribers": sum(len(queues) for queues in self.subscribers.values()),
+            "reader_running": self.reader_task is not None and not self.reader_task.done()
+        }
+
+live_events = LiveEventHub()
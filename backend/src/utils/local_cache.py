@@ -0,0 +1,60 @@
+# utils/local_cache.py
+import time
+from collections import OrderedDict
+
+class LocalTTLCache:
+    """
+    In-process cache with per-entry TTL and a max size
+    - Least recently used entries are dropped first when the cache is full
+    - Used as a short-lived fallback when Redis is unavailable (degraded mode)
+      and as the first tier of the post/user cache
+    """
+    def __init__(self, max_entries: int, default_ttl: float, on_evict=None):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()
+        self.evictions = 0
+        # Called once per entry dropped for space (metrics)
+        self.on_evict = on_evict
+    
+    def set(self, key: str, value=True, ttl: float = None):
+        """Store value for ttl seconds (default_ttl when not given)"""
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.default_ttl)
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+            if self.on_evict:
+                self.on_evict()
+    
+    def get(self, key: str):
+        """Return value or None if missing/expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return value
+    
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+    
+    def delete(self, key: str):
+        self._entries.pop(key, None)
+    
+    def delete_prefix(self, prefix: str) -> int:
+        """Delete all entries whose key starts with prefix"""
+        keys = [key for key in self._entries if key.startswith(prefix)]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
+    
+    def clear(self):
+        self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,229 @@
+# utils/metrics.py
+## Prometheus metrics - request, MongoDB, Redis, JWT and event-loop timings
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+from pymongo import monitoring
+from starlette.requests import Request
+from starlette.responses import Response
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# ✅ Route label = route template (/api/post/{post_id}), never the raw path
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being processed"
+)
+MONGO_COMMAND_DURATION = Histogram(
+    "mongo_command_duration_seconds",
+    "MongoDB command latency (pymongo command monitoring)",
+    ["command", "collection", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+REDIS_COMMAND_DURATION = Histogram(
+    "redis_command_duration_seconds",
+    "Redis round-trip latency",
+    ["command", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+REDIS_BREAKER_STATE = Gauge(
+    "redis_circuit_breaker_open",
+    "1 while the Redis circuit breaker is open (failing fast)"
+)
+REDIS_FAST_FAILURES = Counter(
+    "redis_fast_failures_total",
+    "Redis calls rejected by the open circuit breaker"
+)
+JWT_OPERATION_DURATION = Histogram(
+    "jwt_operation_duration_seconds",
+    "JWT encode/decode latency",
+    ["operation"],
+    buckets=LATENCY_BUCKETS
+)
+EVENT_LOOP_LAG = Gauge(
+    "event_loop_lag_seconds",
+    "How late the event loop woke up a periodic timer (last sample)"
+)
+EVENT_LOOP_LAG_HISTOGRAM = Histogram(
+    "event_loop_lag_sample_seconds",
+    "Distribution of event loop lag samples",
+    buckets=LATENCY_BUCKETS
+)
+
+REQUEST_ROUND_TRIPS = Histogram(
+    "request_round_trips",
+    "MongoDB / Redis round trips per request by route template",
+    ["route", "backend"],
+    buckets=(0, 1, 2, 3, 4, 5, 8, 13, 21, 34, 55)
+)
+ROUND_TRIP_BUDGET_EXCEEDED = Counter(
+    "request_round_trip_budget_exceeded_total",
+    "Requests that made more round trips than their route budget",
+    ["route", "backend"]
+)
+
+ENTITY_CACHE_REQUESTS = Counter(
+    "entity_cache_requests_total",
+    "Post/user cache lookups by tier that answered (local, redis or miss)",
+    ["cache", "result"]
+)
+ENTITY_CACHE_EVICTIONS = Counter(
+    "entity_cache_evictions_total",
+    "Entries dropped from the in-process LRU to make room",
+    ["cache"]
+)
+ENTITY_CACHE_COALESCED = Counter(
+    "entity_cache_coalesced_total",
+    "Lookups that waited for an in-flight load instead of querying MongoDB",
+    ["cache"]
+)
+JOBS_ENQUEUED = Counter(
+    "jobs_enqueued_total",
+    "Background jobs added to the Redis stream (inline = queue unavailable, ran in the request)",
+    ["job", "mode"]
+)
+JOBS_PROCESSED = Counter(
+    "jobs_processed_total",
+    "Background jobs handled by workers by outcome (success, failure, duplicate, dead)",
+    ["job", "outcome"]
+)
+JOB_DURATION = Histogram(
+    "job_duration_seconds",
+    "Background job handler latency",
+    ["job"],
+    buckets=LATENCY_BUCKETS
+)
+OUTBOX_DELIVERED = Counter(
+    "outbox_events_delivered_total",
+    "Outbox events delivered to a consumer (redeliveries after a failure count again)",
+    ["consumer"]
+)
+OUTBOX_DELIVERY_FAILURES = Counter(
+    "outbox_delivery_failures_total",
+    "Outbox batches a consumer failed on (retried with backoff)",
+    ["consumer"]
+)
+OUTBOX_GAPS_SKIPPED = Counter(
+    "outbox_gaps_skipped_total",
+    "Outbox sequence numbers given up on (never written or already expired)",
+    ["consumer"]
+)
+OUTBOX_LAG_EVENTS = Gauge(
+    "outbox_lag_events",
+    "Outbox events allocated but not yet delivered to a consumer",
+    ["consumer"]
+)
+OUTBOX_LAG_SECONDS = Gauge(
+    "outbox_lag_seconds",
+    "Age of a consumer's oldest undelivered outbox event",
+    ["consumer"]
+)
+FEED_BUILDS = Counter(
+    "feed_builds_total",
+    "Feed / sitemap files rebuilt (mode: inline = no previous file to serve, background)",
+    ["artifact", "mode"]
+)
+FEED_BUILD_DURATION = Histogram(
+    "feed_build_duration_seconds",
+    "Time to stream a feed / sitemap from MongoDB to disk",
+    ["artifact"],
+    buckets=LATENCY_BUCKETS
+)
+
+HTTP_METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"}
+
+# Commands we label by name, anything else is folded into "other"
+MONGO_COMMANDS = {
+    "find", "insert", "update", "delete", "aggregate", "count", "getMore",
+    "findAndModify", "distinct", "createIndexes", "explain", "ping", "killCursors"
+}
+
+@contextmanager
+def observe_jwt(operation: str):
+    """Time a JWT encode/decode block"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        JWT_OPERATION_DURATION.labels(operation).observe(time.perf_counter() - started)
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """pymongo command listener - runs on the driver's threads, so keep it cheap"""
+    def __init__(self):
+        self._collections = {}
+        self._lock = threading.Lock()
+    
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            collection = "none"
+        with self._lock:
+            self._collections[(event.connection_id, event.request_id)] = collection
+    
+    def _observe(self, event, outcome: str):
+        with self._lock:
+            collection = self._collections.pop((event.connection_id, event.request_id), "none")
+        command = event.command_name if event.command_name in MONGO_COMMANDS else "other"
+        MONGO_COMMAND_DURATION.labels(command, collection, outcome).observe(event.duration_micros / 1_000_000)
+    
+    def succeeded(self, event):
+        self._observe(event, "success")
+    
+    def failed(self, event):
+        self._observe(event, "error")
+
+class MetricsMiddleware:
+    """Pure ASGI middleware - request latency by route template and in-flight gauge"""
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        status_code = 500
+        
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            # FastAPI stores the matched route in the scope - unmatched paths share one label
+            route = scope.get("route")
+            route_template = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "GET")
+            HTTP_REQUEST_DURATION.labels(
+                method if method in HTTP_METHODS else "other",
+                route_template,
+                str(status_code)
+            ).observe(time.perf_counter() - started)
+
+async def monitor_event_loop_lag(interval: float = 0.5):
+    """Background task: measure how late asyncio.sleep() wakes up"""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - started - interval)
+        EVENT_LOOP_LAG.set(lag)
+        EVENT_LOOP_LAG_HISTOGRAM.observe(lag)
+
+async def metrics_endpoint(request: Request):
+    """Prometheus scrape endpoint"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
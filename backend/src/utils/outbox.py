@@ -0,0 +1,154 @@
+# utils/outbox.py
+## Outbox dispatcher - delivers outbox events (models/outbox_model.py) to consumers, run by the worker
+## - Each consumer has its own delivered sequence and runs independently: a failing consumer
+##   is retried with backoff and only delays itself
+## - Events are delivered in sequence order, in batches; the sequence is advanced after the
+##   consumer returned, so delivery is at-least-once and consumers must be idempotent
+## - A sequence number that is still missing after OUTBOX_GAP_SECONDS (no-transaction writer
+##   crashed between counter and insert, or the event expired) is skipped and counted
+## - Replay / rebuild: reset a consumer's sequence (`python -m src.scripts.outbox replay ...`)
+import asyncio
+import os
+import socket
+from datetime import datetime
+from ..configs.config import (
+    OUTBOX_ENABLED,
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_POLL_SECONDS,
+    OUTBOX_LEASE_SECONDS,
+    OUTBOX_GAP_SECONDS
+)
+from .metrics import OUTBOX_DELIVERED, OUTBOX_DELIVERY_FAILURES, OUTBOX_GAPS_SKIPPED, OUTBOX_LAG_EVENTS, OUTBOX_LAG_SECONDS
+
+# Lag gauges are refreshed this often
+LAG_REPORT_SECONDS = 5
+
+class OutboxDispatcher:
+    def __init__(self):
+        self.consumers = {}
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.running = False
+        self._model = None
+    
+    def consumer(self, name: str):
+        """Register `async def consumer(events)` - called with a batch of events in sequence order"""
+        def register(func):
+            self.consumers[name] = func
+            return func
+        return register
+    
+    def _load_consumers(self):
+        if not self.consumers:
+            from . import outbox_consumers  # noqa: F401 - registers the consumers
+    
+    def _outbox(self):
+        if self._model is None:
+            from ..models.outbox_model import OutboxModel
+            self._model = OutboxModel()
+        return self._model
+    
+    async def run(self):
+        """Deliver until stop() - one task per consumer plus the lag reporter"""
+        self._load_consumers()
+        if not OUTBOX_ENABLED:
+            return
+        outbox = self._outbox()
+        for name in self.consumers:
+            await outbox.ensure_consumer(name)
+        if not outbox.supports_transactions():
+            print("⚠️ MongoDB has no transactions (standalone) - outbox events are written after each change, not atomically")
+        
+        self.running = True
+        print(f"📤 Outbox dispatcher {self.owner} delivering to: {', '.join(self.consumers)}")
+        await asyncio.gather(
+            *(self._run_consumer(name, func) for name, func in self.consumers.items()),
+            self._report_lag()
+        )
+    
+    def stop(self):
+        """Finish the current batches, then return from run()"""
+        self.running = False
+    
+    async def _run_consumer(self, name: str, func):
+        outbox = self._outbox()
+        failures = 0
+        while self.running:
+            try:
+                state = await outbox.claim_consumer(name, self.owner, OUTBOX_LEASE_SECONDS)
+                if not state:
+                    # Another dispatcher delivers this consumer - take over if its lease expires
+                    await asyncio.sleep(OUTBOX_LEASE_SECONDS / 2)
+                    continue
+                
+                delivered_seq = state["seq"]
+                events = await outbox.get_events_after(delivered_seq, OUTBOX_BATCH_SIZE)
+                events, last_seq = self._in_order(name, events, delivered_seq)
+                if last_seq == delivered_seq:
+                    await asyncio.sleep(OUTBOX_POLL_SECONDS)
+                    continue
+                
+                if events:
+                    await self._deliver(name, func, events)
+                    OUTBOX_DELIVERED.labels(name).inc(len(events))
+                if not await outbox.advance_consumer(name, self.owner, delivered_seq, last_seq, OUTBOX_LEASE_SECONDS):
+                    print(f"⚠️ Outbox consumer {name} was reset or taken over - re-reading its position")
+                failures = 0
+            except Exception as e:
+                failures += 1
+                OUTBOX_DELIVERY_FAILURES.labels(name).inc()
+                print(f"❌ Outbox consumer {name} failed ({failures} in a row): {e}")
+                await asyncio.sleep(min(2 ** failures, 60))
+    
+    async def _deliver(self, name: str, func, events: list):
+        """Run the consumer, renewing the lease while it works (a full rebuild can take minutes)"""
+        task = asyncio.ensure_future(func(events))
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=OUTBOX_LEASE_SECONDS / 3)
+            if done:
+                return task.result()
+            await self._outbox().claim_consumer(name, self.owner, OUTBOX_LEASE_SECONDS)
+    
+    def _in_order(self, name: str, events: list, delivered_seq: int) -> tuple:
+        """Contiguous run after delivered_seq -> (events, last sequence they cover)"""
+        expected = delivered_seq + 1
+        ready = []
+        for event in events:
+            if event["seq"] != expected:
+                age = (datetime.now() - event["createdAt"]).total_seconds()
+                if age < OUTBOX_GAP_SECONDS:
+                    # The missing event may still be committing
+                    break
+                OUTBOX_GAPS_SKIPPED.labels(name).inc(event["seq"] - expected)
+                print(f"⚠️ Outbox consumer {name}: skipping missing events {expected}..{event['seq'] - 1}")
+            ready.append(event)
+            expected = event["seq"] + 1
+        return ready, expected - 1
+    
+    async def _report_lag(self):
+        while self.running:
+            try:
+                await self.report_lag()
+            except Exception as e:
+                print(f"❌ Outbox lag report failed: {e}")
+            await asyncio.sleep(LAG_REPORT_SECONDS)
+    
+    async def report_lag(self) -> dict:
+        """Events and seconds each consumer is behind (also exported as gauges)"""
+        outbox = self._outbox()
+        head_seq = await outbox.get_head_seq()
+        lag = {}
+        for state in await outbox.get_consumers():
+            oldest = await outbox.get_oldest_event_after(state["seq"])
+            seconds = (datetime.now() - oldest["createdAt"]).total_seconds() if oldest else 0.0
+            lag[state["_id"]] = {
+                "seq": state["seq"],
+                "events": max(head_seq - state["seq"], 0),
+                "seconds": round(seconds, 3),
+                "owner": state.get("owner"),
+                "deliveredAt": state.get("deliveredAt")
+            }
+            OUTBOX_LAG_EVENTS.labels(state["_id"]).set(lag[state["_id"]]["events"])
+            OUTBOX_LAG_SECONDS.labels(state["_id"]).set(seconds)
+        return {"headSeq": head_seq, "consumers": lag}
+
+outbox_dispatcher = OutboxDispatcher()
@@ -0,0 +1,63 @@
+# utils/outbox_consumers.py
+## Outbox consumers - derived data kept in step with post/comment/user writes
+## - Called with a batch of events in sequence order, possibly more than once (at-least-once):
+##   each consumer must be safe to replay
+## - Controllers still invalidate the entity caches inline (read-your-writes); the entity_cache
+##   consumer catches writes that bypass them
+from .outbox import outbox_dispatcher
+from .entity_cache import post_cache, user_cache, invalidate_dashboard
+from .trending import trending_posts
+from .related_posts import related_posts
+from .feeds import feed_artifacts
+from ..models.daily_stats_model import DailyStatsModel
+
+daily_stats_model = DailyStatsModel()
+
+# event type -> daily_stats metric
+CREATED_METRICS = {
+    "user.created": "signups",
+    "post.created": "posts",
+    "comment.created": "comments",
+}
+
+@outbox_dispatcher.consumer("daily_stats")
+async def count_daily_stats(events: list):
+    """Analytics rollup counters - the sequence number guards against double counting on redelivery"""
+    for event in events:
+        metric = CREATED_METRICS.get(event["type"])
+        amount = 1
+        if event["type"] == "comment.updated" and event["data"].get("likesDelta"):
+            # Net likes for the day (an unlike takes one back)
+            metric, amount = "likes", event["data"]["likesDelta"]
+        if metric:
+            await daily_stats_model.increment(metric, amount, at=event["createdAt"], op_id=f"outbox:{event['seq']}")
+
+@outbox_dispatcher.consumer("dashboard")
+async def drop_dashboard_cache(events: list):
+    """Any post/comment/user change - one invalidation per batch"""
+    await invalidate_dashboard()
+
+@outbox_dispatcher.consumer("entity_cache")
+async def drop_entity_caches(events: list):
+    post_ids = {event["entityId"] for event in events if event["type"] in ("post.updated", "post.deleted")}
+    user_ids = {event["entityId"] for event in events if event["type"] in ("user.updated", "user.deleted")}
+    for post_id in post_ids:
+        await post_cache.invalidate(post_id)
+    for user_id in user_ids:
+        await user_cache.invalidate(user_id)
+
+@outbox_dispatcher.consumer("trending")
+async def drop_deleted_posts(events: list):
+    """Deleted posts leave the trending / popular sets with their view counters"""
+    await trending_posts.forget(*{event["entityId"] for event in events if event["type"] == "post.deleted"})
+
+@outbox_dispatcher.consumer("related_posts")
+async def update_related_posts(events: list):
+    """Created / edited / deleted posts - only the affected neighbour lists are rewritten"""
+    await related_posts.handle_events(events)
+
+@outbox_dispatcher.consumer("feeds")
+async def bump_feed_generation(events: list):
+    """Any post change - one generation bump per batch; API processes rebuild feeds / sitemaps on the next request"""
+    if any(event["type"].startswith("post.") for event in events):
+        await feed_artifacts.bump_generation()
@@ -0,0 +1,172 @@
+# utils/profiling.py
+## On-demand request profiling for admins
+## - `X-Profile: cpu` (sampling profiler, flamegraph "folded" output) or `X-Profile: memory` (tracemalloc)
+## - Only honoured for admin access tokens, rate limited per process
+## - PROFILING_SAMPLE_RATE > 0 additionally profiles a random fraction of requests (cpu mode)
+## - When no header is sent and sample rate is 0, the only cost is one header lookup
+import asyncio
+import os
+import random
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque, Counter
+from datetime import datetime
+from starlette.requests import Request
+from ..configs.config import (
+    PROFILING_ENABLED,
+    PROFILING_SAMPLE_RATE,
+    PROFILING_MAX_PER_MINUTE,
+    PROFILING_SAMPLE_INTERVAL_MS,
+    PROFILING_OUTPUT_DIR
+)
+from .security import verify_access_token
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_MODES = ("cpu", "memory")
+
+class SamplingProfiler:
+    """
+    Samples the stack of one thread (the event loop thread) from a background thread
+    - Output is collapsed stacks ("a;b;c count"), loadable by flamegraph.pl / speedscope
+    - Other requests running on the same loop during the window are sampled too
+    """
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+    
+    def start(self):
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+    
+    def folded(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+class RequestProfiler:
+    """Rate limiting + report writing shared by the middleware"""
+    def __init__(self):
+        self.recent = deque()
+        # One profile at a time - tracemalloc and the sampler are process wide
+        self.busy = False
+    
+    def try_acquire(self) -> bool:
+        now = time.monotonic()
+        while self.recent and now - self.recent[0] > 60:
+            self.recent.popleft()
+        if self.busy or len(self.recent) >= PROFILING_MAX_PER_MINUTE:
+            return False
+        self.recent.append(now)
+        self.busy = True
+        return True
+    
+    def release(self):
+        self.busy = False
+    
+    def report_path(self, scope, mode: str) -> str:
+        os.makedirs(PROFILING_OUTPUT_DIR, exist_ok=True)
+        route = re.sub(r"[^a-zA-Z0-9]+", "_", scope.get("path", "")).strip("_") or "root"
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        extension = "folded" if mode == "cpu" else "txt"
+        return os.path.join(PROFILING_OUTPUT_DIR, f"{timestamp}-{route}-{mode}.{extension}")
+
+request_profiler = RequestProfiler()
+
+async def _is_admin(scope) -> bool:
+    token = Request(scope).cookies.get("access_token")
+    if not token:
+        return False
+    payload = await verify_access_token(token)
+    return bool(payload and payload.get("isAdmin", False))
+
+def _requested_mode(scope):
+    for name, value in scope.get("headers", ()):
+        if name == PROFILE_HEADER:
+            mode = value.decode("latin-1").strip().lower()
+            return mode if mode in PROFILE_MODES else None
+    return None
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware - wraps selected requests in a profiler"""
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not PROFILING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        
+        mode = _requested_mode(scope)
+        if mode is not None:
+            if not await _is_admin(scope):
+                mode = None
+        elif PROFILING_SAMPLE_RATE > 0 and random.random() < PROFILING_SAMPLE_RATE:
+            mode = "cpu"
+        
+        if mode is None or not request_profiler.try_acquire():
+            await self.app(scope, receive, send)
+            return
+        
+        path = request_profiler.report_path(scope, mode)
+        
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-report", os.path.basename(path).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+        
+        try:
+            if mode == "cpu":
+                await self._profile_cpu(scope, receive, send_wrapper, path)
+            else:
+                await self._profile_memory(scope, receive, send_wrapper, path)
+        finally:
+            request_profiler.release()
+    
+    async def _profile_cpu(self, scope, receive, send, path: str):
+        profiler = SamplingProfiler(threading.get_ident(), PROFILING_SAMPLE_INTERVAL_MS / 1000)
+        profiler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.stop()
+            await asyncio.to_thread(_write_report, path, profiler.folded())
+            print(f"🔬 CPU profile saved: {path} ({sum(profiler.samples.values())} samples)")
+    
+    async def _profile_memory(self, scope, receive, send, path: str):
+        tracemalloc.start(25)
+        baseline = tracemalloc.take_snapshot()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            stats = snapshot.compare_to(baseline, "lineno")
+            lines = [f"{scope.get('method')} {scope.get('path')} - peak traced memory: {peak / 1024:.1f} KiB", ""]
+            lines.extend(str(stat) for stat in stats[:30])
+            await asyncio.to_thread(_write_report, path, "\n".join(lines))
+            print(f"🔬 Memory profile saved: {path}")
+
+def _write_report(path: str, content: str):
+    with open(path, "w", encoding="utf-8") as report:
+        report.write(content)
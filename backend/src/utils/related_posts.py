@@ -0,0 +1,286 @@
+# utils/related_posts.py
+## Related posts - top-k cosine neighbours of hashed TF-IDF vectors, stored on each post
+## - Terms (content without HTML, title and category weighted up, no stop words) are hashed into
+##   N_FEATURES columns: no vocabulary to keep in sync, a new post never changes other rows
+## - Weights: sublinear tf (1 + log tf) * idf, rows L2-normalized, so a dot product is a cosine
+## - Neighbours are computed RELATED_POSTS_BLOCK_SIZE rows at a time (sparse block @ Xᵀ, then
+##   argpartition) - memory is block size x posts, not posts²
+## - Incremental (outbox "related_posts" consumer): created / edited posts get new rows (an edited
+##   post's old row is retired), and only rows whose neighbours changed are recomputed or patched.
+##   idf is frozen at the last full rebuild (`python -m src.scripts.build_related_posts`)
+import asyncio
+import re
+import zlib
+from collections import Counter
+from datetime import datetime
+import numpy as np
+from scipy import sparse
+from ..configs.config import (
+    RELATED_POSTS_ENABLED,
+    RELATED_POSTS_K,
+    RELATED_POSTS_MIN_SCORE,
+    RELATED_POSTS_BLOCK_SIZE
+)
+
+N_FEATURES = 2 ** 18
+TAG_RE = re.compile(r"<[^>]+>")
+TOKEN_RE = re.compile(r"[a-z0-9]{2,}")
+STOP_WORDS = frozenset(
+    "an and are as at be but by can for from has have how if in into is it its not of on or "
+    "so than that the their then there these they this to was we were what when which will with "
+    "you your"
+    .split()
+)
+# Title words and the category count this many times a content word
+TITLE_WEIGHT = 3
+# Post fields the vectors are built from - other updates don't touch the index
+TEXT_FIELDS = ("title", "content", "category")
+# Posts read from MongoDB per batch during a rebuild
+REBUILD_BATCH_SIZE = 1000
+
+_feature_cache = {}
+
+def feature_index(term: str) -> int:
+    """Stable hash column (crc32 - Python's hash() is salted per process)"""
+    index = _feature_cache.get(term)
+    if index is None:
+        index = zlib.crc32(term.encode()) & (N_FEATURES - 1)
+        if len(_feature_cache) < 1_000_000:
+            _feature_cache[term] = index
+    return index
+
+def post_terms(post: dict) -> Counter:
+    text = TAG_RE.sub(" ", post.get("content") or "").lower()
+    terms = Counter(term for term in TOKEN_RE.findall(text) if term not in STOP_WORDS)
+    for term in TOKEN_RE.findall((post.get("title") or "").lower()):
+        if term not in STOP_WORDS:
+            terms[term] += TITLE_WEIGHT
+    if post.get("category"):
+        terms[f"category:{post['category']}"] += TITLE_WEIGHT
+    return terms
+
+class TermMatrixBuilder:
+    """Hashed term counts row by row -> CSR (posts x N_FEATURES)"""
+    def __init__(self):
+        self.indptr = [0]
+        self.indices = []
+        self.data = []
+    
+    def add(self, posts: list):
+        for post in posts:
+            features = Counter()
+            for term, count in post_terms(post).items():
+                features[feature_index(term)] += count
+            self.indices.extend(features.keys())
+            self.data.extend(features.values())
+            self.indptr.append(len(self.indices))
+    
+    def matrix(self):
+        matrix = sparse.csr_matrix(
+            (
+                np.asarray(self.data, dtype=np.float32),
+                np.asarray(self.indices, dtype=np.int32),
+                np.asarray(self.indptr, dtype=np.int64)
+            ),
+            shape=(len(self.indptr) - 1, N_FEATURES)
+        )
+        matrix.sum_duplicates()
+        matrix.data = 1 + np.log(matrix.data)
+        return matrix
+
+def term_matrix(posts: list):
+    builder = TermMatrixBuilder()
+    builder.add(posts)
+    return builder.matrix()
+
+def compute_idf(counts) -> np.ndarray:
+    """Smoothed idf per hashed column"""
+    document_frequency = np.bincount(counts.indices, minlength=N_FEATURES)
+    return (np.log((1 + counts.shape[0]) / (1 + document_frequency)) + 1).astype(np.float32)
+
+def tfidf(counts, idf: np.ndarray):
+    """Weighted, L2-normalized rows"""
+    weighted = counts.copy()
+    weighted.data *= idf[weighted.indices]
+    norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags((1 / norms).astype(np.float32)) @ weighted
+
+class RelatedPostsIndex:
+    """
+    In-memory vectors and neighbour lists (row indices + scores, best first)
+    - Rows are append-only; a deleted or edited post's row is marked dead
+    """
+    def __init__(self, k: int = RELATED_POSTS_K, block_size: int = RELATED_POSTS_BLOCK_SIZE):
+        self.k = k
+        self.block_size = block_size
+        self.post_ids = []
+        self.rows = {}
+        self.matrix = None
+        self.matrix_t = None
+        self.idf = None
+        self.alive = np.zeros(0, dtype=bool)
+        self.neighbours = np.full((0, k), -1, dtype=np.int64)
+        self.scores = np.zeros((0, k), dtype=np.float32)
+    
+    def build(self, post_ids: list, counts) -> dict:
+        """Full rebuild from raw term counts -> {post_id: [(related_id, score), ...]} for every post"""
+        self.idf = compute_idf(counts)
+        self.matrix = tfidf(counts, self.idf).tocsr()
+        self.matrix_t = self.matrix.T.tocsr()
+        self.post_ids = list(post_ids)
+        self.rows = {post_id: row for row, post_id in enumerate(self.post_ids)}
+        self.alive = np.ones(len(self.post_ids), dtype=bool)
+        self.neighbours = np.full((len(self.post_ids), self.k), -1, dtype=np.int64)
+        self.scores = np.zeros((len(self.post_ids), self.k), dtype=np.float32)
+        all_rows = np.arange(len(self.post_ids))
+        self._recompute(all_rows)
+        return self.export(all_rows)
+    
+    def apply(self, posts: list, deleted_ids: list) -> dict:
+        """Incremental update -> {post_id: related} for every live post whose list changed"""
+        retired = []
+        for post_id in [*deleted_ids, *(str(post["_id"]) for post in posts)]:
+            row = self.rows.pop(post_id, None)
+            if row is not None:
+                self.alive[row] = False
+                self.post_ids[row] = None
+                retired.append(row)
+        
+        first_new = self.matrix.shape[0]
+        new_rows = np.arange(first_new, first_new + len(posts))
+        if posts:
+            vectors = tfidf(term_matrix(posts), self.idf).tocsr()
+            self.matrix = sparse.vstack([self.matrix, vectors], format="csr")
+            self.matrix_t = self.matrix.T.tocsr()
+            for row, post in zip(new_rows, posts):
+                self.post_ids.append(str(post["_id"]))
+                self.rows[str(post["_id"])] = row
+            self.alive = np.concatenate([self.alive, np.ones(len(posts), dtype=bool)])
+            self.neighbours = np.vstack([self.neighbours, np.full((len(posts), self.k), -1, dtype=np.int64)])
+            self.scores = np.vstack([self.scores, np.zeros((len(posts), self.k), dtype=np.float32)])
+        
+        # Rows that lost a neighbour are recomputed, like the new rows
+        recompute = set(new_rows.tolist())
+        if retired:
+            lost = self.alive & np.isin(self.neighbours, retired).any(axis=1)
+            recompute.update(np.nonzero(lost)[0].tolist())
+        
+        # Other rows only need the new posts merged into their lists
+        patched = set()
+        for start in range(0, len(new_rows), self.block_size):
+            block = new_rows[start:start + self.block_size]
+            similarities = (self.matrix[block] @ self.matrix_t).toarray()
+            for row, row_scores in zip(block, similarities):
+                candidates = np.nonzero(
+                    self.alive
+                    & (row_scores > self.scores[:, -1])
+                    & (row_scores >= RELATED_POSTS_MIN_SCORE)
+                )[0]
+                for other in candidates:
+                    if other == row or other in recompute:
+                        continue
+                    position = np.searchsorted(-self.scores[other], -row_scores[other])
+                    self.neighbours[other] = np.insert(self.neighbours[other], position, row)[:self.k]
+                    self.scores[other] = np.insert(self.scores[other], position, row_scores[other])[:self.k]
+                    patched.add(other)
+        
+        changed = np.array(sorted(recompute | patched), dtype=np.int64)
+        self._recompute(np.array(sorted(recompute), dtype=np.int64))
+        return self.export(changed)
+    
+    def _recompute(self, rows: np.ndarray):
+        """Top-k neighbours of `rows`, one block product at a time"""
+        k = min(self.k, self.matrix.shape[0] - 1)
+        if k <= 0:
+            return
+        dead = ~self.alive
+        for start in range(0, len(rows), self.block_size):
+            block = rows[start:start + self.block_size]
+            similarities = (self.matrix[block] @ self.matrix_t).toarray()
+            similarities[:, dead] = 0
+            similarities[np.arange(len(block)), block] = 0
+            top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(similarities, top, axis=1)
+            order = np.argsort(-top_scores, axis=1)
+            self.neighbours[block, :k] = np.take_along_axis(top, order, axis=1)
+            self.scores[block, :k] = np.take_along_axis(top_scores, order, axis=1)
+    
+    def export(self, rows: np.ndarray) -> dict:
+        related = {}
+        for row in rows:
+            if not self.alive[row]:
+                continue
+            related[self.post_ids[row]] = [
+                (self.post_ids[other], float(score))
+                for other, score in zip(self.neighbours[row], self.scores[row])
+                if other >= 0 and score >= RELATED_POSTS_MIN_SCORE and self.alive[other]
+            ]
+        return related
+
+class RelatedPosts:
+    """Keeps posts.relatedPosts in step with the index (the index lives in the worker that delivers the consumer)"""
+    def __init__(self):
+        self.index = None
+        # Outbox seq of the last event the index has seen
+        self.last_seq = None
+        self._posts = None
+    
+    def _post_model(self):
+        if self._posts is None:
+            from ..models.post_model import PostModel
+            self._posts = PostModel()
+        return self._posts
+    
+    async def rebuild(self) -> int:
+        """Vectorize every post (streamed in batches), recompute all neighbours, store them"""
+        builder = TermMatrixBuilder()
+        post_ids = []
+        batch = []
+        async for post in self._post_model().find_all_post_texts(REBUILD_BATCH_SIZE):
+            post_ids.append(str(post["_id"]))
+            batch.append(post)
+            if len(batch) == REBUILD_BATCH_SIZE:
+                await asyncio.to_thread(builder.add, batch)
+                batch = []
+        await asyncio.to_thread(builder.add, batch)
+        
+        index = RelatedPostsIndex()
+        related = await asyncio.to_thread(index.build, post_ids, builder.matrix())
+        self.index = index
+        await self._store(related)
+        return len(related)
+    
+    async def handle_events(self, events: list):
+        """Outbox consumer: re-vectorize created / edited posts, retire deleted ones"""
+        if not RELATED_POSTS_ENABLED:
+            return
+        if self.index is None or events[0]["seq"] != self.last_seq + 1:
+            # First batch since this worker started, or the lease was with another worker (or the
+            # consumer was replayed) in between - this index missed events; a full rebuild covers them
+            await self.rebuild()
+            self.last_seq = events[-1]["seq"]
+            return
+        
+        changed, deleted = {}, []
+        for event in events:
+            if event["type"] == "post.deleted":
+                deleted.append(event["entityId"])
+                changed.pop(event["entityId"], None)
+            elif event["type"] == "post.created" or (
+                event["type"] == "post.updated" and any(field in event["data"] for field in TEXT_FIELDS)
+            ):
+                changed[event["entityId"]] = True
+        if changed or deleted:
+            posts = await self._post_model().find_posts_by_ids(list(changed), {field: 1 for field in TEXT_FIELDS})
+            related = await asyncio.to_thread(self.index.apply, posts, deleted)
+            await self._store(related)
+        self.last_seq = events[-1]["seq"]
+    
+    async def _store(self, related: dict):
+        now = datetime.now()
+        items = list(related.items())
+        for start in range(0, len(items), REBUILD_BATCH_SIZE):
+            await self._post_model().set_related_posts(dict(items[start:start + REBUILD_BATCH_SIZE]), now)
+
+related_posts = RelatedPosts()
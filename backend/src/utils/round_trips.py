@@ -0,0 +1,171 @@
+# utils/round_trips.py
+## Per-request MongoDB / Redis round-trip counting
+## - RoundTripMiddleware opens a counter for every request; the Mongo command listener
+##   and RedisClient._execute add to it (Motor copies the context into its executor threads)
+## - Counts go to the request_round_trips histogram and, outside production, to an
+##   `X-Round-Trips: mongo=2, redis=1` response header
+## - ROUTE_ROUND_TRIP_BUDGETS + assert_round_trip_budget() turn N+1 regressions into test failures
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pymongo import monitoring
+from ..configs.config import ROUND_TRIP_HEADER_ENABLED
+from .metrics import REQUEST_ROUND_TRIPS, ROUND_TRIP_BUDGET_EXCEEDED
+
+ROUND_TRIP_HEADER = b"x-round-trips"
+BACKENDS = ("mongo", "redis")
+
+# ✅ Upper bounds per "METHOD route template" - raise deliberately, never silently
+# (Redis client-side cache hits are not round trips; a getMore per extra batch is)
+ROUTE_ROUND_TRIP_BUDGETS = {
+    "POST /api/auth/signin": {"mongo": 1, "redis": 1},
+    "GET /api/auth/csrf-token": {"mongo": 0, "redis": 3},
+    "GET /api/post/getposts": {"mongo": 3, "redis": 1},
+    "GET /api/post/{post_id}": {"mongo": 1, "redis": 3},
+    # Public reads: + one record_view script (unique view + trending score)
+    "GET /api/post/public/{post_id}": {"mongo": 1, "redis": 3},
+    "GET /api/post/slug/{slug}": {"mongo": 2, "redis": 5},
+    "GET /api/post/public/slug/{slug}": {"mongo": 2, "redis": 5},
+    # + related posts ($lookup aggregate, concurrent with the comment reads)
+    "GET /api/post/page/{slug}": {"mongo": 7, "redis": 7},
+    "GET /api/post/public/page/{slug}": {"mongo": 7, "redis": 7},
+    "GET /api/post/trending": {"mongo": 1, "redis": 1},
+    # Two counter reads (categories, tags), concurrent
+    "GET /api/post/facets": {"mongo": 2, "redis": 0},
+    "GET /api/user/{user_id}": {"mongo": 1, "redis": 2},
+    # Writes: + outbox counter, outbox insert and commitTransaction (+ facet counters for posts)
+    "POST /api/post/create": {"mongo": 8, "redis": 2},
+    "GET /api/comment/getPostComments/{post_id}": {"mongo": 2, "redis": 1},
+    "POST /api/comment/create": {"mongo": 5, "redis": 3},
+    "PUT /api/comment/likeComment/{comment_id}": {"mongo": 6, "redis": 3},
+    # Cache miss: nine concurrent reads; hit: none
+    "GET /api/admin/dashboard": {"mongo": 9, "redis": 3},
+    "GET /api/admin/analytics": {"mongo": 1, "redis": 1},
+    # /api/admin/export/{collection} has no budget - a streamed export makes one getMore per
+    # EXPORT_BATCH_SIZE documents by design
+    # Generation read (at most every FEED_GENERATION_TTL_SECONDS), then a file from disk; a new
+    # generation is served the previous file while it rebuilds - only a process's first build counts
+    "GET /feed.xml": {"mongo": 1, "redis": 0},
+    "GET /atom.xml": {"mongo": 1, "redis": 0},
+    "GET /sitemap.xml": {"mongo": 1, "redis": 0},
+    "GET /sitemap-{number:int}.xml": {"mongo": 1, "redis": 0},
+    # Counted until the stream body starts: post lookup + Last-Event-ID replay
+    "GET /api/post/public/live/{post_id}": {"mongo": 1, "redis": 4},
+}
+
+class RoundTripCounter:
+    """Mongo counts arrive from driver threads, so increments take a lock"""
+    def __init__(self):
+        self.counts = {backend: 0 for backend in BACKENDS}
+        self._lock = threading.Lock()
+    
+    def add(self, backend: str):
+        with self._lock:
+            self.counts[backend] += 1
+    
+    def __getitem__(self, backend: str) -> int:
+        return self.counts[backend]
+    
+    def header_value(self) -> str:
+        return ", ".join(f"{backend}={count}" for backend, count in self.counts.items())
+
+# Current request's counter (None = not tracking)
+_current_counter: ContextVar = ContextVar("round_trip_counter", default=None)
+
+@contextmanager
+def track_round_trips():
+    """Count Mongo and Redis round trips made inside this block (Redis pipelines count once)"""
+    counter = RoundTripCounter()
+    token = _current_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _current_counter.reset(token)
+
+def count_round_trip(backend: str):
+    counter = _current_counter.get()
+    if counter is not None:
+        counter.add(backend)
+
+class MongoRoundTripListener(monitoring.CommandListener):
+    """Counts every command sent to MongoDB against the current request"""
+    def started(self, event):
+        count_round_trip("mongo")
+    
+    def succeeded(self, event):
+        pass
+    
+    def failed(self, event):
+        pass
+
+def budget_violations(route_key: str, counts: dict) -> dict:
+    """{backend: (count, budget)} for every backend over its budget"""
+    budget = ROUTE_ROUND_TRIP_BUDGETS.get(route_key)
+    if not budget:
+        return {}
+    return {
+        backend: (counts.get(backend, 0), limit)
+        for backend, limit in budget.items()
+        if counts.get(backend, 0) > limit
+    }
+
+def parse_round_trip_header(value: str) -> dict:
+    counts = {}
+    for part in value.split(","):
+        backend, _, count = part.strip().partition("=")
+        if backend:
+            counts[backend] = int(count)
+    return counts
+
+def assert_round_trip_budget(route_key: str, response=None, mongo: int = None, redis: int = None):
+    """
+    Test helper - fail when a request went over its round-trip budget
+    - `response`: any response with `.headers` (TestClient/httpx), read from X-Round-Trips
+    - `mongo` / `redis`: explicit counts, e.g. from `with track_round_trips() as counter`
+    - The budget comes from ROUTE_ROUND_TRIP_BUDGETS
+    """
+    if route_key not in ROUTE_ROUND_TRIP_BUDGETS:
+        raise AssertionError(f"No round-trip budget defined for {route_key}")
+    if response is not None:
+        header = response.headers.get("x-round-trips")
+        if header is None:
+            raise AssertionError("Response has no X-Round-Trips header (ROUND_TRIP_HEADER_ENABLED=false?)")
+        counts = parse_round_trip_header(header)
+    else:
+        counts = {"mongo": mongo or 0, "redis": redis or 0}
+    
+    violations = budget_violations(route_key, counts)
+    if violations:
+        details = ", ".join(f"{backend}={count} (budget {limit})" for backend, (count, limit) in violations.items())
+        raise AssertionError(f"{route_key} exceeded its round-trip budget: {details}")
+
+class RoundTripMiddleware:
+    """Pure ASGI middleware - per-request round-trip counts in metrics and a debug header"""
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        with track_round_trips() as counter:
+            async def send_wrapper(message):
+                # Counted up to the response start - work after that (streaming bodies) is not in the header
+                if message["type"] == "http.response.start" and ROUND_TRIP_HEADER_ENABLED:
+                    headers = list(message.get("headers", []))
+                    headers.append((ROUND_TRIP_HEADER, counter.header_value().encode("latin-1")))
+                    message = {**message, "headers": headers}
+                await send(message)
+            
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route is not None:
+                    for backend in BACKENDS:
+                        REQUEST_ROUND_TRIPS.labels(route, backend).observe(counter[backend])
+                    route_key = f"{scope.get('method')} {route}"
+                    for backend, (count, limit) in budget_violations(route_key, counter.counts).items():
+                        ROUND_TRIP_BUDGET_EXCEEDED.labels(route, backend).inc()
+                        print(f"⚠️ {route_key} made {count} {backend} round trips (budget {limit})")
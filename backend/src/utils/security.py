@@ -1,10 +1,28 @@
 # utils/security.py (Complete corrected version)
 import bcrypt
 import jwt
+import json
+import hashlib
+import secrets
 from datetime import datetime, timedelta
 import re
-from ..configs.config import JWT_ACCESS_SECRET, JWT_REFRESH_SECRET, JWT_ACCESS_EXPIRY, JWT_REFRESH_EXPIRY
-from ..configs.redis_client import redis_client
+from redis.exceptions import RedisError
+from ..configs.config import (
+    JWT_ACCESS_SECRET,
+    JWT_REFRESH_SECRET,
+    JWT_ACCESS_EXPIRY,
+    JWT_REFRESH_EXPIRY,
+    REFRESH_LOCK_TTL_MS,
+    REFRESH_GRACE_SECONDS,
+    DEGRADED_CACHE_MAX_ENTRIES
+)
+from ..configs.redis_client import redis_client, RedisUnavailableError
+from .csrf_security import csrf_protection
+from .local_cache import LocalTTLCache
+from .metrics import observe_jwt
+
+# ✅ Degraded mode: tokens blacklisted by this process (Redis မရတဲ့အချိန်အတွက်)
+local_blacklist = LocalTTLCache(DEGRADED_CACHE_MAX_ENTRIES, 15 * 60)
 
 def hash_password(password: str) -> str:
     """Hash password using bcrypt"""
@@ -43,27 +61,70 @@ def create_access_token(user_id: str, is_admin: bool = False) -> str:
         "type": "access",
         "exp": datetime.utcnow() + expiry_delta
     }
-    return jwt.encode(payload, JWT_ACCESS_SECRET, algorithm="HS256")
+    with observe_jwt("encode"):
+        return jwt.encode(payload, JWT_ACCESS_SECRET, algorithm="HS256")
 
-async def create_refresh_token(user_id: str) -> str:
-    """Create JWT refresh token and store in Redis"""
+def refresh_token_key(user_id: str) -> str:
+    """Redis key holding the current refresh token of a user"""
+    return f"refresh_token:{user_id}"
+
+def build_refresh_token(user_id: str):
+    """Create JWT refresh token without storing it, returns (token, expire_seconds)"""
     expiry_delta = _parse_jwt_expiry(JWT_REFRESH_EXPIRY)
     payload = {
         "id": user_id,
         "type": "refresh",
         "exp": datetime.utcnow() + expiry_delta
     }
-    refresh_token = jwt.encode(payload, JWT_REFRESH_SECRET, algorithm="HS256")
+    with observe_jwt("encode"):
+        refresh_token = jwt.encode(payload, JWT_REFRESH_SECRET, algorithm="HS256")
+    return refresh_token, int(expiry_delta.total_seconds())
+
+async def create_refresh_token(user_id: str) -> str:
+    """Create JWT refresh token and store in Redis"""
+    refresh_token, expire_seconds = build_refresh_token(user_id)
     
     # Store refresh token in Redis with expiry
-    expire_seconds = int(expiry_delta.total_seconds())
-    success = await redis_client.set_key(f"refresh_token:{user_id}", refresh_token, expire_seconds)
+    success = await redis_client.set_key(refresh_token_key(user_id), refresh_token, expire_seconds)
     
     if not success:
         print(f"❌ Failed to store refresh token in Redis for user: {user_id}")
     
     return refresh_token
 
+async def issue_session_tokens(user_id: str, is_admin: bool = False, rotated_from: str = None) -> dict:
+    """
+    Access + refresh + CSRF token တွေကို တစ်ခါတည်းထုတ်မယ်
+    - Refresh token, CSRF token (and grace entry when rotating) are stored
+      in a single MULTI/EXEC round trip
+    """
+    access_token = create_access_token(user_id, is_admin)
+    refresh_token, refresh_expire = build_refresh_token(user_id)
+    csrf_token = csrf_protection.build_csrf_token()
+    
+    issued_tokens = {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "csrf_token": csrf_token
+    }
+    
+    csrf_protection.remember_token(user_id, csrf_token)
+    try:
+        batch = redis_client.transaction()
+        async with batch as pipe:
+            pipe.setex(refresh_token_key(user_id), refresh_expire, refresh_token)
+            pipe.setex(csrf_protection.token_key(user_id, csrf_token), csrf_protection.token_expiry, "valid")
+            if rotated_from:
+                pipe.setex(_refresh_grace_key(rotated_from), REFRESH_GRACE_SECONDS, json.dumps(issued_tokens))
+    except (RedisUnavailableError, RedisError) as e:
+        # Degraded mode - access/CSRF tokens still work on this process,
+        # the refresh token can't be verified until Redis is back (re-login)
+        print(f"⚠️ Redis unavailable - session tokens not stored for user {user_id}: {e}")
+        return issued_tokens
+    
+    print(f"✅ Issued session tokens for user: {user_id}")
+    return issued_tokens
+
 async def verify_access_token(token: str):
     """Verify JWT access token and check blacklist"""
     # First check if token is blacklisted
@@ -72,7 +133,8 @@ async def verify_access_token(token: str):
         return None
     
     try:
-        payload = jwt.decode(token, JWT_ACCESS_SECRET, algorithms=["HS256"])
+        with observe_jwt("decode"):
+            payload = jwt.decode(token, JWT_ACCESS_SECRET, algorithms=["HS256"])
         if payload.get("type") != "access":
             return None
         return payload
@@ -83,28 +145,33 @@ async def verify_access_token(token: str):
 
 async def verify_refresh_token(token: str):
     """Verify JWT refresh token and check blacklist"""
-    # First check if token is blacklisted
-    if await is_token_blacklisted(token, "refresh"):
-        print(f"❌ Refresh token is blacklisted: {token[:20]}...")
-        return None
-    
     try:
-        payload = jwt.decode(token, JWT_REFRESH_SECRET, algorithms=["HS256"])
-        if payload.get("type") != "refresh":
-            return None
-        
-        # Check if refresh token exists in Redis
-        user_id = payload.get("id")
-        stored_token = await redis_client.get_key(f"refresh_token:{user_id}")
-        
-        if stored_token != token:
-            return None
-            
-        return payload
+        with observe_jwt("decode"):
+            payload = jwt.decode(token, JWT_REFRESH_SECRET, algorithms=["HS256"])
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
         return None
+    
+    if payload.get("type") != "refresh":
+        return None
+    
+    # Blacklist check + stored token lookup in one round trip
+    user_id = payload.get("id")
+    is_blacklisted, stored_token = await redis_client.mget([
+        f"blacklist:refresh:{token}",
+        refresh_token_key(user_id)
+    ])
+    
+    if is_blacklisted or f"refresh:{token}" in local_blacklist:
+        print(f"❌ Refresh token is blacklisted: {token[:20]}...")
+        return None
+    
+    # Check if refresh token exists in Redis
+    if stored_token != token:
+        return None
+        
+    return payload
 
 # utils/security.py - blacklist_token function ကို update
 
@@ -119,6 +186,9 @@ async def blacklist_token(token: str, token_type: str = "access", expire_seconds
     
     print(f"🔍 Attempting to blacklist - Key: {blacklist_key}, Expiry: {expire_seconds}s")
     
+    # Always keep a local copy so this process rejects the token during a Redis outage
+    local_blacklist.set(f"{token_type}:{token}", ttl=expire_seconds)
+    
     # Store with expiration (default 1 hour for access tokens)
     success = await redis_client.set_key(blacklist_key, "blacklisted", expire_seconds)
     
@@ -134,8 +204,17 @@ async def blacklist_token(token: str, token_type: str = "access", expire_seconds
 
 async def is_token_blacklisted(token: str, token_type: str = "access") -> bool:
     """Check if token is blacklisted"""
+    if f"{token_type}:{token}" in local_blacklist:
+        return True
+    
     blacklist_key = f"blacklist:{token_type}:{token}"
-    return await redis_client.exists_key(blacklist_key)
+    try:
+        return await redis_client.exists_key(blacklist_key, raise_errors=True)
+    except RedisUnavailableError:
+        # ✅ Degraded mode - signature/expiry are still checked by the caller,
+        # only tokens blacklisted on other workers during the outage slip through
+        print("⚠️ Redis unavailable - blacklist checked against local cache only")
+        return False
 
 async def blacklist_user_tokens(user_id: str, access_token: str, refresh_token: str):
     """Blacklist both access and refresh tokens for a user"""
@@ -147,9 +226,41 @@ async def blacklist_user_tokens(user_id: str, access_token: str, refresh_token:
     
     print(f"✅ Blacklisted all tokens for user: {user_id}")
 
+async def revoke_session(user_id: str, access_token: str = None, refresh_token: str = None) -> bool:
+    """
+    Logout အတွက် refresh token, CSRF tokens ဖျက်ပြီး tokens တွေကို blacklist လုပ်မယ်
+    - One KEYS lookup + one MULTI/EXEC instead of a round trip per step
+    """
+    if access_token and access_token != "None":
+        local_blacklist.set(f"access:{access_token}", ttl=15*60)
+    if refresh_token and refresh_token != "None":
+        local_blacklist.set(f"refresh:{refresh_token}", ttl=7*24*60*60)
+    csrf_protection.local_tokens.delete_prefix(csrf_protection.token_key(user_id, ""))
+    
+    csrf_keys = await redis_client.keys(csrf_protection.token_key(user_id, "*"))
+    
+    try:
+        batch = redis_client.transaction()
+        async with batch as pipe:
+            pipe.delete(refresh_token_key(user_id))
+            if csrf_keys:
+                pipe.delete(*csrf_keys)
+            if access_token and access_token != "None":
+                pipe.setex(f"blacklist:access:{access_token}", 15*60, "blacklisted")
+            if refresh_token and refresh_token != "None":
+                pipe.setex(f"blacklist:refresh:{refresh_token}", 7*24*60*60, "blacklisted")
+    except (RedisUnavailableError, RedisError) as e:
+        # ✅ Degraded mode - this process still rejects the tokens (local blacklist above),
+        # the stored refresh token survives until it expires or the next logout
+        print(f"⚠️ Redis unavailable - session for user {user_id} revoked locally only: {e}")
+        return False
+    
+    print(f"✅ Revoked session for user: {user_id} (csrf tokens: {len(csrf_keys)})")
+    return True
+
 async def revoke_refresh_token(user_id: str):
     """Revoke refresh token by deleting from Redis"""
-    success = await redis_client.delete_key(f"refresh_token:{user_id}")
+    success = await redis_client.delete_key(refresh_token_key(user_id))
     if success:
         print(f"✅ Revoked refresh token for user: {user_id}")
     else:
@@ -157,12 +268,38 @@ async def revoke_refresh_token(user_id: str):
 
 async def revoke_all_user_tokens(user_id: str):
     """Revoke all tokens for a user (logout all devices)"""
-    success = await redis_client.delete_key(f"refresh_token:{user_id}")
+    success = await redis_client.delete_key(refresh_token_key(user_id))
     if success:
         print(f"✅ Revoked all tokens for user: {user_id}")
     else:
         print(f"❌ Failed to revoke tokens for user: {user_id}")
 
+# ✅ Refresh coalescing - tab အများကြီးက တစ်ပြိုင်နက် refresh လုပ်တဲ့အခါ
+def _refresh_grace_key(token: str) -> str:
+    """Grace key is derived from a hash so raw refresh tokens are never used as key names"""
+    token_hash = hashlib.sha256(token.encode('utf-8')).hexdigest()
+    return f"refresh_grace:{token_hash}"
+
+async def acquire_refresh_lock(user_id: str):
+    """Acquire the per-user refresh lock, returns the lock owner value or None"""
+    lock_value = secrets.token_urlsafe(16)
+    acquired = await redis_client.set_key_nx(f"refresh_lock:{user_id}", lock_value, REFRESH_LOCK_TTL_MS)
+    return lock_value if acquired else None
+
+async def release_refresh_lock(user_id: str, lock_value: str):
+    """Release the per-user refresh lock only if we still own it"""
+    await redis_client.run_script("compare_and_delete", keys=[f"refresh_lock:{user_id}"], args=[lock_value])
+
+async def get_refresh_grace(old_refresh_token: str):
+    """Return the pair already issued for this refresh token (if still in grace window)"""
+    value = await redis_client.get_key(_refresh_grace_key(old_refresh_token))
+    if not value:
+        return None
+    try:
+        return json.loads(value)
+    except ValueError:
+        return None
+
 # Backward compatibility functions
 def create_jwt_token(user_id: str, is_admin: bool = False) -> str:
     """Legacy function for backward compatibility"""
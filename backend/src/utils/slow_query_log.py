@@ -0,0 +1,187 @@
+# utils/slow_query_log.py
+## Slow-query log for MongoDB
+## - A pymongo command listener picks up any operation slower than SLOW_QUERY_THRESHOLD_MS
+## - A background task normalizes the filter shape (no literal values), runs explain()
+##   once per shape per SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS and stores the entry in a capped collection
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime
+from pymongo import monitoring
+from ..configs.config import (
+    SLOW_QUERY_LOG_ENABLED,
+    SLOW_QUERY_THRESHOLD_MS,
+    SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS,
+    SLOW_QUERY_COLLECTION_SIZE_BYTES
+)
+
+SLOW_QUERY_COLLECTION = "slow_queries"
+
+# Commands we can explain, and the command fields that describe the query
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"}
+SHAPE_FIELDS = ("filter", "query", "q", "sort", "pipeline", "updates", "deletes", "key")
+EXPLAIN_FIELDS = (
+    "find", "aggregate", "count", "distinct", "update", "delete", "findAndModify",
+    "filter", "query", "sort", "projection", "skip", "limit", "pipeline", "cursor",
+    "updates", "deletes", "key", "hint", "collation", "remove", "new", "upsert", "fields"
+)
+# Plan stages that read an index (IDHACK / EXPRESS_* are _id and single-key fast paths)
+INDEX_STAGES = {"IXSCAN", "EXPRESS_IXSCAN", "EXPRESS_CLUSTERED_IXSCAN", "IDHACK", "COUNT_SCAN", "DISTINCT_SCAN"}
+QUEUE_MAX_SIZE = 1000
+
+def normalize_shape(value):
+    """Replace literal values with "?" but keep field names and operators"""
+    if isinstance(value, dict):
+        return {key: normalize_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        shapes = [normalize_shape(item) for item in value]
+        # Lists of literals ($in: [...]) collapse to one placeholder
+        if all(shape == "?" for shape in shapes):
+            return ["?"] if shapes else []
+        return shapes
+    return "?"
+
+def command_shape(command_name: str, command: dict) -> str:
+    shape = {"command": command_name}
+    for field in SHAPE_FIELDS:
+        if field in command:
+            shape[field] = normalize_shape(command[field])
+    return json.dumps(shape, sort_keys=True, default=str)
+
+def summarize_explain(explain: dict) -> dict:
+    """COLLSCAN vs IXSCAN, index names and docs/keys examined vs returned"""
+    planner = explain.get("queryPlanner") or {}
+    stats = explain.get("executionStats") or {}
+    if not planner and explain.get("stages"):
+        # aggregate explain wraps the planner in the first $cursor stage
+        cursor = explain["stages"][0].get("$cursor", {})
+        planner = cursor.get("queryPlanner", {})
+        stats = cursor.get("executionStats") or {}
+    stages, indexes = [], []
+    
+    def walk(plan):
+        if not isinstance(plan, dict):
+            return
+        stage = plan.get("stage")
+        if stage:
+            stages.append(stage)
+        if plan.get("indexName"):
+            indexes.append(plan["indexName"])
+        walk(plan.get("inputStage"))
+        walk(plan.get("queryPlan"))
+        for child in plan.get("inputStages", []):
+            walk(child)
+    
+    walk(planner.get("winningPlan"))
+    return {
+        "stages": stages,
+        "collscan": "COLLSCAN" in stages,
+        "ixscan": any(stage in INDEX_STAGES for stage in stages),
+        "indexes": indexes,
+        "docsExamined": stats.get("totalDocsExamined"),
+        "keysExamined": stats.get("totalKeysExamined"),
+        "nReturned": stats.get("nReturned")
+    }
+
+class SlowQueryListener(monitoring.CommandListener):
+    """
+    Runs on the driver's threads: only remembers explainable commands and hands
+    slow ones to the event loop - never does I/O itself
+    """
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.loop = None
+        self.queue = None
+    
+    def attach(self, loop, queue):
+        self.loop = loop
+        self.queue = queue
+    
+    def started(self, event):
+        if self.loop is None or event.command_name not in EXPLAINABLE_COMMANDS:
+            return
+        if event.command.get(event.command_name) == SLOW_QUERY_COLLECTION:
+            return
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (event.database_name, event.command)
+    
+    def succeeded(self, event):
+        self._finish(event)
+    
+    def failed(self, event):
+        self._finish(event)
+    
+    def _finish(self, event):
+        with self._lock:
+            pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+        duration_ms = event.duration_micros / 1000
+        if duration_ms < SLOW_QUERY_THRESHOLD_MS:
+            return
+        database_name, command = pending
+        self.loop.call_soon_threadsafe(self._enqueue, event.command_name, database_name, command, duration_ms)
+    
+    def _enqueue(self, command_name, database_name, command, duration_ms):
+        try:
+            self.queue.put_nowait((command_name, database_name, command, duration_ms))
+        except asyncio.QueueFull:
+            pass
+
+slow_query_listener = SlowQueryListener()
+
+async def ensure_slow_query_collection(db):
+    """Create the capped collection once"""
+    existing = await db.list_collection_names(filter={"name": SLOW_QUERY_COLLECTION})
+    if not existing:
+        await db.create_collection(SLOW_QUERY_COLLECTION, capped=True, size=SLOW_QUERY_COLLECTION_SIZE_BYTES)
+        print(f"✅ Created capped collection: {SLOW_QUERY_COLLECTION}")
+
+async def explain_command(db, command: dict) -> dict:
+    """Raw explain(executionStats) of a captured command"""
+    explain = {field: command[field] for field in EXPLAIN_FIELDS if field in command}
+    return await db.command({"explain": explain, "verbosity": "executionStats"})
+
+async def run_slow_query_worker(db):
+    """Background task: explain + store slow operations"""
+    if not SLOW_QUERY_LOG_ENABLED:
+        return
+    
+    await ensure_slow_query_collection(db)
+    queue = asyncio.Queue(maxsize=QUEUE_MAX_SIZE)
+    slow_query_listener.attach(asyncio.get_running_loop(), queue)
+    collection = db[SLOW_QUERY_COLLECTION]
+    last_explained = {}
+    
+    while True:
+        command_name, database_name, command, duration_ms = await queue.get()
+        try:
+            shape = command_shape(command_name, command)
+            entry = {
+                "command": command_name,
+                "collection": command.get(command_name),
+                "database": database_name,
+                "shape": shape,
+                "durationMs": round(duration_ms, 3),
+                "explain": None,
+                "createdAt": datetime.now()
+            }
+            
+            # Explain each shape at most once per interval - explain re-runs the query
+            now = time.monotonic()
+            if now - last_explained.get(shape, float("-inf")) >= SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS:
+                if len(last_explained) > QUEUE_MAX_SIZE:
+                    last_explained.clear()
+                last_explained[shape] = now
+                try:
+                    entry["explain"] = summarize_explain(await explain_command(db.client[database_name], command))
+                except Exception as e:
+                    print(f"⚠️ Slow query explain failed: {e}")
+            
+            await collection.insert_one(entry)
+            plan = entry["explain"] or {}
+            print(f"🐢 Slow {command_name} on {entry['collection']} ({duration_ms:.1f}ms) collscan={plan.get('collscan')}")
+        except Exception as e:
+            print(f"❌ Error recording slow query: {e}")
@@ -0,0 +1,51 @@
+# utils/slug_map.py
+## slug -> post id map for /api/post/slug/{slug}
+## - Redis hash (one HGET) with a short-lived in-process copy, MongoDB only on a miss
+## - Old slugs stay mapped to their post, the route answers them with a redirect
+## - Maintained by PostController create/update/delete
+from ..configs.redis_client import redis_client
+from ..configs.config import ENTITY_CACHE_ENABLED, ENTITY_CACHE_MAX_ENTRIES, ENTITY_CACHE_LOCAL_TTL_SECONDS
+from .local_cache import LocalTTLCache
+from .metrics import ENTITY_CACHE_REQUESTS
+
+SLUG_MAP_KEY = "post_slugs"
+
+class SlugMap:
+    def __init__(self):
+        self.local = LocalTTLCache(ENTITY_CACHE_MAX_ENTRIES, ENTITY_CACHE_LOCAL_TTL_SECONDS)
+    
+    async def resolve(self, slug: str, loader):
+        """Post id for slug, or `await loader()` (MongoDB) on a miss"""
+        if not ENTITY_CACHE_ENABLED:
+            return await loader()
+        
+        post_id = self.local.get(slug)
+        if post_id is not None:
+            ENTITY_CACHE_REQUESTS.labels("slug", "local").inc()
+            return post_id
+        
+        post_id = await redis_client.hget(SLUG_MAP_KEY, slug)
+        if post_id is not None:
+            ENTITY_CACHE_REQUESTS.labels("slug", "redis").inc()
+        else:
+            ENTITY_CACHE_REQUESTS.labels("slug", "miss").inc()
+            post_id = await loader()
+            if post_id is None:
+                return None
+            await redis_client.hset(SLUG_MAP_KEY, {slug: post_id})
+        
+        self.local.set(slug, post_id)
+        return post_id
+    
+    async def remember(self, slug: str, post_id: str):
+        """Map slug to post_id (new posts and regenerated slugs)"""
+        self.local.set(slug, post_id)
+        await redis_client.hset(SLUG_MAP_KEY, {slug: post_id})
+    
+    async def forget(self, *slugs):
+        """Drop slugs of a deleted post"""
+        for slug in slugs:
+            self.local.delete(slug)
+        await redis_client.hdel(SLUG_MAP_KEY, *slugs)
+
+post_slugs = SlugMap()
@@ -0,0 +1,212 @@
+# utils/trending.py
+## Popular and trending posts without touching MongoDB on reads
+## - A public post read runs one Lua script: PFADD the viewer into the post's HyperLogLog and,
+##   for a new viewer, ZINCRBY the post's trending score and mark the post dirty
+## - Trending scores decay with TRENDING_HALF_LIFE_HOURS: a view adds 2^((t - epoch) / half-life),
+##   so a score read at time t is divided by 2^((t - epoch) / half-life); the worker rebases
+##   (scales the set down, moves the epoch) long before the weights overflow
+## - The worker flushes dirty posts in batches: PFCOUNT -> posts.views in MongoDB and the
+##   "popular" sorted set (unique views, all time)
+## - Top N is ZREVRANGE - O(log n + N); deleted posts are dropped by the outbox "trending" consumer
+import asyncio
+import hashlib
+import ipaddress
+import re
+import time
+from bson import ObjectId
+from ..configs.redis_client import redis_client
+from .security import verify_jwt_token
+from ..configs.config import (
+    TRENDING_ENABLED,
+    TRENDING_HALF_LIFE_HOURS,
+    TRENDING_MAX_POSTS,
+    TRENDING_FLUSH_SECONDS,
+    TRENDING_FLUSH_BATCH,
+    VISITOR_COOKIE_MAX_AGE,
+    TRUSTED_PROXIES
+)
+
+TRENDING_KEY = "posts:trending"
+POPULAR_KEY = "posts:popular"
+EPOCH_KEY = "posts:trending:epoch"
+DIRTY_KEY = "posts:views:dirty"
+# Rebase once weights reach 2^REBASE_EXPONENT (doubles overflow near 2^1024)
+REBASE_EXPONENT = 64
+# Scores below this (fraction of one fresh view) are trimmed after a rebase
+MIN_TRENDING_SCORE = 0.001
+
+def views_key(post_id: str) -> str:
+    return f"post:views:{post_id}"
+
+VISITOR_COOKIE = "visitor_id"
+VISITOR_ID_RE = re.compile(r"^[0-9a-f]{16}$")
+TRUSTED_PROXY_NETWORKS = [ipaddress.ip_network(proxy, strict=False) for proxy in TRUSTED_PROXIES]
+
+def _is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in TRUSTED_PROXY_NETWORKS)
+
+def client_address(request) -> str:
+    """
+    The visitor's address - X-Forwarded-For is only believed when the request came from a
+    trusted proxy, and then read right to left up to the first hop that isn't one
+    """
+    address = request.client.host if request.client else ""
+    if not _is_trusted_proxy(address):
+        return address
+    for hop in reversed(request.headers.get("x-forwarded-for", "").split(",")):
+        hop = hop.strip()
+        if not hop:
+            continue
+        address = hop
+        if not _is_trusted_proxy(hop):
+            break
+    return address
+
+def viewer_key(request, response=None) -> str:
+    """
+    Viewer identity for unique-view counting, in order:
+    - signed-in user: their id (signature checked, no blacklist round trip)
+    - anonymous: the visitor cookie; a first visit is keyed on client address + user agent and
+      that key is set as the cookie, so the visitor keeps it when their address changes
+    """
+    token = request.cookies.get("access_token")
+    if token:
+        payload = verify_jwt_token(token)
+        if payload and payload.get("type") == "access" and payload.get("id"):
+            return f"user:{payload['id']}"
+    
+    visitor_id = request.cookies.get(VISITOR_COOKIE, "")
+    if not VISITOR_ID_RE.match(visitor_id):
+        agent = request.headers.get("user-agent", "")
+        visitor_id = hashlib.sha1(f"{client_address(request)}|{agent}".encode()).hexdigest()[:16]
+        if response is not None:
+            response.set_cookie(
+                key=VISITOR_COOKIE,
+                value=visitor_id,
+                httponly=True,
+                secure=False,
+                samesite="lax",
+                max_age=VISITOR_COOKIE_MAX_AGE
+            )
+    return f"visitor:{visitor_id}"
+
+class TrendingPosts:
+    def __init__(self, half_life_hours: float = TRENDING_HALF_LIFE_HOURS):
+        self.half_life = half_life_hours * 60 * 60
+        self.running = False
+        self._posts = None
+    
+    def _post_model(self):
+        if self._posts is None:
+            from ..models.post_model import PostModel
+            self._posts = PostModel()
+        return self._posts
+    
+    async def record_view(self, post_id: str, viewer: str):
+        """One round trip; a repeat viewer changes nothing"""
+        if not TRENDING_ENABLED or not redis_client.is_available:
+            return
+        await redis_client.run_script(
+            "record_view",
+            keys=[views_key(post_id), TRENDING_KEY, EPOCH_KEY, DIRTY_KEY],
+            args=[viewer, post_id, time.time(), self.half_life]
+        )
+    
+    async def top(self, sort: str, limit: int) -> list:
+        """[(post_id, score), ...] best first - trending scores are decayed to now"""
+        if not redis_client.is_available:
+            return []
+        key = TRENDING_KEY if sort == "trending" else POPULAR_KEY
+        try:
+            batch = redis_client.pipeline()
+            async with batch as pipe:
+                pipe.zrevrange(key, 0, limit - 1, withscores=True)
+                pipe.get(EPOCH_KEY)
+            entries, epoch = batch.results
+        except Exception as e:
+            print(f"❌ Error reading {key}: {e}")
+            return []
+        if sort != "trending" or epoch is None:
+            return entries
+        decay = 2 ** (-(time.time() - float(epoch)) / self.half_life)
+        return [(post_id, score * decay) for post_id, score in entries]
+    
+    async def forget(self, *post_ids):
+        """Deleted posts leave both rankings"""
+        if not post_ids:
+            return
+        batch = redis_client.pipeline()
+        async with batch as pipe:
+            pipe.zrem(TRENDING_KEY, *post_ids)
+            pipe.zrem(POPULAR_KEY, *post_ids)
+            pipe.srem(DIRTY_KEY, *post_ids)
+            pipe.delete(*(views_key(post_id) for post_id in post_ids))
+    
+    async def flush(self) -> int:
+        """Copy unique-view counts of posts viewed since the last flush to MongoDB; returns posts flushed"""
+        flushed = 0
+        while True:
+            post_ids = await redis_client.spop(DIRTY_KEY, TRENDING_FLUSH_BATCH)
+            if not post_ids:
+                break
+            try:
+                batch = redis_client.pipeline()
+                async with batch as pipe:
+                    for post_id in post_ids:
+                        pipe.pfcount(views_key(post_id))
+                counts = dict(zip(post_ids, batch.results))
+                
+                await self._post_model().set_view_counts({
+                    post_id: count for post_id, count in counts.items() if ObjectId.is_valid(post_id)
+                })
+                batch = redis_client.pipeline()
+                async with batch as pipe:
+                    pipe.zadd(POPULAR_KEY, counts)
+                    pipe.zremrangebyrank(POPULAR_KEY, 0, -(TRENDING_MAX_POSTS + 1))
+                flushed += len(post_ids)
+            except Exception:
+                # Try these again next time
+                await redis_client.sadd(DIRTY_KEY, *post_ids)
+                raise
+            if len(post_ids) < TRENDING_FLUSH_BATCH:
+                break
+        await self._trim()
+        return flushed
+    
+    async def _trim(self):
+        rebased = await redis_client.run_script(
+            "rebase_trending",
+            keys=[TRENDING_KEY, EPOCH_KEY],
+            args=[time.time(), self.half_life, REBASE_EXPONENT]
+        )
+        batch = redis_client.pipeline()
+        async with batch as pipe:
+            if rebased:
+                pipe.zremrangebyscore(TRENDING_KEY, 0, MIN_TRENDING_SCORE)
+            pipe.zremrangebyrank(TRENDING_KEY, 0, -(TRENDING_MAX_POSTS + 1))
+    
+    async def run_flusher(self):
+        """Worker loop - flush every TRENDING_FLUSH_SECONDS until stop()"""
+        if not TRENDING_ENABLED:
+            return
+        self.running = True
+        while self.running:
+            try:
+                flushed = await self.flush()
+                if flushed:
+                    print(f"👀 Flushed view counts of {flushed} post(s)")
+            except Exception as e:
+                print(f"❌ View count flush failed: {e}")
+            # Short sleeps - stop() shouldn't wait a whole interval
+            deadline = time.monotonic() + TRENDING_FLUSH_SECONDS
+            while self.running and time.monotonic() < deadline:
+                await asyncio.sleep(min(1, TRENDING_FLUSH_SECONDS))
+    
+    def stop(self):
+        self.running = False
+
+trending_posts = TrendingPosts()
@@ -0,0 +1,41 @@
+# worker.py
+## Background worker - consumes the Redis Stream job queue (utils/job_queue.py),
+## dispatches outbox events to their consumers (utils/outbox.py) and flushes post view
+## counts to MongoDB (utils/trending.py)
+## Usage (from backend/):  python -m src.worker
+## Run as many as needed; each process is its own consumer in the "workers" group, and each
+## outbox consumer is delivered by one process at a time (lease)
+import asyncio
+import signal
+from prometheus_client import start_http_server
+from .configs.database import db
+from .configs.redis_client import redis_client
+from .configs.config import JOB_WORKER_METRICS_PORT
+from .utils.job_queue import job_queue
+from .utils.outbox import outbox_dispatcher
+from .utils.trending import trending_posts
+
+def stop():
+    job_queue.stop()
+    outbox_dispatcher.stop()
+    trending_posts.stop()
+
+async def main():
+    await db.command("ping")
+    await redis_client.connect()
+    if JOB_WORKER_METRICS_PORT:
+        # Worker metrics (jobs_processed_total, outbox_lag_seconds, ...) on their own port
+        start_http_server(JOB_WORKER_METRICS_PORT)
+    
+    # Finish the current job / outbox batch, then exit
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop)
+    
+    try:
+        await asyncio.gather(job_queue.run_worker(), outbox_dispatcher.run(), trending_posts.run_flusher())
+    finally:
+        await redis_client.disconnect()
+
+if __name__ == "__main__":
+    asyncio.run(main())
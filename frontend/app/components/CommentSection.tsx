@@ -42,7 +42,8 @@ export default function CommentSection({ postId }) {
       if (res.ok) {
         setComment('');
         setCommentError(null);
-        setComments([data, ...comments]);
+        // The live event for this comment may already have added it
+        setComments((prev) => (prev.some((c) => c.id === data.id) ? prev : [data, ...prev]));
       }
     } catch (error) {
       setCommentError('Something went wrong');
@@ -64,6 +65,41 @@ export default function CommentSection({ postId }) {
     getComments();
   }, [postId]);
 
+  // Live updates - the server pushes only what changed (new, liked, edited, deleted comments)
+  useEffect(() => {
+    const source = new EventSource(`/api/post/public/live/${postId}`);
+    const on = (type, handler) =>
+      source.addEventListener(type, (event) => handler(JSON.parse(event.data)));
+
+    on('comment.created', (created) => {
+      setComments((prev) => (prev.some((c) => c.id === created.id) ? prev : [created, ...prev]));
+    });
+    on('comment.liked', ({ id, userId, liked, numberOfLikes }) => {
+      setComments((prev) =>
+        prev.map((c) => {
+          if (c.id !== id) return c;
+          const others = (c.likes || []).filter((likedBy) => likedBy !== userId);
+          return { ...c, numberOfLikes, likes: liked ? [...others, userId] : others };
+        })
+      );
+    });
+    on('comment.updated', ({ id, content }) => {
+      setComments((prev) => prev.map((c) => (c.id === id ? { ...c, content } : c)));
+    });
+    on('comment.deleted', ({ id }) => {
+      setComments((prev) => prev.filter((c) => c.id !== id));
+    });
+    // Missed too many events while disconnected - refetch once
+    on('reset', async () => {
+      const res = await apiInterceptor.request(`/api/comment/getPostComments/${postId}`);
+      if (res.ok) {
+        setComments(await res.json());
+      }
+    });
+
+    return () => source.close();
+  }, [postId]);
+
   const handleLike = async (commentId) => {
     if (!currentUser) {
       router.push('/sign-in');
@@ -14,6 +14,11 @@ const nextConfig: NextConfig = {
         source: '/auth/:path*',
         destination: `${backendUrl}/auth/:path*`,
       },
+      // Feeds and sitemaps are prebuilt by the backend
+      {
+        source: '/:file(feed\\.xml|atom\\.xml|sitemap\\.xml|sitemap-\\d+\\.xml)',
+        destination: `${backendUrl}/:file`,
+      },
     ];
   },
   // For Docker
@@ -0,0 +1,35 @@
+#!/bin/bash
+
+# Load test: 50 concurrent refreshes for one user (multiple tabs)
+# Every request must succeed and all of them must receive the same new refresh token
+BASE_URL=${BASE_URL:-http://localhost:8000}
+EMAIL=${EMAIL:-admin@gmail.com}
+PASSWORD=${PASSWORD:-admin}
+CONCURRENCY=${CONCURRENCY:-50}
+
+WORK_DIR=$(mktemp -d)
+trap 'rm -rf "$WORK_DIR"' EXIT
+
+# Sign in once and keep the cookies (same refresh token for every "tab")
+curl -s -o /dev/null -c "$WORK_DIR/cookies.txt" -X POST "$BASE_URL/api/auth/signin" \
+  -H "Content-Type: application/json" \
+  -d "{\"email\": \"$EMAIL\", \"password\": \"$PASSWORD\"}"
+
+for i in $(seq 1 "$CONCURRENCY"); do
+  curl -s -o /dev/null -w "%{http_code}\n" \
+    -b "$WORK_DIR/cookies.txt" -c "$WORK_DIR/cookies_$i.txt" \
+    -X POST "$BASE_URL/api/auth/refresh" > "$WORK_DIR/status_$i.txt" &
+done
+wait
+
+OK_COUNT=$(cat "$WORK_DIR"/status_*.txt | grep -c '^200$')
+UNIQUE_TOKENS=$(grep -h refresh_token "$WORK_DIR"/cookies_*.txt | awk '{print $7}' | sort -u | wc -l)
+
+echo "Successful refreshes: $OK_COUNT / $CONCURRENCY"
+echo "Distinct refresh tokens issued: $UNIQUE_TOKENS"
+
+if [ "$OK_COUNT" -ne "$CONCURRENCY" ] || [ "$UNIQUE_TOKENS" -ne 1 ]; then
+  echo "❌ Refresh coalescing failed"
+  exit 1
+fi
+echo "✅ All concurrent refreshes returned the same token pair"